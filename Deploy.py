@@ -0,0 +1,203 @@
+"""Deploys the tree to the synced drive, copying only what changed so the cloud client has nothing else to upload."""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+SOURCE = Path(__file__).resolve().parent
+DEST = Path(r"G:\My Drive\Data\Resonance")
+MANIFEST = ".resonance-manifest.json"
+MANIFEST_VERSION = 1
+# Same as robocopy /XD .* __pycache__ /XF deploy.bat .*
+EXCLUDED_DIRS = ("__pycache__",)
+EXCLUDED_FILES = ("deploy.bat", "deploy.py")
+CHUNK = 1 << 20
+
+
+def excluded_dir(name):
+    return name.startswith(".") or name in EXCLUDED_DIRS
+
+
+def excluded_file(name):
+    return name.startswith(".") or name.lower() in EXCLUDED_FILES
+
+
+def walk(root):
+    """relative posix path -> os.stat_result for every deployable file under root."""
+    files = {}
+    for current, dirs, names in os.walk(root):
+        dirs[:] = [d for d in dirs if not excluded_dir(d)]
+        for name in names:
+            if excluded_file(name):
+                continue
+            path = Path(current, name)
+            files[path.relative_to(root).as_posix()] = path.stat()
+    return files
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(dest):
+    """What the last deploy wrote: relative path -> {"sha256", "size", "mtime_ns"} (size and mtime of the source)."""
+    try:
+        with open(Path(dest) / MANIFEST, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == MANIFEST_VERSION:
+            return data["files"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+
+def save_manifest(dest, files):
+    dest = Path(dest)
+    fd, tmp = tempfile.mkstemp(dir=dest, prefix=f"{MANIFEST}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": files}, f, indent=1, sort_keys=True)
+        os.replace(tmp, dest / MANIFEST)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+@dataclass
+class DeployPlan:
+    copy: list = field(default_factory=list)       # relative paths to (re)write
+    unchanged: list = field(default_factory=list)
+    prune: list = field(default_factory=list)      # destination files with no source any more
+    manifest: dict = field(default_factory=dict)   # the manifest once the copies succeed
+    previous: dict = field(default_factory=dict)   # the manifest as the last deploy left it
+
+
+def plan(source, dest, prune=False):
+    """Works out what to copy. Hashing is skipped for files whose size and mtime match the manifest."""
+    source, dest = Path(source), Path(dest)
+    old = load_manifest(dest)
+    result = DeployPlan(previous=old)
+
+    for rel, stat in sorted(walk(source).items()):
+        entry = old.get(rel)
+        target = dest / rel
+        try:
+            target_size = target.stat().st_size
+        except OSError:
+            target_size = None
+
+        if entry and (entry["size"], entry["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns) and target_size == entry["size"]:
+            result.unchanged.append(rel)
+            result.manifest[rel] = entry
+            continue
+
+        digest = sha256_file(source / rel)
+        record = {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if target_size == stat.st_size and (
+                (entry and entry["sha256"] == digest) or (not entry and sha256_file(target) == digest)):
+            # Touched but identical (or deployed before the manifest existed): just remember it
+            result.unchanged.append(rel)
+        else:
+            result.copy.append(rel)
+        result.manifest[rel] = record
+
+    if prune and dest.is_dir():
+        result.prune = sorted(set(walk(dest)) - set(result.manifest))
+    return result
+
+
+def copy_file(source, dest, rel):
+    """Copies through a temp file in the destination folder, so a sync client never sees half a file."""
+    target = Path(dest) / rel
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        shutil.copy2(Path(source) / rel, tmp)
+        os.replace(tmp, target)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def remove_empty_dirs(root, rels):
+    """Removes the now-empty folders pruned files leave behind, deepest first."""
+    root = Path(root)
+    parents = {parent for rel in rels for parent in Path(rel).parents if parent != Path(".")}
+    for parent in sorted(parents, key=lambda p: len(p.parts), reverse=True):
+        try:
+            (root / parent).rmdir()
+        except OSError:
+            pass
+
+
+def deploy(source, dest, prune=False, dry_run=False, workers=8, log=print):
+    """Returns (plan, failures) where failures is a list of (relative path, error)."""
+    source, dest = Path(source), Path(dest)
+    started = time.perf_counter()
+    result = plan(source, dest, prune)
+    failures = []
+
+    for rel in result.copy:
+        log(f"  + {rel}")
+    for rel in result.prune:
+        log(f"  - {rel}")
+    if dry_run:
+        log(f"Dry run: {len(result.copy)} to copy, {len(result.prune)} to prune, {len(result.unchanged)} unchanged.")
+        return result, failures
+
+    dest.mkdir(parents=True, exist_ok=True)
+    if result.copy:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(result.copy)))) as pool:
+            futures = {rel: pool.submit(copy_file, source, dest, rel) for rel in result.copy}
+        for rel, future in futures.items():
+            if future.exception():
+                failures.append((rel, future.exception()))
+                # Forget it, so the next deploy tries again
+                del result.manifest[rel]
+
+    for rel in result.prune:
+        try:
+            (dest / rel).unlink()
+        except OSError as e:
+            failures.append((rel, e))
+    remove_empty_dirs(dest, result.prune)
+
+    # A rewritten manifest is one more file for the sync client to upload; only write it when it says something new
+    if result.manifest != result.previous:
+        save_manifest(dest, result.manifest)
+    for rel, error in failures:
+        log(f"  ! {rel}: {error}")
+    copied = sum(1 for rel in result.copy if rel in result.manifest)
+    log(f"Deployed {copied} file(s), "
+        f"pruned {len(result.prune)}, {len(result.unchanged)} unchanged in {time.perf_counter() - started:.2f}s.")
+    return result, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Copy only new or changed files to the deploy folder.")
+    parser.add_argument("--source", type=Path, default=SOURCE, help="Tree to deploy (default: this folder).")
+    parser.add_argument("--dest", type=Path, default=DEST, help=f"Destination (default: {DEST}).")
+    parser.add_argument("--prune", action="store_true", help="Delete destination files that no longer exist in the source.")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would change without touching anything.")
+    parser.add_argument("--workers", type=int, default=8, help="Parallel copies.")
+    args = parser.parse_args(argv)
+
+    print(f'Deploying from "{args.source}" to "{args.dest}"...')
+    _, failures = deploy(args.source, args.dest, args.prune, args.dry_run, args.workers)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
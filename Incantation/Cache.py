@@ -0,0 +1,42 @@
+"""Where the ritual keeps what it remembers between runs."""
+import json
+import os
+import tempfile
+from pathlib import Path
+
+
+def cache_dir():
+    """Per-user cache folder (%LOCALAPPDATA%\\Resonance, or ~/.cache/resonance off-Windows)."""
+    base = os.environ.get("LOCALAPPDATA")
+    path = Path(base) / "Resonance" if base else Path.home() / ".cache" / "resonance"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def atomic_write_text(path, text):
+    """Writes through a temp file in the same folder so readers never see half a file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_json(path, data):
+    atomic_write_text(path, json.dumps(data, indent=1))
+
+
+def read_json(path, default=None):
+    """Reads a JSON file, treating a missing or mangled file as `default`."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
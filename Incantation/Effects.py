@@ -0,0 +1,108 @@
+"""Side effects steps ask for but do not perform: queued, deduplicated, and run once at the end in a fixed order."""
+import threading
+from dataclasses import dataclass, field
+
+HWND_BROADCAST = 0xFFFF
+WM_SETTINGCHANGE = 0x001A
+SMTO_ABORTIFHUNG = 0x0002
+SPI_SETDESKWALLPAPER = 20
+SPIF_UPDATEINIFILE_SENDCHANGE = 3
+
+
+@dataclass(frozen=True)
+class Effect:
+    name: str
+    title: str
+    action: object           # called with no arguments; raising marks the effect failed
+    order: int = 50          # lower runs first
+    disruptive: bool = False  # needs the apprentice's consent (e.g. blanks the screen)
+
+
+@dataclass
+class EffectOutcome:
+    effect: Effect
+    reasons: list = field(default_factory=list)
+    status: str = "pending"  # done, failed, or held (disruptive and not allowed)
+    error: str = ""
+
+
+class EffectQueue:
+    """Steps request effects by name from any thread; run() performs each requested one exactly once."""
+
+    def __init__(self, on_request=None, on_done=None):
+        self.known = {}
+        self.requested = {}  # name -> reasons, in request order
+        # Hooks for keeping a durable copy of what is still owed: on_request(name, reason), on_done(name)
+        self.on_request = on_request or (lambda name, reason: None)
+        self.on_done = on_done or (lambda name: None)
+        self._lock = threading.Lock()
+
+    def define(self, name, title, action, order=50, disruptive=False):
+        self.known[name] = Effect(name, title, action, order, disruptive)
+
+    def request(self, name, reason=""):
+        if name not in self.known:
+            raise KeyError(f"unknown effect: {name}")
+        with self._lock:
+            reasons = self.requested.setdefault(name, [])
+            if reason and reason not in reasons:
+                reasons.append(reason)
+        self.on_request(name, reason)
+
+    def pending(self):
+        """[(effect, reasons)] in the order they would run."""
+        with self._lock:
+            items = [(self.known[name], list(reasons)) for name, reasons in self.requested.items()]
+        return sorted(items, key=lambda item: item[0].order)
+
+    def run(self, allow_disruptive=True):
+        """Performs everything pending once, in order. Disruptive effects stay queued when not allowed."""
+        outcomes = []
+        for effect, reasons in self.pending():
+            outcome = EffectOutcome(effect, reasons)
+            if effect.disruptive and not allow_disruptive:
+                outcome.status = "held"
+                outcomes.append(outcome)
+                continue
+            with self._lock:
+                self.requested.pop(effect.name, None)
+            try:
+                effect.action()
+                outcome.status = "done"
+                self.on_done(effect.name)
+            except Exception as e:
+                outcome.status = "failed"
+                outcome.error = str(e) or type(e).__name__
+            outcomes.append(outcome)
+        return outcomes
+
+
+def broadcast_environment():
+    """Tells running programs (Explorer first of all) that HKCU\\Environment changed, so new shells see the PATH."""
+    import ctypes
+    from ctypes import wintypes
+    result = wintypes.DWORD()
+    sent = ctypes.windll.user32.SendMessageTimeoutW(HWND_BROADCAST, WM_SETTINGCHANGE, 0, "Environment",
+                                                    SMTO_ABORTIFHUNG, 5000, ctypes.byref(result))
+    if not sent:
+        raise OSError("environment broadcast timed out")
+
+
+def refresh_wallpaper(path):
+    """Python equivalent of SystemParametersInfo for wallpaper."""
+    import ctypes
+    if not ctypes.windll.user32.SystemParametersInfoW(SPI_SETDESKWALLPAPER, 0, str(path), SPIF_UPDATEINIFILE_SENDCHANGE):
+        raise OSError(f"wallpaper {path} was not accepted")
+
+
+def restart_explorer(powershell):
+    """One restart for every sigil that needs it. Windows usually respawns Explorer itself; start it if not."""
+    result = powershell.run("""
+    Stop-Process -Name explorer -Force -ErrorAction SilentlyContinue
+    Start-Sleep -Seconds 2
+    if (-not (Get-Process explorer -ErrorAction SilentlyContinue)) {
+        Start-Process explorer
+    }
+    """)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"exit {result.returncode}")
@@ -0,0 +1,181 @@
+"""Fleet mode: the same ritual on many machines at once, a few at a time, each with its own log and verdict."""
+import argparse
+import asyncio
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from rich.console import Console
+from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
+from rich.table import Table
+
+import Incantation
+from Cache import cache_dir
+from Journal import RunJournal
+from Output import StepConsole
+from Rehearsal import PROFILES
+from Transport import RemoteTransport, StandInTransport
+
+# Steps whose checks and changes all go through the transport. The rest read this machine's disk
+# (fonts, share, drive, PATH, taskbar) and would report on the wrong computer.
+FLEET_STEPS = ("software", "settings", "gemini", "desktop")
+
+
+@dataclass
+class TargetResult:
+    name: str
+    status: str = "pending"   # done, failed (some step did), or error (the run itself broke)
+    outcomes: dict = field(default_factory=dict)
+    duration: float = 0.0
+    log: str = ""
+    error: str = ""
+
+
+def provision(transport, steps, log_path, restart_explorer=False):
+    """One machine, start to finish, headless. Runs in a worker thread; everything it says goes to its log."""
+    result = TargetResult(transport.name, log=str(log_path))
+    start = time.perf_counter()
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, "w", encoding="utf-8") as log_file:
+        log = StepConsole(Console(file=log_file, theme=Incantation.custom_theme, width=120, force_terminal=False),
+                          Incantation.custom_theme)
+        try:
+            answers = {step: step in steps for step in Incantation.STEPS}
+            answers["finalize"] = restart_explorer
+            journal = RunJournal(transport.cache / "journal.json").load()
+            incantator = Incantation.Incantator(transport=transport, headless=True, answers=answers,
+                                                journal=journal, only=steps, log=log)
+            log.rule(f"[arcane]{transport.name}[/arcane]")
+            incantator.survey()
+            incantator.gather_consent()
+            incantator.perform()
+            result.outcomes = dict(incantator.outcomes)
+            result.status = "failed" if incantator.exit_code else "done"
+            if not incantator.exit_code:
+                journal.finish()
+        except Exception as e:
+            result.status = "error"
+            result.error = str(e) or type(e).__name__
+            log.print(f"[error]  ! The ritual broke: {result.error}[/error]")
+        finally:
+            try:
+                transport.close()
+            except Exception:
+                pass
+    result.duration = time.perf_counter() - start
+    return result
+
+
+class FleetRunner:
+    """Provisions every target, at most `max_concurrent` at once."""
+
+    def __init__(self, transports, steps, max_concurrent=4, log_dir=None, restart_explorer=False, on_event=None):
+        self.transports = list(transports)
+        self.steps = tuple(steps)
+        unsupported = set(self.steps) - set(FLEET_STEPS)
+        if unsupported:
+            raise ValueError(f"not available in fleet mode: {', '.join(sorted(unsupported))}")
+        self.max_concurrent = max(1, max_concurrent)
+        self.log_dir = Path(log_dir) if log_dir else cache_dir() / "fleet"
+        self.restart_explorer = restart_explorer
+        # on_event(name, state) with state in: waiting, running, done, failed, error
+        self.on_event = on_event or (lambda name, state: None)
+
+    async def _one(self, gate, transport):
+        async with gate:
+            self.on_event(transport.name, "running")
+            log_path = self.log_dir / f"{transport.name}.log"
+            result = await asyncio.to_thread(provision, transport, self.steps, log_path, self.restart_explorer)
+        self.on_event(transport.name, result.status)
+        return result
+
+    async def run(self):
+        """Results in target order."""
+        gate = asyncio.Semaphore(self.max_concurrent)
+        for transport in self.transports:
+            self.on_event(transport.name, "waiting")
+        return await asyncio.gather(*(self._one(gate, transport) for transport in self.transports))
+
+
+def summary_table(results):
+    table = Table(title="[arcane]The Fleet[/arcane]", header_style="bold magenta", box=None)
+    table.add_column("Machine")
+    table.add_column("Verdict")
+    table.add_column("Steps")
+    table.add_column("Time", justify="right")
+    table.add_column("Log")
+    verdicts = {"done": "[success]attuned[/success]", "failed": "[warning]resisted[/warning]", "error": "[error]broken[/error]"}
+    for result in results:
+        done = [step for step, outcome in result.outcomes.items() if outcome in ("done", "harmony")]
+        failed = [step for step, outcome in result.outcomes.items() if outcome in ("failed", "blocked")]
+        steps = f"{len(done)} settled" + (f", [error]{', '.join(failed)}[/error]" if failed else "")
+        if result.error:
+            steps = f"[error]{result.error}[/error]"
+        table.add_row(result.name, verdicts.get(result.status, result.status), steps, f"{result.duration:.1f}s", Path(result.log).name)
+    return table
+
+
+def load_hosts(path):
+    """Host names, one per line; blank lines and # comments are skipped."""
+    hosts = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            hosts.append(line)
+    return hosts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Provision many machines at once over PowerShell remoting.")
+    targets = parser.add_mutually_exclusive_group(required=True)
+    targets.add_argument("--hosts", metavar="FILE", help="Machines to provision, one host name per line.")
+    targets.add_argument("--simulate", type=int, metavar="N", help="Rehearse against N stand-in machines instead.")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="nominal", help="How slow and flaky the stand-ins are.")
+    parser.add_argument("--steps", default=",".join(FLEET_STEPS),
+                        help=f"Comma-separated steps to perform on every machine ({', '.join(FLEET_STEPS)}).")
+    parser.add_argument("--concurrency", type=int, default=4, help="Machines provisioned at the same time.")
+    parser.add_argument("--user", help="Account the remote sessions sign in as (default: you).")
+    parser.add_argument("--logs", metavar="DIR", help="Where each machine's log goes (default: the Resonance cache).")
+    parser.add_argument("--restart-explorer", action="store_true", help="Let the finale restart Explorer on each machine.")
+    args = parser.parse_args(argv)
+
+    steps = [step.strip() for step in args.steps.split(",") if step.strip()]
+    unsupported = set(steps) - set(FLEET_STEPS)
+    if unsupported:
+        parser.error(f"not available in fleet mode: {', '.join(sorted(unsupported))}")
+
+    if args.simulate:
+        transports = [StandInTransport(f"standin-{n:02d}", PROFILES[args.profile], seed=n) for n in range(1, args.simulate + 1)]
+    else:
+        transports = [RemoteTransport(host, args.user) for host in load_hosts(args.hosts)]
+
+    console = Console(theme=Incantation.custom_theme)
+    console.rule("[arcane]~~~ THE FLEET CONJURATION ~~~[/arcane]")
+    labels = {
+        "waiting": "[dim]{} waits...[/dim]",
+        "running": "[yellow]Attuning {}...[/yellow]",
+        "done": "[green]{} attuned[/green]",
+        "failed": "[red]{} resisted[/red]",
+        "error": "[red]{} broke[/red]",
+    }
+    with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), TimeElapsedColumn(),
+                  console=console, transient=True) as progress:
+        rows = {}
+
+        def on_event(name, state):
+            if name not in rows:
+                rows[name] = progress.add_task(labels[state].format(name), total=None)
+            progress.update(rows[name], description=labels[state].format(name))
+            if state in ("done", "failed", "error"):
+                progress.update(rows[name], total=1, completed=1)
+
+        runner = FleetRunner(transports, steps, args.concurrency, args.logs, args.restart_explorer, on_event)
+        results = asyncio.run(runner.run())
+
+    console.print(summary_table(results))
+    return 0 if all(result.status == "done" for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""Font fetching: concurrent resumable downloads into a SHA-256 addressed cache, installed through a thin OS backend."""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+
+from Cache import atomic_write_json, cache_dir, read_json
+from Registry import split_path
+
+FONT_SUFFIXES = (".ttf", ".otf")
+FONT_KEYS = (
+    r"HKLM:\SOFTWARE\Microsoft\Windows NT\CurrentVersion\Fonts",
+    r"HKCU:\Software\Microsoft\Windows NT\CurrentVersion\Fonts",
+)
+CHUNK = 1 << 16
+
+
+@dataclass(frozen=True)
+class FontSource:
+    name: str
+    url: str
+    sha256: str = ""  # pin; without one the first download is trusted, remembered and reported (see FontResult.unpinned)
+
+
+@dataclass
+class FontResult:
+    source: FontSource
+    installed: int = 0
+    present: int = 0
+    error: str = ""
+    unpinned: str = ""  # sha256 of an archive taken on trust this run, for pinning it
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _font_infos(zf):
+    for info in zf.infolist():
+        name = PurePosixPath(info.filename).name
+        if not info.is_dir() and name.lower().endswith(FONT_SUFFIXES) and not name.startswith("."):
+            yield name, info
+
+
+def font_members(archive):
+    """Yields (file name, bytes) for the .ttf/.otf members only; nothing else leaves the zip."""
+    with zipfile.ZipFile(archive) as zf:
+        for name, info in _font_infos(zf):
+            yield name, zf.read(info)
+
+
+def font_member_names(archive):
+    with zipfile.ZipFile(archive) as zf:
+        return [name for name, _ in _font_infos(zf)]
+
+
+class FontCache:
+    """Archives stored as <sha256>.zip, plus an index of url -> hash and the font files each holds."""
+
+    def __init__(self, root=None, opener=urllib.request.urlopen):
+        self.root = Path(root) if root else cache_dir() / "fonts"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.json"
+        self.opener = opener
+        self._lock = threading.Lock()
+        self._fetching = {}  # url -> lock, so one archive is never downloaded twice at once
+        self.trusted = {}  # url -> sha256 of archives downloaded with no pin to check them against
+
+    def _index(self):
+        return read_json(self.index_path, {})
+
+    def _remember(self, url, digest, members):
+        with self._lock:
+            index = self._index()
+            index[url] = {"sha256": digest, "members": members}
+            atomic_write_json(self.index_path, index)
+
+    def members(self, source):
+        """Font file names inside the source's archive, if it was ever fetched."""
+        entry = self._index().get(source.url)
+        return entry["members"] if entry else None
+
+    def cached(self, source):
+        entry = self._index().get(source.url)
+        if not entry or (source.sha256 and entry["sha256"] != source.sha256.lower()):
+            return None
+        path = self.root / f"{entry['sha256']}.zip"
+        # The name is the content hash, so integrity is checked by rehashing
+        if path.exists() and sha256_file(path) == entry["sha256"]:
+            return path
+        return None
+
+    def fetch(self, source):
+        """Returns the verified archive path, downloading (or resuming) only when needed."""
+        with self._lock:
+            url_lock = self._fetching.setdefault(source.url, threading.Lock())
+        with url_lock:
+            return self._fetch(source)
+
+    def _fetch(self, source):
+        path = self.cached(source)
+        if path:
+            return path
+
+        partial = self.root / f"{hashlib.sha256(source.url.encode()).hexdigest()[:16]}.part"
+        self._download(source.url, partial)
+        digest = sha256_file(partial)
+        if source.sha256 and digest != source.sha256.lower():
+            partial.unlink(missing_ok=True)
+            raise ValueError(f"{source.name}: checksum mismatch ({digest[:12]}...)")
+
+        try:
+            members = font_member_names(partial)
+        except zipfile.BadZipFile:
+            partial.unlink(missing_ok=True)
+            raise ValueError(f"{source.name}: the download is not a zip archive ({digest[:12]}...)")
+        if not source.sha256:
+            self.trusted[source.url] = digest
+
+        path = self.root / f"{digest}.zip"
+        os.replace(partial, path)
+        self._remember(source.url, digest, members)
+        return path
+
+    def _download(self, url, partial):
+        offset = partial.stat().st_size if partial.exists() else 0
+        request = urllib.request.Request(url, headers={"User-Agent": "Resonance"})
+        if offset:
+            request.add_header("Range", f"bytes={offset}-")
+        try:
+            response = self.opener(request, timeout=60)
+        except urllib.error.HTTPError as e:
+            if offset and e.code == 416:
+                return  # Nothing left to fetch: the partial file is already whole
+            raise
+        with response:
+            # 206 means the server honoured the range; anything else restarts from scratch
+            mode = "ab" if offset and getattr(response, "status", 200) == 206 else "wb"
+            with open(partial, mode) as f:
+                shutil.copyfileobj(response, f, CHUNK)
+                received = f.tell()
+            # A connection dropped mid-body just ends the read early, so count what arrived
+            length = getattr(response, "headers", {}).get("Content-Length")
+            expected = (offset if mode == "ab" else 0) + int(length) if length else None
+        if expected is not None and received < expected:
+            # Keep what came: the next fetch asks for the rest
+            raise ConnectionError(f"download cut off at {received:,} of {expected:,} bytes")
+
+
+class ShellFontBackend:
+    """Windows: asks the Shell Fonts folder to install, and reads what is already there."""
+
+    def __init__(self, registry, powershell):
+        self.registry = registry
+        self.powershell = powershell
+
+    def installed_files(self):
+        names = set()
+        for path in FONT_KEYS:
+            for value, _ in self.registry.values(*split_path(path)).values():
+                if isinstance(value, str):
+                    names.add(os.path.basename(value).lower())
+        for folder in (Path(os.environ.get("WINDIR", r"C:\Windows")) / "Fonts",
+                       Path(os.environ.get("LOCALAPPDATA", "")) / "Microsoft" / "Windows" / "Fonts"):
+            if folder.is_dir():
+                names.update(entry.name.lower() for entry in os.scandir(folder))
+        return names
+
+    def install(self, files):
+        staging = Path(tempfile.mkdtemp(prefix="CustomFonts"))
+        try:
+            for name, data in files:
+                (staging / name).write_bytes(data)
+            result = self.powershell.run(f"""
+            $FontsFolder = (New-Object -ComObject Shell.Application).Namespace(0x14)
+            foreach ($File in Get-ChildItem '{staging}') {{
+                $FontsFolder.CopyHere($File.FullName, 0x14)
+            }}
+            """)
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr.strip() or f"exit {result.returncode}")
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+
+class FontPipeline:
+    """Fetches every source at once, then installs only the font files the machine lacks."""
+
+    def __init__(self, backend, cache=None, max_workers=4):
+        self.backend = backend
+        self.cache = cache or FontCache()
+        self.max_workers = max_workers
+        self._installed = None
+
+    def installed_files(self, refresh=False):
+        if self._installed is None or refresh:
+            self._installed = self.backend.installed_files()
+        return self._installed
+
+    def missing(self, source):
+        """Font files of `source` not yet installed, or None when the archive was never fetched."""
+        members = self.cache.members(source)
+        if members is None:
+            return None
+        installed = self.installed_files()
+        return [name for name in members if name.lower() not in installed]
+
+    def _one(self, source):
+        result = FontResult(source)
+        try:
+            archive = self.cache.fetch(source)
+            result.unpinned = self.cache.trusted.get(source.url, "")
+            installed = self.installed_files()
+            wanted = []
+            for name, data in font_members(archive):
+                if name.lower() in installed:
+                    result.present += 1
+                else:
+                    wanted.append((name, data))
+            if wanted:
+                self.backend.install(wanted)
+                result.installed = len(wanted)
+        except Exception as e:
+            result.error = str(e) or type(e).__name__
+        return result
+
+    def run(self, sources):
+        sources = list(sources)
+        if not sources:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(sources))) as pool:
+            results = list(pool.map(self._one, sources))
+        self._installed = None
+        return results
@@ -1,16 +1,16 @@
 import os
 import sys
-import subprocess
 import time
-import winreg
-import shutil
 import ctypes
+import argparse
+import json
+from contextlib import contextmanager
 from pathlib import Path
 
 # We can safely import these because Summon.ps1 ensured they exist
 from rich.console import Console
 from rich.prompt import Confirm
-from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
 from rich.panel import Panel
 from rich.style import Style
 from rich.theme import Theme
@@ -18,6 +18,22 @@ from rich.traceback import install
 from rich.table import Table
 from rich.align import Align
 
+from Effects import EffectQueue, broadcast_environment, refresh_wallpaper, restart_explorer
+from Fonts import FontPipeline, FontSource, ShellFontBackend
+from Installer import Package
+from Inventory import InventoryCache
+from Journal import RunJournal
+from Output import BoardRows, StepConsole
+from Probes import ABSENT, ToolProbes
+from Registry import REG_DWORD, RegistryTransaction, read_value
+from Plan import survey, apply
+from Scheduler import StepScheduler, StepSpec
+from Transport import LocalTransport
+from Tracing import TracedPowerShell, TracedRegistry, TracedRunner, Tracer, traced
+from PathManager import PathManager, RegistryEnvStore
+from Resources import (DESKTOP_KEY, DriveMappingResource, FontResource, NpmGlobalResource, PackageResource, PathResource,
+                       RegistryValueResource, SmbShareResource, TaskbarResource, WallpaperResource)
+
 # --- THEME CONFIGURATION ---
 custom_theme = Theme({
     "info": "dim white",
@@ -27,424 +43,816 @@ custom_theme = Theme({
     "arcane": "magenta",
     "spell": "italic violet",
 })
-console = Console(theme=custom_theme)
+# Steps running side by side print through this proxy, which holds each step's output until it ends
+console = StepConsole(Console(theme=custom_theme), custom_theme)
 
 # Install rich traceback handler for prettier error debugging
 install(show_locals=True)
 
 class Incantator:
-    def __init__(self):
-        self.user = os.environ.get('USERNAME')
+    def __init__(self, runner=None, powershell=None, registry=None, install_workers=4, headless=False, answers=None, tracer=None,
+                 journal=None, transport=None, only=None, log=None):
+        # Every process, PowerShell script and registry value goes through the transport: this machine unless told otherwise
+        self.transport = transport or LocalTransport(runner, powershell, registry)
+        self.user = self.transport.user
+        # Where this ritual speaks; one log per machine when a fleet runs side by side
+        self.console = log or console
         self.script_root = Path(__file__).parent
         self.data_path = Path(r"C:\Data")
         self.share_name = "Data$"
         self.drive_letter = "R:"
         self.drive_label = "Codex"
 
+        # Headless runs never block on stdin: every question is answered from `answers` (step -> bool)
+        self.headless = headless
+        self.answers = answers or {}
+        # Steps to perform at all (None: every one); the rest are neither surveyed nor run
+        self.only = None if only is None else set(only) | {"finalize"}
+        self.outcomes = {}
+        # Answers gathered up front by gather_consent(), so steps never stop to ask once they are running
+        self.consent = {}
+        # The shared progress board while steps run concurrently (see perform())
+        self.board = None
+        # What this run (or the one it resumes) has already settled; rewritten after every step and item
+        self.journal = journal or RunJournal(self.transport.cache / "journal.json")
+
+        # Every external process (winget, npm...) goes through the runner so it can be faked
+        self.runner = self.transport.runner
+        # PowerShell commands share warm hosts instead of cold-starting powershell.exe each time
+        self.powershell = self.transport.powershell
+        self.registry = self.transport.registry
+
+        # Timing spans; the wrappers are only put in place when tracing is on, so it costs nothing otherwise
+        self.tracer = tracer or Tracer(enabled=False)
+        if self.tracer.enabled:
+            self.runner = TracedRunner(self.runner, self.tracer)
+            self.powershell = TracedPowerShell(self.powershell, self.tracer)
+            self.registry = TracedRegistry(self.registry, self.tracer)
+        self.install_workers = install_workers
+        # A winget install still running after this long is stuck (usually on a dialog nobody can see)
+        self.install_timeout = 30 * 60
+        # Explorer restarts, environment broadcasts and wallpaper refreshes: requested by steps, performed once at the end
+        self.effects = EffectQueue(on_request=self.journal.record_effect, on_done=self.journal.effect_done)
+        if self.transport.local:
+            # Window messages only reach this machine's desktop
+            self.effects.define("environment", "Broadcast the new environment", broadcast_environment, order=10)
+            self.effects.define("wallpaper", "Repaint the wallpaper",
+                                lambda: refresh_wallpaper(read_value(self.registry, DESKTOP_KEY, "WallPaper")), order=20)
+        self.effects.define("explorer", "Restart Explorer", lambda: restart_explorer(self.powershell), order=90, disruptive=True)
+        # Effects an interrupted run asked for but never performed are still owed
+        for name, reasons in self.journal.effects.items():
+            for reason in reasons or [""]:
+                self.effects.request(name, reason)
+        self.inventory = InventoryCache(self.runner, self.transport.cache / "winget-inventory.json")
+        # Presence and versions read off the disk, memoized for the run; other machines' disks are not ours to read
+        self.probes = ToolProbes() if self.transport.local else None
+        self.found = {}
+        self.fonts = FontPipeline(ShellFontBackend(self.registry, self.powershell))
+        # The user PATH: Spells woven in, duplicates and dead folders out, and a real Python ahead of the Store stubs
+        self.ley_lines = PathManager(RegistryEnvStore(self.registry),
+                                     ensure=[r"G:\My Drive\Data\Resonance\Spells"],
+                                     priorities=[r"%LOCALAPPDATA%\Programs\Python"])
+        # The paths are where each installer usually lands; a miss just falls back to the winget inventory
+        self.softwares = [
+            Package("AutoHotkey", "AutoHotkey.AutoHotkey", paths=(r"%ProgramFiles%\AutoHotkey\v2\AutoHotkey64.exe",)),
+            Package("FFmpeg", "Gyan.FFmpeg", paths=(r"%LOCALAPPDATA%\Microsoft\WinGet\Links\ffmpeg.exe",)),
+            Package("Mullvad VPN", "MullvadVPN.MullvadVPN", paths=(r"%ProgramFiles%\Mullvad VPN\Mullvad VPN.exe",)),
+            Package("Obsidian", "Obsidian.Obsidian", paths=(r"%LOCALAPPDATA%\Programs\Obsidian\Obsidian.exe",)),
+            Package("PowerToys", "Microsoft.PowerToys", exclusive=True,
+                    paths=(r"%ProgramFiles%\PowerToys\PowerToys.exe", r"%LOCALAPPDATA%\PowerToys\PowerToys.exe")),
+            Package("qBittorrent", "qBittorrent.qBittorrent", paths=(r"%ProgramFiles%\qBittorrent\qbittorrent.exe",)),
+            Package("VS Code", "Microsoft.VisualStudioCode",
+                    paths=(r"%LOCALAPPDATA%\Programs\Microsoft VS Code\Code.exe", r"%ProgramFiles%\Microsoft VS Code\Code.exe")),
+            Package("Git", "Git.Git", paths=(r"%ProgramFiles%\Git\cmd\git.exe",)),
+            Package("Python", "Python.Python.3.12", exclusive=True,
+                    paths=(r"%LOCALAPPDATA%\Programs\Python\Python312\python.exe", r"%ProgramFiles%\Python312\python.exe")),
+            Package("Node.js", "OpenJS.NodeJS", exclusive=True, paths=(r"%ProgramFiles%\nodejs\node.exe",)),
+            Package("Windows Terminal", "Microsoft.WindowsTerminal", paths=(r"%LOCALAPPDATA%\Microsoft\WindowsApps\wt.exe",)),
+            Package("Espanso", "Espanso.Espanso", paths=(r"%LOCALAPPDATA%\Programs\Espanso\espansod.exe",)),
+        ]
+        self.resources = self.build_resources()
+        self.drifts = {}
+
+    def build_resources(self):
+        """Everything the ritual wants to be true, as check()/apply() resources."""
+        explorer = r"HKCU:\Software\Microsoft\Windows\CurrentVersion\Explorer\Advanced"
+        personalize = r"HKCU:\Software\Microsoft\Windows\CurrentVersion\Themes\Personalize"
+        resources = [
+            FontResource(FontSource("Nunito", "https://www.1001fonts.com/download/nunito.zip"), self.fonts, self.registry),
+            FontResource(FontSource("Fira Code", "https://github.com/tonsky/FiraCode/releases/download/6.2/Fira_Code_v6.2.zip"), self.fonts, self.registry),
+            SmbShareResource(self.share_name, self.data_path, self.user, self.registry, self.powershell),
+            DriveMappingResource(self.drive_letter, self.share_name, self.drive_label, self.powershell),
+            *(PackageResource(pkg, self.inventory, self.runner, self.probes) for pkg in self.softwares),
+            # Explorer
+            RegistryValueResource("settings", explorer, "ShowTaskViewButton", 0, self.registry),
+            RegistryValueResource("settings", explorer, "Hidden", 1, self.registry), # Show Hidden
+            RegistryValueResource("settings", explorer, "HideFileExt", 0, self.registry), # Show Ext
+            # Dark Mode
+            RegistryValueResource("settings", personalize, "AppsUseLightTheme", 0, self.registry),
+            RegistryValueResource("settings", personalize, "SystemUsesLightTheme", 0, self.registry),
+            # Enable Mapped Drives for Elevated Token (Fixes R: drive visibility)
+            RegistryValueResource("settings", r"HKLM:\SOFTWARE\Microsoft\Windows\CurrentVersion\Policies\System", "EnableLinkedConnections", 1, self.registry),
+            NpmGlobalResource("@google/gemini-cli", self.runner, self.probes, self.transport.which),
+            PathResource(self.ley_lines, self.effects),
+            RegistryValueResource("desktop", explorer, "HideIcons", 1, self.registry),
+            TaskbarResource(self.powershell, self.effects),
+        ]
+        bg_path = self.script_root / "Assets" / "background.png"
+        if bg_path.exists() and self.transport.local:
+            resources.append(WallpaperResource(bg_path, Path(os.environ.get("USERPROFILE", "")) / "Pictures" / "background.png", self.registry, self.effects))
+
+        by_step = {}
+        for resource in resources:
+            if self.only is None or resource.step in self.only:
+                by_step.setdefault(resource.step, []).append(resource)
+        return by_step
+
+    def unsettled(self, step):
+        """The step's resources the journal does not already count as done."""
+        if self.journal.settled(step):
+            return []
+        return [resource for resource in self.resources.get(step, [])
+                if self.journal.item_status(step, resource.name) != "done"]
+
+    @traced("step")
+    def survey(self):
+        """Probes every resource at once so each step already knows what drifted."""
+        # File probes first (they are cheap, and the resource checks below then hit the memo)
+        if self.probes:
+            npm = [resource.name for resource in self.resources.get("gemini", []) if isinstance(resource, NpmGlobalResource)]
+            self.found = self.probes.probe_all(self.softwares if "software" in self.resources else [], npm)
+        everything = [resource for step in self.resources for resource in self.unsettled(step)]
+        drifts = survey(everything)
+        self.drifts = {step: [] for step in self.resources}
+        for drift in drifts:
+            self.drifts[drift.resource.step].append(drift)
+        return drifts
+
+    def drifted(self, step):
+        """The drifted resources of one step, probing them now if no survey ran."""
+        if step not in self.drifts:
+            self.drifts[step] = survey(self.unsettled(step))
+        return self.drifts[step]
+
+    def record(self, step, name, error=None):
+        """Notes one item's outcome in the journal, so a rerun only retries what failed."""
+        self.journal.record_item(step, name, "failed" if error else "done", error or "")
+
+    def apply(self, drifts):
+        """Plan.apply, journaling each resource as it lands."""
+        results = []
+        for drift in drifts:
+            result, = apply([drift])
+            self.record(drift.resource.step, drift.resource.name, result[1])
+            results.append(result)
+        return results
+
+    def ask(self, step, question):
+        """Asks the apprentice, or takes the answer file's word when running headless."""
+        if self.headless:
+            answer = bool(self.answers.get(step, False))
+            self.console.print(f"{question} [dim]({'yes' if answer else 'no'}, headless)[/dim]")
+            return answer
+        return Confirm.ask(question, console=self.console.console)
+
+    def confirm(self, step, question):
+        """The step's go-ahead: the answer given up front, or asked now if there was no council."""
+        if step in self.consent:
+            answer = self.consent[step]
+            self.console.print(f"{question} [dim]({'yes' if answer else 'no'}, agreed up front)[/dim]")
+        else:
+            answer = self.ask(step, question)
+            self.journal.record_consent({step: answer})
+        self.outcomes.setdefault(step, "done" if answer else "declined")
+        return answer
+
+    def question(self, step):
+        return RITES[step][1].format(data_path=self.data_path, drive_letter=self.drive_letter)
+
+    def pause(self, seconds):
+        """Dramatic pacing, skipped when headless or while steps run side by side (their output is held anyway)."""
+        if not self.headless and self.board is None:
+            time.sleep(seconds)
+
+    @contextmanager
+    def activity(self, description):
+        """A spinner for slow work: a row on the board when steps run side by side, else a console status.
+
+        Yields a function that rewrites the spinner's text, for work that can say how far along it is.
+        """
+        if self.board is None:
+            with self.console.status(description) as status:
+                yield status.update
+            return
+        rows = BoardRows(self.board)
+        task = rows.add_task(description, total=None)
+        try:
+            yield lambda text: rows.update(task, description=text)
+        finally:
+            rows.close()
+
+    @contextmanager
+    def progress_rows(self):
+        """Rows for per-item progress: on the shared board when there is one, else a transient Progress."""
+        if self.board is None:
+            with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), TimeElapsedColumn(),
+                          console=self.console.console, transient=True) as progress:
+                yield progress
+            return
+        rows = BoardRows(self.board)
+        try:
+            yield rows
+        finally:
+            rows.close()
+
+    def gather_consent(self):
+        """Asks every question before anything runs, so the ritual can then proceed unattended."""
+        self.console.rule("[arcane]The Council[/arcane]")
+        given = self.journal.consent
+        if self.journal.interrupted:
+            # Only a relaunch of this same run keeps its "no"s; a rerun asks again about what was declined
+            given = {step: answer for step, answer in given.items() if answer}
+        for step, (title, *_) in RITES.items():
+            if step == "finalize":
+                # Only worth asking when some step may leave Explorer needing a restart
+                owed = any(effect.disruptive for effect, _ in self.effects.pending())
+                if not owed and not any(self.drifted(other) for other in RESTARTS_EXPLORER):
+                    continue
+                drifts = []
+            else:
+                drifts = self.drifted(step)
+                if not drifts:
+                    continue
+            self.console.print(f"[info]{title}[/info]")
+            for drift in drifts:
+                self.console.print(f"[dim]  . {drift.resource.name}: {drift.detail}[/dim]")
+            if step in given:
+                # Answered before the interruption (or before the UAC relaunch): never ask twice
+                self.consent[step] = given[step]
+                self.console.print(f"[spell]{self.question(step)}[/spell] [dim]({'yes' if given[step] else 'no'}, answered before)[/dim]")
+                continue
+            self.consent[step] = self.ask(step, f"[spell]{self.question(step)}[/spell]")
+            # Written per answer, so a crash halfway through the council keeps what was said
+            self.journal.record_consent({step: self.consent[step]})
+        return self.consent
+
+    def perform(self):
+        """Runs every step as a graph: network work side by side, registry and Explorer work one at a time."""
+        def held(step, method):
+            def run():
+                with self.console.held():
+                    if self.only is not None and step not in self.only:
+                        self.outcomes[step] = "skipped"
+                        return
+                    if self.journal.settled(step):
+                        self.outcomes[step] = self.journal.step_status(step)
+                        self.console.print(f"[dim]  . {RITES[step][0]}: settled before the interruption.[/dim]")
+                        return
+                    self.journal.record_step(step, "running")
+                    try:
+                        method()
+                    except Exception:
+                        self.journal.record_step(step, "failed")
+                        raise
+                    self.journal.record_step(step, self.outcomes.get(step, "done"))
+            return run
+
+        specs = [StepSpec(step, held(step, getattr(self, method)), needs, lanes)
+                 for step, (_, _, needs, lanes, method) in RITES.items()]
+        labels = {
+            "waiting": "[dim]{} waits...[/dim]",
+            "running": "[yellow]{}...[/yellow]",
+            "done": "[green]{}[/green]",
+            "failed": "[red]{} faltered[/red]",
+            "blocked": "[red]{} could not begin[/red]",
+        }
+        with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), TimeElapsedColumn(),
+                      console=self.console.console, transient=True) as board:
+            self.board = board
+            rows = {step: board.add_task(labels["waiting"].format(title), total=None) for step, (title, *_) in RITES.items()}
+
+            def on_event(step, state):
+                board.update(rows[step], description=labels[state].format(RITES[step][0]))
+                if state in ("done", "failed", "blocked"):
+                    board.remove_task(rows[step])
+
+            try:
+                # Ctrl+C kills the installs still running instead of waiting them out
+                results = StepScheduler(specs, on_event=on_event, on_abort=self.transport.cancel).run()
+            finally:
+                self.board = None
+
+        for result in results:
+            if result.status == "failed":
+                self.fail(result.name)
+                self.console.print(f"[error]  ! {RITES[result.name][0]} faltered: {result.error}[/error]")
+            elif result.status == "blocked":
+                self.outcomes[result.name] = "blocked"
+                self.journal.record_step(result.name, "blocked")
+                self.console.print(f"[warning]  ! {RITES[result.name][0]} could not begin: {result.error}.[/warning]")
+        if {r.name: r.status for r in results}["finalize"] != "done" and self.effects.pending():
+            # The finale never ran: the quiet effects still happen, Explorer is left alone
+            self.release_effects(allow_disruptive=False)
+        return results
+
+    def release_effects(self, allow_disruptive):
+        """Runs the queued effects once each, reporting every outcome."""
+        for outcome in self.effects.run(allow_disruptive):
+            reasons = f" [dim]({', '.join(outcome.reasons)})[/dim]" if outcome.reasons else ""
+            if outcome.status == "done":
+                self.console.print(f"[success]  + {outcome.effect.title}.[/success]{reasons}")
+            elif outcome.status == "held":
+                self.console.print(f"[warning]  ! {outcome.effect.title} was withheld; it happens at your next sign-in.[/warning]{reasons}")
+            else:
+                self.fail("finalize")
+                self.console.print(f"[error]  ! {outcome.effect.title} resisted: {outcome.error}[/error]")
+
+    def fail(self, step):
+        self.outcomes[step] = "failed"
+
+    @property
+    def exit_code(self):
+        return 1 if "failed" in self.outcomes.values() else 0
+
+    def in_harmony(self, step, title):
+        self.outcomes[step] = "harmony"
+        self.console.print(f"[dim]  . {title}: already in harmony.[/dim]")
+
+    def report_failures(self, results, what):
+        for drift, error in results:
+            if error:
+                self.fail(drift.resource.step)
+                self.console.print(f"[error]  ! Failed to {what} {drift.resource.name}: {error}[/error]")
+        return all(error is None for _, error in results)
+
+    def print_plan(self):
+        """Prints what a run would change, without changing anything."""
+        with self.console.status("[arcane]Scrying the realm...[/arcane]"):
+            drifts = self.survey()
+
+        if not drifts:
+            self.console.print("[success]The realm is in harmony. Nothing to conjure.[/success]")
+            return drifts
+
+        table = Table(show_header=True, header_style="bold magenta", box=None)
+        table.add_column("Step")
+        table.add_column("Resource")
+        table.add_column("Drift")
+        for drift in drifts:
+            table.add_row(drift.resource.step, drift.resource.name, f"[warning]{drift.detail}[/warning]")
+        self.console.print(table)
+        self.console.print(f"[info]{len(drifts)} resource(s) would be conjured.[/info]")
+        return drifts
+
     def banner(self):
-        console.clear()
+        if not self.headless:
+            self.console.clear()
         title = Panel(f"[arcane]~~~ THE GRAND CONJURATION (PYTHON EDITION) ~~~[/arcane]\n[dim]Apprentice: {self.user}[/dim]", border_style="magenta", padding=(1, 2))
-        console.print(Align.center(title))
-        time.sleep(1.5)
+        self.console.print(Align.center(title))
+        if self.journal.interrupted:
+            settled, pending = self.journal.summary()
+            self.console.print(f"[info]Resuming an interrupted ritual: {len(settled)} step(s) settled, {len(pending)} to take up again.[/info]")
+        self.pause(1.5)
 
-    def run_ps(self, cmd, description=None):
-        """Executes a raw PowerShell command."""
+    def run_ps(self, cmd, description=None, timeout=None):
+        """Executes a raw PowerShell command on a persistent host."""
         if description:
-            console.print(f"[info]  > {description}...[/info]")
+            self.console.print(f"[info]  > {description}...[/info]")
         
-        full_cmd = ["powershell", "-NoProfile", "-Command", cmd]
-        result = subprocess.run(full_cmd, capture_output=True, text=True)
+        result = self.powershell.run(cmd, timeout=timeout)
         
         if result.returncode != 0:
-            console.print(f"[error]  ! Spell failed: {result.stderr.strip()}[/error]")
+            self.console.print(f"[error]  ! Spell failed: {result.stderr.strip()}[/error]")
             return False
         return True
 
-    def set_reg_key(self, path, name, value, reg_type=winreg.REG_DWORD):
-        """Sets a registry key value safely."""
-        try:
-            # Handle shorthand
-            root_map = {"HKCU": winreg.HKEY_CURRENT_USER, "HKLM": winreg.HKEY_LOCAL_MACHINE}
-            root_str, subkey = path.split(":\\", 1)
-            root = root_map.get(root_str, winreg.HKEY_CURRENT_USER)
+    def set_reg_key(self, path, name, value, reg_type=REG_DWORD):
+        """Sets a registry key value safely (left alone when it already holds that value)."""
+        change, = self.apply_reg([(path, name, value, reg_type)])
+        return change.status != "failed"
 
-            # Attempt to open/create with specific write permission (KEY_SET_VALUE)
-            # This avoids Access Denied on HKLM where full control is restricted
-            try:
-                key = winreg.OpenKey(root, subkey, 0, winreg.KEY_SET_VALUE)
-            except FileNotFoundError:
-                key = winreg.CreateKeyEx(root, subkey, 0, winreg.KEY_SET_VALUE)
-
-            with key:
-                winreg.SetValueEx(key, name, 0, reg_type, value)
-            return True
-        except PermissionError:
-            console.print(f"[error]  ! Access Denied: {path} (Run as Admin)[/error]")
-            return False
-        except Exception as e:
-            console.print(f"[error]Registry Error: {e}[/error]")
-            return False
+    def apply_reg(self, settings):
+        """Writes (path, name, value[, type]) settings in one transaction; each key is opened once."""
+        txn = RegistryTransaction(self.registry)
+        for setting in settings:
+            txn.set(*setting)
+        changes = txn.commit()
+
+        for change in changes:
+            if change.status == "failed":
+                if change.detail.startswith("Access Denied"):
+                    self.console.print(f"[error]  ! Access Denied: {change.path} (Run as Admin)[/error]")
+                else:
+                    self.console.print(f"[error]Registry Error: {change.detail}[/error]")
+        return changes
 
+    @traced("step")
     def step_fonts(self):
         """Installs fonts by leveraging the Shell.Application COM object via PS wrapper."""
-        console.rule("[arcane]Step 1: Inscribing Glyphs[/arcane]")
-        time.sleep(1)
-        console.print("[info]This step will download and install 'Nunito' and 'Fira Code' fonts to your system.[/info]")
-        if Confirm.ask("[spell]Ancient Glyphs (Fonts) seem vital. Inscribe them?[/spell]"):
-            font_urls = {
-                "Nunito": "https://www.1001fonts.com/download/nunito.zip",
-                "FiraCode": "https://github.com/tonsky/FiraCode/releases/download/6.2/Fira_Code_v6.2.zip"
-            }
-            
-            # Using a simplified PS script inside Python to handle the heavy lifting of downloading/zipping/shell-copying
-            # This is often cleaner than re-implementing zip extraction and COM objects in ctypes
-            ps_block = """
-            $Fonts = @{
-                'Nunito'    = 'https://www.1001fonts.com/download/nunito.zip'
-                'Fira Code' = 'https://github.com/tonsky/FiraCode/releases/download/6.2/Fira_Code_v6.2.zip'
-            }
-            $FontTemp = "$env:TEMP\\CustomFonts"
-            New-Item $FontTemp -ItemType Directory -Force | Out-Null
-            $Shell = New-Object -ComObject Shell.Application
-            $FontsFolder = $Shell.Namespace(0x14)
-            
-            $RegLM = Get-ItemProperty "HKLM:\\SOFTWARE\\Microsoft\\Windows NT\\CurrentVersion\\Fonts" -ErrorAction SilentlyContinue
-            $RegCU = Get-ItemProperty "HKCU:\\Software\\Microsoft\\Windows NT\\CurrentVersion\\Fonts" -ErrorAction SilentlyContinue
-            $Installed = @()
-            if ($RegLM) { $Installed += $RegLM.PSObject.Properties.Name }
-            if ($RegCU) { $Installed += $RegCU.PSObject.Properties.Name }
-
-            foreach ($Key in $Fonts.Keys) {
-                # Simple heuristic check to see if font is already registered
-                if ($Installed -match $Key) {
-                    Write-Host "Glyph $Key is already inscribed." -ForegroundColor DarkGray
-                } else {
-                    Write-Host "Downloading $Key..."
-                    $Zip = "$FontTemp\\$Key.zip"
-                    Invoke-WebRequest $Fonts[$Key] -OutFile $Zip
-                    Expand-Archive $Zip -Dest "$FontTemp\\$Key" -Force
-                    $FontFiles = Get-ChildItem "$FontTemp\\$Key" -Include *.ttf,*.otf -Recurse
-                    foreach ($File in $FontFiles) {
-                        $FontsFolder.CopyHere($File.FullName, 0x14)
-                    }
-                }
-            }
-            """
-            
-            with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), transient=True) as progress:
-                progress.add_task("[cyan]Scribing Glyphs...", total=None)
-                self.run_ps(ps_block)
-            console.print("[success]  + Glyphs inscribed.[/success]")
-            time.sleep(1)
-
-    def step_share_and_drive(self):
-        """Sets up the Data folder and Maps R:"""
-        console.rule("[arcane]Step 2: Setting up the Codex[/arcane]")
-        time.sleep(1)
-
-        # Part A: The Codex (Data Folder)
-        console.print(f"[info]This step will create the directory '{self.data_path}' and share it as '{self.share_name}' with full access for user '{self.user}'.[/info]")
-        if Confirm.ask(f"[spell]The Codex ({self.data_path}). Manage it?[/spell]"):
-            if not self.data_path.exists():
-                console.print(f"[info]The Codex ({self.data_path}) is hidden. Revealing...[/info]")
-                self.data_path.mkdir(exist_ok=True)
-                # Share it
-                self.run_ps(f"New-SmbShare -Name '{self.share_name}' -Path '{self.data_path}' -FullAccess '{self.user}' -Description 'Data Repository' -ErrorAction SilentlyContinue", "Creating SMB Share")
-            else:
-                console.print(f"[dim]The Codex ({self.data_path}) stands ready.[/dim]")
-
-        # Part B: The Astral Gateway (Drive Mapping)
-        console.print(f"[info]This step will map the drive letter '{self.drive_letter}' to the local share '\\\\localhost\\{self.share_name}' and label it '{self.drive_label}'.[/info]")
-        if Confirm.ask(f"[spell]The Astral Gateway ({self.drive_letter}). Bind it?[/spell]"):
-            if not Path(self.drive_letter).exists():
-                console.print(f"[info]The Astral Gateway ({self.drive_letter}) is closed. Binding...[/info]")
-                cmd = f"""
-                New-SmbMapping -LocalPath {self.drive_letter} -RemotePath "\\\\localhost\\{self.share_name}" -Persistent $true
-                $RegPath = "HKCU:\\Software\\Microsoft\\Windows\\CurrentVersion\\Explorer\\MountPoints2\\##localhost#{self.share_name}"
-                if (-not (Test-Path $RegPath)) {{ New-Item -Path $RegPath -Force | Out-Null }}
-                Set-ItemProperty -Path $RegPath -Name "_LabelFromReg" -Value "{self.drive_label}"
-                """
-                if self.run_ps(cmd, "Binding Drive"):
-                    console.print(f"[success]  + Gateway bound as {self.drive_label}.[/success]")
-            else:
-                console.print(f"[dim]The Astral Gateway ({self.drive_letter}) is already open.[/dim]")
-        time.sleep(1)
+        drifts = self.drifted("fonts")
+        if not drifts:
+            return self.in_harmony("fonts", "Step 1: Inscribing Glyphs")
+
+        self.console.rule("[arcane]Step 1: Inscribing Glyphs[/arcane]")
+        self.pause(1)
+        glyphs = " and ".join(f"'{drift.resource.name}'" for drift in drifts)
+        self.console.print(f"[info]This step will download and install {glyphs} fonts to your system.[/info]")
+        if self.confirm("fonts", f"[spell]{self.question('fonts')}[/spell]"):
+            # Archives download side by side into a checksum-addressed cache; only missing .ttf/.otf files get installed
+            with self.activity("[cyan]Scribing Glyphs..."):
+                results = self.fonts.run([drift.resource.source for drift in drifts])
+            for result in results:
+                self.record("fonts", result.source.name, result.error)
+                if result.unpinned:
+                    self.console.print(f"[warning]  ! {result.source.name} has no pinned checksum; its archive was taken on trust "
+                                       f"(sha256 {result.unpinned}). Pin it in its FontSource.[/warning]")
+                if result.error:
+                    self.fail("fonts")
+                    self.console.print(f"[error]  ! Failed to inscribe {result.source.name}: {result.error}[/error]")
+                elif result.installed:
+                    self.console.print(f"[success]  + {result.source.name}: {result.installed} glyph(s) inscribed.[/success]")
+                else:
+                    self.console.print(f"[dim]  . Glyph {result.source.name} is already inscribed.[/dim]")
+            self.pause(1)
+
+    @traced("step")
+    def step_share(self):
+        """Sets up the Data folder and its share."""
+        drifts = self.drifted("share")
+        if not drifts:
+            return self.in_harmony("share", "Step 2: Setting up the Codex")
+
+        self.console.rule("[arcane]Step 2: Setting up the Codex[/arcane]")
+        self.pause(1)
+        self.console.print(f"[info]This step will create the directory '{self.data_path}' and share it as '{self.share_name}' with full access for user '{self.user}'.[/info]")
+        if self.confirm("share", f"[spell]{self.question('share')}[/spell]"):
+            self.console.print(f"[info]The Codex ({self.data_path}) is hidden. Revealing...[/info]")
+            self.console.print("[info]  > Creating SMB Share...[/info]")
+            self.report_failures(self.apply(drifts), "reveal")
+        self.pause(1)
+
+    @traced("step")
+    def step_drive(self):
+        """Maps R: to the Data share."""
+        drifts = self.drifted("drive")
+        if not drifts:
+            return self.in_harmony("drive", "Step 2: Opening the Astral Gateway")
+
+        self.console.rule("[arcane]Step 2: Opening the Astral Gateway[/arcane]")
+        self.pause(1)
+        self.console.print(f"[info]This step will map the drive letter '{self.drive_letter}' to the local share '\\\\localhost\\{self.share_name}' and label it '{self.drive_label}'.[/info]")
+        if self.confirm("drive", f"[spell]{self.question('drive')}[/spell]"):
+            self.console.print(f"[info]The Astral Gateway ({self.drive_letter}) is closed. Binding...[/info]")
+            self.console.print("[info]  > Binding Drive...[/info]")
+            if self.report_failures(self.apply(drifts), "bind"):
+                self.console.print(f"[success]  + Gateway bound as {self.drive_label}.[/success]")
+        self.pause(1)
 
+    @traced("step")
     def step_software(self):
         """Installs software via Winget."""
-        softwares = {
-            "AutoHotkey": "AutoHotkey.AutoHotkey",
-            "FFmpeg": "Gyan.FFmpeg",
-            "Mullvad VPN": "MullvadVPN.MullvadVPN",
-            "Obsidian": "Obsidian.Obsidian",
-            "PowerToys": "Microsoft.PowerToys",
-            "qBittorrent": "qBittorrent.qBittorrent",
-            "VS Code": "Microsoft.VisualStudioCode",
-            "Git": "Git.Git",
-            "Python": "Python.Python.3.12",
-            "Node.js": "OpenJS.NodeJS",
-            "Windows Terminal": "Microsoft.WindowsTerminal",
-            "Espanso": "Espanso.Espanso"
-        }
+        drifts = self.drifted("software")
+        if not drifts:
+            return self.in_harmony("software", "Step 3: Summoning Instruments (Winget)")
+        resources = [drift.resource for drift in drifts]
+        missing = [resource.package for resource in resources]
+
+        self.console.rule("[arcane]Step 3: Summoning Instruments (Winget)[/arcane]")
+        self.pause(1)
+
+        present = len(self.softwares) - len(missing)
+        if present:
+            self.console.print(f"[dim]  . {present} instruments already present.[/dim]")
+            on_disk = [pkg.name for pkg in self.softwares if pkg not in missing and self.found.get(pkg.name, ABSENT).found]
+            if on_disk:
+                self.console.print(f"[dim]  . Found on disk: {', '.join(on_disk)}.[/dim]")
 
-        console.rule("[arcane]Step 3: Summoning Instruments (Winget)[/arcane]")
-        time.sleep(1)
-        
         # Dynamic description
-        software_list = ", ".join(softwares.keys())
-        console.print(f"[info]This step will check for and install the following software using Winget: {software_list}.[/info]")
+        software_list = ", ".join(pkg.name for pkg in missing)
+        self.console.print(f"[info]This step will install the following software using Winget: {software_list}.[/info]")
         
-        if Confirm.ask("[spell]Shall we summon these instruments?[/spell]"):
-            console.print("[info]Aligning planetary bodies for software download...[/info]")
-            time.sleep(2)
+        if self.confirm("software", f"[spell]{self.question('software')}[/spell]"):
+            self.console.print("[info]Aligning planetary bodies for software download...[/info]")
+            self.pause(2)
             
             # Check if Winget exists
-            if shutil.which("winget") is None:
-                console.print("[error]Winget is missing from the realm.[/error]")
+            if self.transport.which("winget") is None:
+                self.fail("software")
+                self.console.print("[error]Winget is missing from the realm.[/error]")
                 return
 
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                transient=True
-            ) as progress:
-                # Optimization: Fetch installed list once to avoid calling winget 10+ times
-                progress.add_task("Consulting the Archives (Reading installed packages)...", total=None)
-                installed_blob = ""
-                try:
-                    # We fetch the raw list. It's faster to check string presence than to query individually.
-                    # Using utf-8 and ignoring errors to handle potential character encoding issues in app names.
-                    proc = subprocess.run(["winget", "list"], capture_output=True, text=True, encoding="utf-8", errors="ignore")
-                    if proc.returncode == 0:
-                        installed_blob = proc.stdout
-                except Exception:
-                    pass # Fallback to individual checks if this fails
-
-                task_id = progress.add_task("Summoning...", total=len(softwares))
-                
-                for name, pkg_id in softwares.items():
-                    progress.update(task_id, description=f"Seeking presence of {name}...")
-                    
-                    # Check if the ID is in the bulk list, or fallback to individual check if list failed
-                    if pkg_id not in installed_blob:
-                        progress.update(task_id, description=f"[yellow]Summoning {name}...[/yellow]")
-                        install = subprocess.run(
-                            ["winget", "install", "-e", "--id", pkg_id, "--silent", "--accept-source-agreements", "--accept-package-agreements"],
-                            capture_output=True
-                        )
-                        if install.returncode == 0:
-                            console.print(f"[success]  + {name} summoned.[/success]")
-                        else:
-                            console.print(f"[error]  ! Failed to summon {name}.[/error]")
-                    else:
-                        console.print(f"[dim]  . {name} already present.[/dim]")
+            with self.progress_rows() as progress:
+                # One row per instrument, updated from the scheduler's worker threads
+                rows = {pkg: progress.add_task(f"[dim]{pkg.name} awaits its turn...[/dim]", total=None) for pkg in missing}
+                labels = {
+                    "queued": "[dim]{} awaits its turn...[/dim]",
+                    "summoning": "[yellow]Summoning {}...[/yellow]",
+                    "summoned": "[green]{} summoned[/green]",
+                    "failed": "[red]{} resisted[/red]",
+                }
+
+                def on_event(pkg, state, outcome=None):
+                    if state == "progress":
+                        # Live from winget's own bar: the phase it is in and, while downloading, how far along
+                        progress.update(rows[pkg], description=f"[yellow]Summoning {pkg.name}... [dim]{outcome.label}[/dim][/yellow]")
+                        return
+                    progress.update(rows[pkg], description=labels[state].format(pkg.name))
+                    if state in ("summoned", "failed"):
+                        progress.update(rows[pkg], total=1, completed=1)
+                        # Journaled as each one lands, so a crash mid-step only loses the installs still running
+                        self.record("software", pkg.name, None if outcome.ok else (outcome.detail or f"winget exit {outcome.returncode}"))
 
+                outcomes = PackageResource.install_all(resources, max_workers=self.install_workers,
+                                                       timeout=self.install_timeout, on_event=on_event)
+
+            if any(outcome.ok for outcome in outcomes):
+                # The installers put their folders on PATH (npm comes with Node.js), but only for processes started after
+                self.transport.refresh_path()
+                if self.probes:
+                    self.probes.forget_npm_root()
+
+            for outcome in outcomes:
+                if outcome.ok:
+                    self.console.print(f"[success]  + {outcome.package.name} summoned.[/success] [dim]({outcome.duration:.0f}s)[/dim]")
+                else:
+                    self.fail("software")
+                    self.console.print(f"[error]  ! Failed to summon {outcome.package.name} (exit {outcome.returncode}).[/error]")
+
+    @traced("step")
     def step_windows_settings(self):
         """Configures Windows UI settings via Registry."""
-        console.rule("[arcane]Step 4: Shaping the Apparatus (Settings)[/arcane]")
-        time.sleep(1)
-        console.print("[info]This step will configure Windows Explorer (hidden files, file extensions), set Dark Mode, and enable mapped drives for elevated processes.[/info]")
+        drifts = self.drifted("settings")
+        if not drifts:
+            return self.in_harmony("settings", "Step 4: Shaping the Apparatus (Settings)")
+
+        self.console.rule("[arcane]Step 4: Shaping the Apparatus (Settings)[/arcane]")
+        self.pause(1)
+        self.console.print("[info]This step will configure Windows Explorer (hidden files, file extensions), set Dark Mode, and enable mapped drives for elevated processes.[/info]")
         
-        if Confirm.ask("[spell]Shall we shape the apparatus?[/spell]"):
-            settings = [
-                # Explorer
-                ("HKCU:\\Software\\Microsoft\\Windows\\CurrentVersion\\Explorer\\Advanced", "ShowTaskViewButton", 0),
-                ("HKCU:\\Software\\Microsoft\\Windows\\CurrentVersion\\Explorer\\Advanced", "Hidden", 1), # Show Hidden
-                ("HKCU:\\Software\\Microsoft\\Windows\\CurrentVersion\\Explorer\\Advanced", "HideFileExt", 0), # Show Ext
-                # Dark Mode
-                ("HKCU:\\Software\\Microsoft\\Windows\\CurrentVersion\\Themes\\Personalize", "AppsUseLightTheme", 0),
-                ("HKCU:\\Software\\Microsoft\\Windows\\CurrentVersion\\Themes\\Personalize", "SystemUsesLightTheme", 0),
-                # Enable Mapped Drives for Elevated Token (Fixes R: drive visibility)
-                ("HKLM:\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Policies\\System", "EnableLinkedConnections", 1),
-            ]
+        if self.confirm("settings", f"[spell]{self.question('settings')}[/spell]"):
+            # Only drifted values are written, all in one transaction so each key opens once
+            registry_drifts = [drift.resource for drift in drifts if isinstance(drift.resource, RegistryValueResource)]
+            changes = {change.name: change for change in self.apply_reg([resource.setting for resource in registry_drifts])}
+            for change in changes.values():
+                self.record("settings", change.name, change.detail if change.status == "failed" else None)
+            if any(change.status == "failed" for change in changes.values()):
+                self.fail("settings")
+            if any(change.status == "changed" for change in changes.values()):
+                self.effects.request("explorer", "apparatus settings")
 
             table = Table(show_header=True, header_style="bold magenta", box=None)
             table.add_column("Configuration Key")
             table.add_column("Value")
+            table.add_column("State")
 
-            for path, key, val in settings:
-                self.set_reg_key(path, key, val)
-                table.add_row(key, str(val))
+            states = {"changed": "[success]shaped[/success]", "unchanged": "[dim]already so[/dim]", "failed": "[error]resisted[/error]"}
+            for resource in self.resources["settings"]:
+                if isinstance(resource, RegistryValueResource):
+                    change = changes.get(resource.name)
+                    table.add_row(resource.name, str(resource.value), states[change.status if change else "unchanged"])
             
-            console.print(table)
-            console.print("[success]  + Visuals aligned to darkness.[/success]")
-            time.sleep(0.5)
+            self.console.print(table)
+            self.console.print("[success]  + Visuals aligned to darkness.[/success]")
+            self.pause(0.5)
 
             # Wallpaper
-            bg_path = self.script_root / "Assets" / "background.png"
-            if bg_path.exists():
-                console.print(f"[info]Found background artifact at {bg_path}.[/info]")
-                dest = Path(os.environ["USERPROFILE"]) / "Pictures" / "background.png"
-                shutil.copy(bg_path, dest)
-                # Python equivalent of SystemParametersInfo for wallpaper
-                SPI_SETDESKWALLPAPER = 20
-                ctypes.windll.user32.SystemParametersInfoW(SPI_SETDESKWALLPAPER, 0, str(dest), 3)
-                console.print("[success]  + Reality (Wallpaper) rewritten.[/success]")
-                time.sleep(1)
+            wallpaper_drifts = [drift for drift in drifts if isinstance(drift.resource, WallpaperResource)]
+            if wallpaper_drifts:
+                self.console.print(f"[info]Found background artifact at {wallpaper_drifts[0].resource.source}.[/info]")
+                if self.report_failures(self.apply(wallpaper_drifts), "rewrite"):
+                    self.console.print("[success]  + Reality (Wallpaper) rewritten.[/success]")
+                self.pause(1)
 
+    @traced("step")
     def step_gemini(self):
         """Installs Gemini CLI via NPM."""
-        console.rule("[arcane]Step 5: Summoning the Oracle (Gemini CLI)[/arcane]")
-        time.sleep(1)
-        console.print("[info]This step will install the '@google/gemini-cli' package globally using npm.[/info]")
+        drifts = self.drifted("gemini")
+        if not drifts:
+            oracle = self.found.get("@google/gemini-cli", ABSENT)
+            title = "Step 5: Summoning the Oracle (Gemini CLI)"
+            return self.in_harmony("gemini", f"{title}, v{oracle.version}" if oracle.version else title)
+
+        self.console.rule("[arcane]Step 5: Summoning the Oracle (Gemini CLI)[/arcane]")
+        self.pause(1)
+        self.console.print("[info]This step will install the '@google/gemini-cli' package globally using npm.[/info]")
         
-        if Confirm.ask("[spell]Shall we summon the Oracle?[/spell]"):
-            if shutil.which("npm"):
-                # Simple check if package is installed
-                check = subprocess.run("npm list -g @google/gemini-cli", shell=True, capture_output=True, text=True)
-                if "@google/gemini-cli" not in check.stdout:
-                    with console.status("[bold yellow]Npm is chanting..."):
-                        subprocess.run("npm install -g @google/gemini-cli", shell=True)
-                    console.print("[success]  + The Oracle is ready.[/success]")
-                else:
-                    console.print("[dim]  . The Oracle waits.[/dim]")
+        if self.confirm("gemini", f"[spell]{self.question('gemini')}[/spell]"):
+            if self.transport.which("npm"):
+                with self.activity("[bold yellow]Npm is chanting...") as say:
+                    for drift in drifts:
+                        drift.resource.on_progress = lambda update: say(f"[bold yellow]Npm is chanting... [dim]{update.label}[/dim]")
+                    results = self.apply(drifts)
+                if self.report_failures(results, "summon"):
+                    self.console.print("[success]  + The Oracle is ready.[/success]")
             else:
-                console.print("[warning]  ! npm not found. The Oracle cannot be summoned.[/warning]")
+                self.fail("gemini")
+                self.console.print("[warning]  ! npm not found. The Oracle cannot be summoned.[/warning]")
 
+    @traced("step")
     def step_path(self):
-        """Adds paths to PATH."""
-        console.rule("[arcane]Step 6: Extending the Ley Lines (PATH)[/arcane]")
-        time.sleep(1)
-        console.print(r"[info]This step will add 'G:\My Drive\Data\Resonance\Spells' to your user PATH environment variable.[/info]")
-        
-        if Confirm.ask("[spell]Shall we extend the Ley Lines?[/spell]"):
-            targets = [
-                r"G:\My Drive\Data\Resonance\Spells"
-            ]
-            
-            try:
-                with winreg.OpenKey(winreg.HKEY_CURRENT_USER, "Environment", 0, winreg.KEY_READ | winreg.KEY_WRITE) as key:
-                    try:
-                        path_val, type_ = winreg.QueryValueEx(key, "Path")
-                    except FileNotFoundError:
-                        path_val = ""
-                        type_ = winreg.REG_EXPAND_SZ
-                    
-                    parts = [p for p in path_val.split(";") if p]
-                    existing_lower = [p.lower() for p in parts]
-                    modified = False
-
-                    for target in targets:
-                        if target.lower() not in existing_lower:
-                            parts.append(target)
-                            existing_lower.append(target.lower())
-                            modified = True
-                            console.print(f"[success]  + The path {target} has been woven into the Ley Lines.[/success]")
-                        else:
-                            console.print(f"[dim]  . The path {target} is already present.[/dim]")
-
-                    if modified:
-                        new_path = ";".join(parts)
-                        winreg.SetValueEx(key, "Path", 0, type_, new_path)
-            except Exception as e:
-                console.print(f"[error]  ! Failed to extend Ley Lines: {e}[/error]")
+        """Weaves Spells into the user PATH and tidies the rest of it."""
+        drifts = self.drifted("path")
+        if not drifts:
+            return self.in_harmony("path", "Step 6: Extending the Ley Lines (PATH)")
+
+        self.console.rule("[arcane]Step 6: Extending the Ley Lines (PATH)[/arcane]")
+        self.pause(1)
+        plan = self.ley_lines.plan()
+        self.console.print(f"[info]This step will rework your user PATH ({plan.summary()}):[/info]")
+        styles = {"-": "red", "+": "green", "~": "yellow", " ": "dim"}
+        for marker, entry in plan.diff():
+            self.console.print(f"  {marker} {entry}", style=styles[marker], markup=False, highlight=False)
+        before, after = self.ley_lines.benchmark(plan)
+        self.console.print(f"[dim]  . Command lookup: {before * 1000:.2f} ms -> {after * 1000:.2f} ms[/dim]")
 
+        if self.confirm("path", f"[spell]{self.question('path')}[/spell]"):
+            for drift, error in self.apply(drifts):
+                if error:
+                    self.fail("path")
+                    self.console.print(f"[error]  ! Failed to extend Ley Lines: {error}[/error]")
+                else:
+                    self.console.print("[success]  + The Ley Lines have been rewoven.[/success]")
+
+    @traced("step")
     def step_desktop_cleanse(self):
         """Hides all desktop icons."""
-        console.rule("[arcane]Step 7: Cleansing the Surface (Desktop)[/arcane]")
-        time.sleep(1)
-        console.print("[info]This step will hide all icons on your Desktop by modifying the registry key 'HideIcons'.[/info]")
-        if Confirm.ask("[spell]Shall we banish all icons from the Desktop?[/spell]"):
+        drifts = self.drifted("desktop")
+        if not drifts:
+            return self.in_harmony("desktop", "Step 7: Cleansing the Surface (Desktop)")
+
+        self.console.rule("[arcane]Step 7: Cleansing the Surface (Desktop)[/arcane]")
+        self.pause(1)
+        self.console.print("[info]This step will hide all icons on your Desktop by modifying the registry key 'HideIcons'.[/info]")
+        if self.confirm("desktop", f"[spell]{self.question('desktop')}[/spell]"):
             # HideIcons = 1
-            if self.set_reg_key(r"HKCU:\Software\Microsoft\Windows\CurrentVersion\Explorer\Advanced", "HideIcons", 1):
-                console.print("[success]  + The surface has been silenced.[/success]")
+            landed = [self.set_reg_key(*drift.resource.setting) for drift in drifts]
+            for drift, ok in zip(drifts, landed):
+                self.record("desktop", drift.resource.name, None if ok else "registry write refused")
+            if all(landed):
+                self.effects.request("explorer", "desktop icons")
+                self.console.print("[success]  + The surface has been silenced.[/success]")
             else:
-                console.print("[error]  ! Failed to silence the Desktop.[/error]")
+                self.fail("desktop")
+                self.console.print("[error]  ! Failed to silence the Desktop.[/error]")
 
+    @traced("step")
     def step_taskbar_renewal(self):
         """Clears the taskbar and pins Windows Terminal using LayoutModification.xml."""
-        console.rule("[arcane]Step 8: Forging the Anchor (Taskbar)[/arcane]")
-        time.sleep(1)
-        console.print("[info]This step will remove all existing pinned items from the Taskbar and pin ONLY the Windows Terminal.[/info]")
-        if Confirm.ask("[spell]Shall we clear the Taskbar and anchor only the Terminal?[/spell]"):
-            ps_script = r"""
-            $ErrorActionPreference = 'SilentlyContinue'
-            
-            # Path to LayoutModification.xml
-            $LayoutPath = "$env:LOCALAPPDATA\Microsoft\Windows\Shell\LayoutModification.xml"
-            
-            # Define the XML content for replacing taskbar pins with Windows Terminal
-            $XmlContent = @'
-<?xml version="1.0" encoding="utf-8"?>
-<LayoutModificationTemplate
-    xmlns="http://schemas.microsoft.com/Start/2014/LayoutModification"
-    xmlns:defaultlayout="http://schemas.microsoft.com/Start/2014/FullDefaultLayout"
-    xmlns:start="http://schemas.microsoft.com/Start/2014/StartLayout"
-    xmlns:taskbar="http://schemas.microsoft.com/Start/2014/TaskbarLayout"
-    Version="1">
-  <CustomTaskbarLayoutCollection PinListPlacement="Replace">
-    <defaultlayout:TaskbarLayout>
-      <taskbar:TaskbarPinList>
-        <taskbar:UWA AppUserModelID="Microsoft.WindowsTerminal_8wekyb3d8bbwe!App" />
-      </taskbar:TaskbarPinList>
-    </defaultlayout:TaskbarLayout>
-  </CustomTaskbarLayoutCollection>
-</LayoutModificationTemplate>
-'@
-            
-            # Backup existing layout if it exists
-            if (Test-Path $LayoutPath) {
-                Copy-Item $LayoutPath "$LayoutPath.bak" -Force
-            }
-            
-            # Write the new XML
-            Set-Content -Path $LayoutPath -Value $XmlContent -Encoding UTF8
-            
-            # Clear existing pins and registry state to force a reload
-            $TaskbarPath = "$env:APPDATA\Microsoft\Internet Explorer\Quick Launch\User Pinned\TaskBar"
-            if (Test-Path $TaskbarPath) {
-                Remove-Item "$TaskbarPath\*" -Force
-            }
-            Remove-ItemProperty -Path "HKCU:\Software\Microsoft\Windows\CurrentVersion\Explorer\Taskband" -Name "*"
-            
-            # Restart Explorer to apply changes
-            Stop-Process -Name explorer -Force
-            Start-Sleep -Seconds 2
-            if (-not (Get-Process explorer -ErrorAction SilentlyContinue)) {
-                Start-Process explorer
-            }
-            """
-            
-            with console.status("[bold magenta]Reforging the Taskbar (LayoutModification.xml)..."):
-                self.run_ps(ps_script)
-            console.print("[success]  + Taskbar layout applied. (Explorer restarted)[/success]")
+        drifts = self.drifted("taskbar")
+        if not drifts:
+            return self.in_harmony("taskbar", "Step 8: Forging the Anchor (Taskbar)")
 
+        self.console.rule("[arcane]Step 8: Forging the Anchor (Taskbar)[/arcane]")
+        self.pause(1)
+        self.console.print("[info]This step will remove all existing pinned items from the Taskbar and pin ONLY the Windows Terminal.[/info]")
+        if self.confirm("taskbar", f"[spell]{self.question('taskbar')}[/spell]"):
+            with self.activity("[bold magenta]Reforging the Taskbar (LayoutModification.xml)..."):
+                results = self.apply(drifts)
+            if self.report_failures(results, "forge"):
+                self.console.print("[success]  + Taskbar layout applied. (Explorer restarts once, at the end)[/success]")
+
+    @traced("step")
     def finalize(self):
-        console.rule("[arcane]~~~ INCANTATION COMPLETE ~~~[/arcane]")
-        time.sleep(1)
-        console.print("[info]This step will restart Windows Explorer to ensure all registry changes and icon settings take effect immediately.[/info]")
-        if Confirm.ask("Restart Explorer to apply all sigils?"):
-            subprocess.run(["powershell", "-c", "Stop-Process -Name explorer -Force; Start-Process explorer"])
+        """Performs the effects the steps asked for, each once: environment, wallpaper, then Explorer."""
+        self.console.rule("[arcane]~~~ INCANTATION COMPLETE ~~~[/arcane]")
+        self.pause(1)
+        pending = self.effects.pending()
+        if not pending:
+            self.outcomes["finalize"] = "harmony"
+            self.console.print("[dim]  . No sigil needs a final push.[/dim]")
+            return
+
+        allow = True
+        if any(effect.disruptive for effect, _ in pending):
+            self.console.print("[info]This step will restart Windows Explorer once, so the taskbar, registry changes and icon settings take effect immediately.[/info]")
+            allow = self.confirm("finalize", self.question("finalize"))
+        else:
+            self.outcomes["finalize"] = "done"
+        self.release_effects(allow)
+
+# step -> (title, question, steps it needs, lanes it holds, method). Keys double as the answer-file keys.
+RITES = {
+    "fonts": ("Step 1: Inscribing Glyphs", "Ancient Glyphs (Fonts) seem vital. Inscribe them?", (), ("network",), "step_fonts"),
+    "share": ("Step 2: Setting up the Codex", "The Codex ({data_path}). Manage it?", (), ("registry",), "step_share"),
+    "drive": ("Step 2: Opening the Astral Gateway", "The Astral Gateway ({drive_letter}). Bind it?", ("share",), ("registry", "explorer"), "step_drive"),
+    "software": ("Step 3: Summoning Instruments (Winget)", "Shall we summon these instruments?", (), ("network",), "step_software"),
+    "settings": ("Step 4: Shaping the Apparatus (Settings)", "Shall we shape the apparatus?", (), ("registry", "explorer"), "step_windows_settings"),
+    # npm arrives with Node.js; the PATH is tidied once the installers have added to it
+    "gemini": ("Step 5: Summoning the Oracle (Gemini CLI)", "Shall we summon the Oracle?", ("software",), ("network",), "step_gemini"),
+    "path": ("Step 6: Extending the Ley Lines (PATH)", "Shall we extend the Ley Lines?", ("software",), ("registry",), "step_path"),
+    "desktop": ("Step 7: Cleansing the Surface (Desktop)", "Shall we banish all icons from the Desktop?", (), ("registry",), "step_desktop_cleanse"),
+    "taskbar": ("Step 8: Forging the Anchor (Taskbar)", "Shall we clear the Taskbar and anchor only the Terminal?", (), ("registry", "explorer"), "step_taskbar_renewal"),
+    "finalize": ("Finale: Restarting Explorer", "Restart Explorer to apply all sigils?",
+                 ("fonts", "drive", "software", "settings", "gemini", "path", "desktop", "taskbar"), ("explorer",), "finalize"),
+}
+STEPS = list(RITES)
+# Steps whose sigils only show after Explorer restarts
+RESTARTS_EXPLORER = ("settings", "desktop", "taskbar")
+
+def load_answers(parser, args):
+    """Builds the headless answer sheet from --answers/--steps/--yes. None means interactive."""
+    if not (args.answers or args.steps or args.yes):
+        return None
+
+    answers = {step: args.yes for step in STEPS}
+    if args.steps:
+        chosen = [step.strip() for step in args.steps.split(",") if step.strip()]
+        unknown = set(chosen) - set(STEPS)
+        if unknown:
+            parser.error(f"unknown steps: {', '.join(sorted(unknown))}")
+        answers = {step: step in chosen for step in STEPS}
+    if args.answers:
+        try:
+            with open(args.answers, encoding="utf-8") as f:
+                from_file = json.load(f)
+        except (OSError, ValueError) as e:
+            parser.error(f"cannot read answer file: {e}")
+        if not isinstance(from_file, dict):
+            parser.error("answer file must be a JSON object")
+        unknown = set(from_file) - set(STEPS)
+        if unknown:
+            parser.error(f"unknown steps in answer file: {', '.join(sorted(unknown))}")
+        answers.update({step: bool(answer) for step, answer in from_file.items()})
+    return answers
+
+def report_trace(tracer, trace_file):
+    if not tracer.enabled:
+        return
+    tracer.report(console)
+    if trace_file:
+        tracer.write_chrome_trace(trace_file)
+        console.print(f"[dim]Trace written to {trace_file}.[/dim]")
 
 # --- ENTRY POINT ---
 if __name__ == "__main__":
-    # Ensure Admin privileges for HKLM writes
-    if not ctypes.windll.shell32.IsUserAnAdmin():
-        console.print("[warning]Elevation required for system modifications. Summoning UAC...[/warning]")
-        script_path = os.path.abspath(__file__)
-        # ShellExecuteW returns >32 on success
-        ret = ctypes.windll.shell32.ShellExecuteW(None, "runas", sys.executable, f'"{script_path}"', None, 1)
-        if ret > 32:
-            sys.exit(0)
-        console.print("[error]Elevation failed or cancelled. Proceeding with limited power...[/error]")
-        time.sleep(2)
+    parser = argparse.ArgumentParser(description="The Grand Conjuration: provisions this machine.")
+    parser.add_argument("--plan", action="store_true", help="Only show what would change, then exit.")
+    parser.add_argument("--answers", metavar="FILE", help='Run headless, answering each step from a JSON file ({"fonts": true, ...}).')
+    parser.add_argument("--steps", help=f"Run headless, performing only these comma-separated steps ({', '.join(STEPS)}).")
+    parser.add_argument("--yes", action="store_true", help="Run headless, answering yes to every step.")
+    parser.add_argument("--trace", action="store_true", help="Time every step, process and registry call, and print the costliest.")
+    parser.add_argument("--trace-file", metavar="FILE", help="Also write the timings as Chrome trace-event JSON.")
+    parser.add_argument("--fresh", action="store_true", help="Ignore any interrupted run and start the ritual from the top.")
+    parser.add_argument("--journal", metavar="FILE", help=argparse.SUPPRESS)  # handed to the elevated relaunch
+    args = parser.parse_args()
+    answers = load_answers(parser, args)
+    headless = answers is not None
+    tracer = Tracer(enabled=args.trace or bool(args.trace_file))
+
+    if args.plan:
+        # Scrying only reads, so no elevation is needed
+        Incantation = Incantator(tracer=tracer)
+        Incantation.print_plan()
+        Incantation.powershell.close()
+        report_trace(tracer, args.trace_file)
+        sys.exit(0)
 
     try:
-        Incantation = Incantator()
+        journal = RunJournal(args.journal).load(fresh=args.fresh)
+        Incantation = Incantator(headless=headless, answers=answers, tracer=tracer, journal=journal)
         Incantation.banner()
-        
-        Incantation.step_fonts()
-        Incantation.step_share_and_drive()
-        Incantation.step_software()
-        Incantation.step_windows_settings()
-        Incantation.step_gemini()
-        Incantation.step_path()
-        Incantation.step_desktop_cleanse()
-        Incantation.step_taskbar_renewal()
-        
-        Incantation.finalize()
+        with console.status("[arcane]Scrying the realm...[/arcane]"):
+            Incantation.survey()
+
+        # Every question first, written to the journal as it is answered; then the steps run as a graph without stopping to ask
+        Incantation.gather_consent()
+
+        # Ensure Admin privileges for HKLM writes
+        if not ctypes.windll.shell32.IsUserAnAdmin():
+            if headless:
+                # Nobody is there to click through UAC; carry on and let HKLM writes report their failure
+                console.print("[warning]Running headless without elevation. System-wide sigils may resist.[/warning]")
+            else:
+                console.print("[warning]Elevation required for system modifications. Summoning UAC...[/warning]")
+                Incantation.powershell.close()
+                script_path = os.path.abspath(__file__)
+                # The elevated run picks up this journal, answers included, so nothing is asked twice
+                argv = [arg for arg in sys.argv[1:] if arg != "--fresh"] + ["--journal", str(journal.path)]
+                params = " ".join(f'"{arg}"' for arg in [script_path, *argv])
+                # Not an interruption: the elevated run is this one carrying on
+                journal.hand_off()
+                # ShellExecuteW returns >32 on success
+                ret = ctypes.windll.shell32.ShellExecuteW(None, "runas", sys.executable, params, None, 1)
+                if ret > 32:
+                    sys.exit(0)
+                journal.hand_off(False)
+                console.print("[error]Elevation failed or cancelled. Proceeding with limited power...[/error]")
+                time.sleep(2)
+
+        Incantation.perform()
+        Incantation.powershell.close()
+        if Incantation.exit_code == 0:
+            journal.finish()
+        else:
+            console.print("[warning]Some sigils resisted. Run the ritual again to retry only those.[/warning]")
     except Exception as e:
-        console.print(Panel(f"[bold red]FATAL ERROR[/bold red]\n\n{e}", border_style="red"))
+        console.print(Panel(f"[bold red]FATAL ERROR[/bold red]\n\n{e}\n\n[dim]Run the ritual again to resume where it stopped.[/dim]", border_style="red"))
         import traceback
         traceback.print_exc()
-        input("\nPress Enter to exit...")
\ No newline at end of file
+        report_trace(tracer, args.trace_file)
+        if not headless:
+            input("\nPress Enter to exit...")
+        sys.exit(1)
+
+    report_trace(tracer, args.trace_file)
+    sys.exit(Incantation.exit_code)
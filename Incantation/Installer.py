@@ -0,0 +1,90 @@
+"""Parallel summoning of Winget instruments with a bounded number of workers."""
+import subprocess
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+from Streaming import StreamingRunner, run_lines
+
+
+@dataclass(frozen=True)
+class Package:
+    name: str
+    pkg_id: str
+    # MSI-based installers all queue on the single Windows Installer mutex,
+    # so running two at once only produces 1618 ("another install in progress") errors.
+    exclusive: bool = False
+    # Where an installed copy leaves a file (%VAR% paths), so presence can be read off the disk without winget
+    paths: tuple = ()
+
+
+@dataclass
+class InstallOutcome:
+    package: Package
+    ok: bool
+    returncode: int
+    duration: float
+    detail: str = ""
+
+
+class InstallScheduler:
+    """Runs `winget install` for many packages at once, one exclusive installer at a time."""
+
+    def __init__(self, runner=None, max_workers=4, timeout=None, on_event=None):
+        self.runner = runner or StreamingRunner()
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        # on_event(package, state, outcome) with state in: queued, summoning, progress, summoned, failed
+        # (for progress, the third argument is the ProgressUpdate winget just drew)
+        self.on_event = on_event or (lambda package, state, outcome=None: None)
+
+    @staticmethod
+    def install_command(package):
+        return ["winget", "install", "-e", "--id", package.pkg_id, "--silent",
+                "--accept-source-agreements", "--accept-package-agreements"]
+
+    def _install(self, package):
+        self.on_event(package, "summoning")
+        start = time.perf_counter()
+        try:
+            proc = run_lines(self.runner, self.install_command(package), timeout=self.timeout,
+                             on_progress=lambda update: self.on_event(package, "progress", update))
+            returncode, detail = proc.returncode, (proc.stderr or proc.stdout or "").strip()
+        except subprocess.TimeoutExpired:
+            returncode, detail = -1, f"timed out after {self.timeout}s"
+        except Exception as e:
+            returncode, detail = -1, str(e)
+
+        outcome = InstallOutcome(package, returncode == 0, returncode, time.perf_counter() - start, detail)
+        self.on_event(package, "summoned" if outcome.ok else "failed", outcome)
+        return outcome
+
+    def run(self, packages):
+        """Installs every package and returns the outcomes in the order they were given."""
+        packages = list(packages)
+        for package in packages:
+            self.on_event(package, "queued")
+
+        pending = list(range(len(packages)))
+        running = {}
+        outcomes = [None] * len(packages)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                exclusive_busy = any(packages[i].exclusive for i in running.values())
+                # Fill free slots in order, letting shared installers jump past an exclusive one that has to wait
+                for index in list(pending):
+                    if len(running) >= self.max_workers:
+                        break
+                    package = packages[index]
+                    if package.exclusive and exclusive_busy:
+                        continue
+                    pending.remove(index)
+                    running[pool.submit(self._install, package)] = index
+                    exclusive_busy = exclusive_busy or package.exclusive
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    outcomes[running.pop(future)] = future.result()
+
+        return outcomes
@@ -0,0 +1,187 @@
+"""Indexed view of `winget list`, cached on disk so presence checks do not respawn winget."""
+import threading
+import time
+import unicodedata
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from Cache import atomic_write_json, cache_dir, read_json
+from Streaming import run_lines
+
+ELLIPSIS = "…"
+
+
+@dataclass(frozen=True)
+class InventoryEntry:
+    name: str
+    pkg_id: str
+    version: str = ""
+    available: str = ""
+    source: str = ""
+
+    @property
+    def truncated(self):
+        return self.pkg_id.endswith(ELLIPSIS)
+
+
+def _cell_width(char):
+    # winget pads its table in console cells, and wide (CJK) glyphs take two of them
+    return 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+
+
+def _split_row(line, starts):
+    """Cuts a table row at the header's column offsets, counted in console cells."""
+    cells = [""] * len(starts)
+    col, index, prev = 0, 0, " "
+    for char in line:
+        # A cell that overflows its column pushes the next one right; only move on after a gap
+        while index + 1 < len(starts) and col >= starts[index + 1] and char != " " and prev == " ":
+            index += 1
+        cells[index] += char
+        col += _cell_width(char)
+        prev = char
+    return [cell.strip() for cell in cells]
+
+
+def _header_starts(header):
+    starts = []
+    for i, char in enumerate(header):
+        if char != " " and (i == 0 or header[i - 1] == " "):
+            starts.append(i)
+    return starts
+
+
+class WingetInventory:
+    """Installed packages keyed by exact winget ID."""
+
+    def __init__(self, entries=()):
+        self.by_id = {}
+        # winget cuts long IDs to fit the console ("Microsoft.VisualStu…"); keep those aside as prefixes
+        self.truncated = {}
+        for entry in entries:
+            if entry.truncated:
+                self.truncated[entry.pkg_id[:-1].lower()] = entry
+            else:
+                self.by_id[entry.pkg_id.lower()] = entry
+
+    def __len__(self):
+        return len(self.by_id) + len(self.truncated)
+
+    @classmethod
+    def parse(cls, text):
+        """Parses the table printed by `winget list`."""
+        reader = InventoryReader()
+        for line in text.splitlines():
+            reader.feed(line)
+        return reader.inventory()
+
+    def get(self, pkg_id):
+        key = pkg_id.lower()
+        entry = self.by_id.get(key)
+        if entry is not None:
+            return entry
+        # Fall back to truncated IDs, longest prefix wins
+        best = None
+        for prefix, candidate in self.truncated.items():
+            if key.startswith(prefix) and (best is None or len(prefix) > len(best[0])):
+                best = (prefix, candidate)
+        return best[1] if best else None
+
+    def is_installed(self, pkg_id):
+        return self.get(pkg_id) is not None
+
+    def is_outdated(self, pkg_id):
+        entry = self.get(pkg_id)
+        return bool(entry and entry.available)
+
+    def to_json(self):
+        return [asdict(entry) for entry in (*self.by_id.values(), *self.truncated.values())]
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(InventoryEntry(**item) for item in data)
+
+
+class InventoryReader:
+    """Parses the `winget list` table a line at a time, as winget prints it, so the raw table is never held whole."""
+
+    # Name, Id, Version are always first; the optional Available column sits before Source
+    FIELDS = ["name", "pkg_id", "version", "available", "source"]
+
+    def __init__(self):
+        self.previous = None
+        self.starts = None
+        self.fields = None
+        self.finished = False
+        self.entries = []
+
+    def feed(self, line):
+        # The progress spinner is drawn with carriage returns; keep only what finally landed on the line
+        line = line.split("\r")[-1].rstrip()
+        if self.finished:
+            return
+        if self.starts is None:
+            if self.previous is not None and len(line) > 10 and set(line) == {"-"}:
+                starts = _header_starts(self.previous)
+                if len(starts) < 3:
+                    self.finished = True
+                    return
+                self.starts = starts
+                self.fields = self.FIELDS if len(starts) != 4 else ["name", "pkg_id", "version", "source"]
+            self.previous = line
+            return
+        if not line.strip():
+            self.finished = True
+            return
+        values = dict(zip(self.fields, _split_row(line, self.starts)))
+        if values.get("pkg_id"):
+            self.entries.append(InventoryEntry(**values))
+
+    def inventory(self):
+        return WingetInventory(self.entries)
+
+
+class InventoryCache:
+    """Keeps the parsed inventory on disk for `ttl` seconds; any install should invalidate it."""
+
+    def __init__(self, runner, path=None, ttl=15 * 60, timeout=120):
+        self.runner = runner
+        self.path = Path(path) if path else cache_dir() / "winget-inventory.json"
+        self.ttl = ttl
+        self.timeout = timeout
+        self._memory = None
+        # Many package checks ask at once; only the first should pay for `winget list`
+        self._lock = threading.Lock()
+
+    def load(self, refresh=False):
+        with self._lock:
+            return self._load(refresh)
+
+    def _load(self, refresh):
+        if not refresh:
+            if self._memory is not None:
+                return self._memory
+            cached = read_json(self.path)
+            if cached and time.time() - cached.get("taken", 0) < self.ttl:
+                self._memory = WingetInventory.from_json(cached.get("entries", []))
+                return self._memory
+        return self._refresh()
+
+    def refresh(self):
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self):
+        # Rows are parsed as winget prints them; only the tail of the output is kept for the error message
+        reader = InventoryReader()
+        proc = run_lines(self.runner, ["winget", "list", "--accept-source-agreements"], timeout=self.timeout, on_line=reader.feed)
+        if proc.returncode != 0:
+            raise RuntimeError(f"winget list failed ({proc.returncode})")
+        self._memory = reader.inventory()
+        atomic_write_json(self.path, {"taken": time.time(), "entries": self._memory.to_json()})
+        return self._memory
+
+    def invalidate(self):
+        with self._lock:
+            self._memory = None
+            self.path.unlink(missing_ok=True)
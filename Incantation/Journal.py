@@ -0,0 +1,127 @@
+"""A durable record of the current run, so an interrupted ritual picks up where it stopped instead of starting over."""
+import threading
+import time
+from pathlib import Path
+
+from Cache import atomic_write_json, cache_dir, read_json
+
+JOURNAL_VERSION = 1
+# Statuses a rerun does not need to revisit. A declined step is not one of them: the apprentice may have changed their mind
+SETTLED = ("done", "harmony")
+
+
+class RunJournal:
+    """Step and item outcomes, the answers given and the effects still owed, rewritten atomically on every change.
+
+    A run that finishes cleanly closes its journal; anything else (a crash, a failed item, a UAC relaunch)
+    leaves it open, and the next run within `max_age` seconds resumes from it. `interrupted` tells a run that
+    resumed someone else's wreckage from one that was handed the journal on purpose (see hand_off).
+    """
+
+    def __init__(self, path=None, max_age=24 * 3600, clock=time.time):
+        self.path = Path(path) if path else cache_dir() / "journal.json"
+        self.max_age = max_age
+        self.clock = clock
+        self.data = self._blank()
+        self.resumed = False
+        self.interrupted = False
+        self._lock = threading.Lock()
+
+    def _blank(self):
+        now = self.clock()
+        return {"version": JOURNAL_VERSION, "started": now, "updated": now, "finished": False,
+                "consent": {}, "steps": {}, "items": {}, "effects": {}}
+
+    def load(self, fresh=False):
+        """Picks up an unfinished, recent journal; otherwise starts a blank one."""
+        data = None if fresh else read_json(self.path)
+        if (isinstance(data, dict) and data.get("version") == JOURNAL_VERSION and not data.get("finished")
+                and all(isinstance(data.get(key), dict) for key in ("consent", "steps", "items", "effects"))
+                and self.clock() - data.get("updated", 0) <= self.max_age):
+            self.data = data
+            self.resumed = True
+            self.interrupted = not data.pop("handoff", False)
+            if not self.interrupted:
+                # Taken up; should this run die too, the next one is resuming an interruption after all
+                self._save()
+        else:
+            self.data = self._blank()
+            self.resumed = self.interrupted = False
+        return self
+
+    def _save(self):
+        self.data["updated"] = self.clock()
+        atomic_write_json(self.path, self.data)
+
+    # --- answers ---
+
+    @property
+    def consent(self):
+        return dict(self.data["consent"])
+
+    def record_consent(self, consent):
+        with self._lock:
+            self.data["consent"].update({step: bool(answer) for step, answer in consent.items()})
+            self._save()
+
+    # --- steps and their items ---
+
+    def step_status(self, step):
+        return self.data["steps"].get(step)
+
+    def settled(self, step):
+        return self.step_status(step) in SETTLED
+
+    def record_step(self, step, status):
+        with self._lock:
+            self.data["steps"][step] = status
+            self._save()
+
+    def item_status(self, step, item):
+        return self.data["items"].get(step, {}).get(item, {}).get("status")
+
+    def record_item(self, step, item, status, detail=""):
+        with self._lock:
+            self.data["items"].setdefault(step, {})[item] = {"status": status, "detail": detail}
+            self._save()
+
+    # --- effects owed to the machine ---
+
+    def record_effect(self, name, reason=""):
+        with self._lock:
+            reasons = self.data["effects"].setdefault(name, [])
+            if reason and reason not in reasons:
+                reasons.append(reason)
+            self._save()
+
+    def effect_done(self, name):
+        with self._lock:
+            if self.data["effects"].pop(name, None) is not None:
+                self._save()
+
+    @property
+    def effects(self):
+        return {name: list(reasons) for name, reasons in self.data["effects"].items()}
+
+    # --- lifecycle ---
+
+    def summary(self):
+        """(settled steps, steps to revisit) from the interrupted run."""
+        settled = [step for step, status in self.data["steps"].items() if status in SETTLED]
+        pending = [step for step, status in self.data["steps"].items() if status not in SETTLED]
+        return settled, pending
+
+    def hand_off(self, handing=True):
+        """Marks the journal as passed on to a relaunch of this same run (the elevated one), or takes it back."""
+        with self._lock:
+            if handing:
+                self.data["handoff"] = True
+            else:
+                self.data.pop("handoff", None)
+            self._save()
+
+    def finish(self):
+        """Closes the journal: the next run starts from scratch."""
+        with self._lock:
+            self.data["finished"] = True
+            self._save()
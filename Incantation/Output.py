@@ -0,0 +1,64 @@
+"""Keeps concurrent steps legible: each step's output is held back and printed as one block when it ends."""
+import io
+import threading
+from contextlib import contextmanager
+
+
+class StepConsole:
+    """Stands in for the rich Console. Inside held(), print/rule go to a private buffer for the current thread."""
+
+    def __init__(self, console, theme=None):
+        self.console = console
+        self.theme = theme
+        self._local = threading.local()
+
+    def __getattr__(self, name):
+        # status, clear, input... go straight to the real console
+        return getattr(self.console, name)
+
+    def _target(self):
+        return getattr(self._local, "buffer", None) or self.console
+
+    def print(self, *objects, **kwargs):
+        self._target().print(*objects, **kwargs)
+
+    def rule(self, *args, **kwargs):
+        self._target().rule(*args, **kwargs)
+
+    @contextmanager
+    def held(self):
+        from rich.console import Console
+        from rich.text import Text
+
+        real = self.console
+        buffer = Console(file=io.StringIO(), theme=self.theme, width=real.width,
+                         force_terminal=real.is_terminal, color_system=real.color_system)
+        self._local.buffer = buffer
+        try:
+            yield buffer
+        finally:
+            self._local.buffer = None
+            text = buffer.file.getvalue().rstrip("\n")
+            if text:
+                real.print(Text.from_ansi(text), soft_wrap=True)
+
+
+class BoardRows:
+    """The rows one step adds to a shared Progress, removed again when the step is done with them."""
+
+    def __init__(self, progress):
+        self.progress = progress
+        self.tasks = []
+
+    def add_task(self, description, **kwargs):
+        task = self.progress.add_task(description, **kwargs)
+        self.tasks.append(task)
+        return task
+
+    def update(self, task, **kwargs):
+        self.progress.update(task, **kwargs)
+
+    def close(self):
+        for task in self.tasks:
+            self.progress.remove_task(task)
+        self.tasks = []
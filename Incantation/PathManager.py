@@ -0,0 +1,221 @@
+"""User PATH upkeep: expand, normalize, dedupe, drop dead folders and reorder, behind a swappable environment store."""
+import os
+import re
+import time
+from dataclasses import dataclass, field
+
+from Registry import MISSING, REG_EXPAND_SZ, RegistryTransaction, split_path
+
+ENVIRONMENT_KEY = r"HKCU:\Environment"
+MACHINE_ENVIRONMENT_KEY = r"HKLM:\SYSTEM\CurrentControlSet\Control\Session Manager\Environment"
+_VARIABLE = re.compile(r"%([^%;]+)%")
+
+
+class RegistryEnvStore:
+    """The user PATH as stored in HKCU\\Environment, keeping its REG_EXPAND_SZ type."""
+
+    def __init__(self, registry, name="Path"):
+        self.registry = registry
+        self.name = name
+
+    def get(self):
+        current = self.registry.query(*split_path(ENVIRONMENT_KEY), self.name)
+        return ("", REG_EXPAND_SZ) if current is MISSING else current
+
+    def set(self, value, reg_type=REG_EXPAND_SZ):
+        change, = RegistryTransaction(self.registry).set(ENVIRONMENT_KEY, self.name, value, reg_type).commit()
+        if change.status == "failed":
+            raise RuntimeError(change.detail)
+
+
+class MemoryEnvStore:
+    """A PATH value held in memory."""
+
+    def __init__(self, value="", reg_type=REG_EXPAND_SZ):
+        self.value = value
+        self.reg_type = reg_type
+        self.writes = 0
+
+    def get(self):
+        return self.value, self.reg_type
+
+    def set(self, value, reg_type=REG_EXPAND_SZ):
+        self.value = value
+        self.reg_type = reg_type
+        self.writes += 1
+
+
+def split_entries(value, sep=";"):
+    return [part for part in value.split(sep) if part.strip()]
+
+
+def expand(entry, env=None):
+    """Expands %VAR% the way Windows does: case-insensitive names, unknown ones left alone."""
+    env = os.environ if env is None else env
+    folded = {key.upper(): value for key, value in env.items()}
+    return _VARIABLE.sub(lambda m: folded.get(m.group(1).upper(), m.group(0)), entry)
+
+
+def normalize(entry, env=None):
+    """The form two entries are compared by: expanded, unquoted, no trailing separator, case-folded where the OS is."""
+    path = expand(entry.strip().strip('"'), env).strip()
+    if not path:
+        return ""
+    return os.path.normcase(os.path.normpath(path))
+
+
+@dataclass
+class PathPlan:
+    before: list
+    after: list
+    removed: list = field(default_factory=list)  # (entry, reason)
+    added: list = field(default_factory=list)
+
+    @property
+    def changed(self):
+        return self.before != self.after
+
+    def summary(self):
+        reasons = {}
+        for _, reason in self.removed:
+            reasons[reason] = reasons.get(reason, 0) + 1
+        parts = [f"{count} {reason}" for reason, count in reasons.items()]
+        if self.added:
+            parts.append(f"{len(self.added)} to weave")
+        if not parts and self.changed:
+            parts.append("reordered")
+        return ", ".join(parts)
+
+    def diff(self):
+        """(marker, entry) rows: '-' removed, '+' added, '~' moved, ' ' kept in place."""
+        survivors = {}
+        for entry in self.after:
+            survivors[entry] = survivors.get(entry, 0) + 1
+        for entry in self.added:
+            survivors[entry] -= 1
+        rows, kept = [], []
+        for entry in self.before:
+            # Duplicates lose their later copies, so the first occurrences are the ones still standing
+            if survivors.get(entry, 0) > 0:
+                survivors[entry] -= 1
+                kept.append(entry)
+            else:
+                rows.append(("-", entry))
+        position = 0
+        for entry in self.after:
+            if entry in self.added:
+                rows.append(("+", entry))
+                continue
+            rows.append((" " if kept[position] == entry else "~", entry))
+            position += 1
+        return rows
+
+
+def compact(entries, ensure=(), priorities=(), env=None, exists=os.path.isdir):
+    """Works out the tidy PATH: duplicates and dead folders out, `ensure` in, `priorities` first.
+
+    A folder only counts as dead when its drive or root is there, so an unplugged or unsynced drive keeps its
+    entries; entries with unknown variables and anything in `ensure` are always kept.
+    """
+    ensure_keys = {normalize(entry, env) for entry in ensure}
+    seen = set()
+    kept, removed = [], []
+    for entry in entries:
+        key = normalize(entry, env)
+        if not key:
+            removed.append((entry, "empty"))
+        elif key in seen:
+            removed.append((entry, "duplicate"))
+        elif key not in ensure_keys and "%" not in expand(entry, env) and _dead(key, exists):
+            removed.append((entry, "dead"))
+            seen.add(key)
+        else:
+            kept.append(entry)
+            seen.add(key)
+
+    added = [entry for entry in ensure if normalize(entry, env) not in seen]
+    after = kept + added
+
+    if priorities:
+        ranks = [normalize(p, env) for p in priorities]
+
+        def rank(entry):
+            key = normalize(entry, env)
+            for position, prefix in enumerate(ranks):
+                if key == prefix or key.startswith(prefix.rstrip(os.sep) + os.sep):
+                    return position
+            return len(ranks)
+        after = sorted(after, key=rank)  # stable: everything else keeps its order
+
+    return PathPlan(list(entries), after, removed, added)
+
+
+def fresh_path(registry, current="", env=None):
+    """The PATH a process started now would get: the machine's entries, then the user's, expanded.
+
+    Installers only write the registry, so this is how a running process sees what they added. Entries only
+    `current` has (a venv, a sandbox) stay on the end.
+    """
+    entries = []
+    for key in (MACHINE_ENVIRONMENT_KEY, ENVIRONMENT_KEY):
+        value = registry.query(*split_path(key), "Path")
+        if value is not MISSING:
+            entries += [expand(entry, env) for entry in split_entries(value[0])]
+    entries += split_entries(current, os.pathsep)
+    seen, merged = set(), []
+    for entry in entries:
+        key = normalize(entry, env)
+        if key and key not in seen:
+            seen.add(key)
+            merged.append(entry)
+    return os.pathsep.join(merged)
+
+
+def _dead(path, exists):
+    if exists(path):
+        return False
+    drive, _ = os.path.splitdrive(path)
+    anchor = drive + os.sep if drive else os.sep
+    return exists(anchor)
+
+
+def resolution_time(entries, commands=("python", "git", "code", "not-a-command"), extensions=None,
+                    env=None, isfile=os.path.isfile, repeats=20):
+    """Average seconds to resolve each command the way a shell does: every folder, every PATHEXT extension."""
+    if extensions is None:
+        extensions = (os.environ.get("PATHEXT", ".COM;.EXE;.BAT;.CMD").split(";") if os.name == "nt" else [""])
+    folders = [expand(entry, env) for entry in entries]
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for command in commands:
+            for folder in folders:
+                if any(isfile(os.path.join(folder, command + ext)) for ext in extensions):
+                    break
+    return (time.perf_counter() - start) / (repeats * len(commands))
+
+
+class PathManager:
+    """Reads the PATH from a store, plans the tidy version and writes it back only if it differs."""
+
+    def __init__(self, store, ensure=(), priorities=(), env=None, exists=os.path.isdir):
+        self.store = store
+        self.ensure = list(ensure)
+        self.priorities = list(priorities)
+        self.env = env
+        self.exists = exists
+
+    def plan(self):
+        value, _ = self.store.get()
+        return compact(split_entries(value), self.ensure, self.priorities, self.env, self.exists)
+
+    def apply(self):
+        # Re-read right before writing so nothing added since plan() is lost
+        value, reg_type = self.store.get()
+        plan = compact(split_entries(value), self.ensure, self.priorities, self.env, self.exists)
+        if plan.changed:
+            self.store.set(";".join(plan.after), reg_type)
+        return plan
+
+    def benchmark(self, plan, **kwargs):
+        """(before, after) seconds per command lookup."""
+        return resolution_time(plan.before, env=self.env, **kwargs), resolution_time(plan.after, env=self.env, **kwargs)
@@ -0,0 +1,64 @@
+"""Desired-state engine: probe every resource at once, then apply only what drifted."""
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+
+class Resource(ABC):
+    """Something the ritual wants to be true about the machine.
+
+    check() returns None when the machine already agrees, or a short description of the drift.
+    apply() brings the machine in line, raising when it cannot.
+    """
+
+    step = ""
+
+    def __init__(self, name):
+        self.name = name
+
+    @abstractmethod
+    def check(self):
+        ...
+
+    @abstractmethod
+    def apply(self):
+        ...
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r})"
+
+
+@dataclass
+class Drift:
+    resource: Resource
+    detail: str
+
+
+def survey(resources, max_workers=8):
+    """Runs every check() concurrently and returns the drifts, in resource order."""
+    resources = list(resources)
+
+    def probe(resource):
+        try:
+            detail = resource.check()
+        except Exception as e:
+            # A probe that cannot answer is treated as drift, so apply() gets a chance to fix it
+            detail = f"probe failed: {e}"
+        return Drift(resource, detail) if detail else None
+
+    if not resources:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(resources))) as pool:
+        return [drift for drift in pool.map(probe, resources) if drift]
+
+
+def apply(drifts):
+    """Applies the drifted resources one by one, returning (drift, error) pairs; error is None on success."""
+    results = []
+    for drift in drifts:
+        try:
+            drift.resource.apply()
+            results.append((drift, None))
+        except Exception as e:
+            results.append((drift, str(e) or type(e).__name__))
+    return results
@@ -0,0 +1,188 @@
+"""Long-lived PowerShell hosts, so each spell does not pay the cold start of a fresh powershell.exe."""
+import base64
+import itertools
+import queue
+import subprocess
+import threading
+import time
+from collections import deque
+
+MARKER = "@@RESONANCE"
+
+# Runs inside the host. Each request is one line: "<id> <base64 utf-8 script>".
+# Each response is one line: "@@RESONANCE <id> <exit> <base64 stdout> <base64 stderr>".
+# Scripts must not call `exit`, which would take the whole host down (it gets restarted, but the result is lost).
+HOST_SCRIPT = r"""
+$ErrorActionPreference = 'Continue'
+$ProgressPreference = 'SilentlyContinue'
+$utf8 = New-Object System.Text.UTF8Encoding $false
+while ($true) {
+    $line = [Console]::In.ReadLine()
+    if ($line -eq $null) { break }
+    $id, $payload = $line.Split(' ', 2)
+    $script = $utf8.GetString([Convert]::FromBase64String($payload))
+    $out = New-Object System.Text.StringBuilder
+    $err = New-Object System.Text.StringBuilder
+    $code = 0
+    $global:LASTEXITCODE = 0
+    try {
+        $records = @(& ([ScriptBlock]::Create($script)) *>&1)
+        foreach ($record in $records) {
+            if ($record -is [System.Management.Automation.ErrorRecord]) {
+                [void]$err.AppendLine($record.ToString())
+                $code = 1
+            } else {
+                [void]$out.AppendLine(($record | Out-String).TrimEnd())
+            }
+        }
+        if ($global:LASTEXITCODE) { $code = $global:LASTEXITCODE }
+    } catch {
+        [void]$err.AppendLine($_.ToString())
+        $code = 1
+    }
+    $o = [Convert]::ToBase64String($utf8.GetBytes($out.ToString()))
+    $e = [Convert]::ToBase64String($utf8.GetBytes($err.ToString()))
+    [Console]::Out.WriteLine("@@RESONANCE $id $code $o $e")
+    [Console]::Out.Flush()
+}
+"""
+
+
+def default_host_argv():
+    encoded = base64.b64encode(HOST_SCRIPT.encode("utf-16-le")).decode("ascii")
+    return ["powershell", "-NoProfile", "-NoLogo", "-NonInteractive", "-ExecutionPolicy", "Bypass",
+            "-EncodedCommand", encoded]
+
+
+def encode_request(request_id, script):
+    return f"{request_id} {base64.b64encode(script.encode('utf-8')).decode('ascii')}\n"
+
+
+def decode_response(line):
+    """Returns (id, exit code, stdout, stderr) for a response line, or None for stray output."""
+    if not line.startswith(MARKER + " "):
+        return None
+    parts = line.rstrip("\r\n").split(" ")
+    if len(parts) != 5:
+        return None
+    _, request_id, code, out, err = parts
+    decode = lambda blob: base64.b64decode(blob).decode("utf-8", errors="replace")
+    return int(request_id), int(code), decode(out), decode(err)
+
+
+class PowerShellHost:
+    """One persistent shell process speaking the framed protocol. Restarts itself when it dies."""
+
+    def __init__(self, argv=None):
+        self.argv = argv or default_host_argv()
+        self.proc = None
+        self._responses = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.stray = deque(maxlen=50)  # anything the host printed outside a response, for diagnostics
+        self.starts = 0
+
+    @property
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def _start(self):
+        self.proc = subprocess.Popen(
+            self.argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True, encoding="utf-8", errors="replace", bufsize=1,
+        )
+        self.starts += 1
+        self._responses = queue.Queue()
+        threading.Thread(target=self._read_stdout, args=(self.proc, self._responses), daemon=True).start()
+        threading.Thread(target=self._read_stderr, args=(self.proc,), daemon=True).start()
+
+    def _read_stdout(self, proc, responses):
+        for line in proc.stdout:
+            response = decode_response(line)
+            if response is None:
+                self.stray.append(line.rstrip())
+            else:
+                responses.put(response)
+        responses.put(None)  # EOF: the host is gone
+
+    def _read_stderr(self, proc):
+        for line in proc.stderr:
+            self.stray.append(line.rstrip())
+
+    def _kill(self):
+        if self.proc is not None:
+            try:
+                self.proc.kill()
+                self.proc.wait(timeout=5)
+            except Exception:
+                pass
+        self.proc = None
+
+    def _send(self, request_id, script):
+        if not self.alive:
+            self._kill()
+            self._start()
+        self.proc.stdin.write(encode_request(request_id, script))
+        self.proc.stdin.flush()
+
+    def run(self, script, timeout=None):
+        """Runs one script and returns a CompletedProcess with its exit code, stdout and stderr."""
+        with self._lock:
+            request_id = next(self._ids)
+            self.stray.clear()
+            try:
+                self._send(request_id, script)
+            except OSError:
+                # Died between requests: the script never ran, so a fresh host can take it
+                self._kill()
+                self._send(request_id, script)
+
+            responses = self._responses
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                try:
+                    remaining = None if deadline is None else max(0, deadline - time.monotonic())
+                    response = responses.get(timeout=remaining)
+                except queue.Empty:
+                    # A stuck pipeline cannot be interrupted from outside; sacrifice the host
+                    self._kill()
+                    return subprocess.CompletedProcess(script, -1, "", f"timed out after {timeout}s")
+                if response is None:
+                    self._kill()
+                    detail = "\n".join(self.stray) or "PowerShell host exited unexpectedly"
+                    return subprocess.CompletedProcess(script, -1, "", detail)
+                if response[0] == request_id:
+                    _, code, out, err = response
+                    return subprocess.CompletedProcess(script, code, out, err)
+                # Late answer to a request that already timed out on an older host; ignore
+
+    def close(self):
+        with self._lock:
+            if self.alive:
+                try:
+                    self.proc.stdin.close()
+                    self.proc.wait(timeout=5)
+                except Exception:
+                    pass
+            self._kill()
+
+
+class PowerShellPool:
+    """A few hosts shared between threads; each command borrows an idle one."""
+
+    def __init__(self, size=2, argv=None):
+        self.hosts = [PowerShellHost(argv) for _ in range(max(1, size))]
+        self._idle = queue.Queue()
+        for host in self.hosts:
+            self._idle.put(host)
+
+    def run(self, script, timeout=None):
+        host = self._idle.get()
+        try:
+            return host.run(script, timeout=timeout)
+        finally:
+            self._idle.put(host)
+
+    def close(self):
+        for host in self.hosts:
+            host.close()
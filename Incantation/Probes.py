@@ -0,0 +1,168 @@
+"""Answers "is it installed, and which version?" by reading files, instead of booting the tool's own CLI to ask it."""
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from PathManager import expand
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    found: bool
+    version: str = ""
+    location: str = ""
+
+
+ABSENT = ProbeResult(False)
+
+
+def read_package_json(folder):
+    """The parsed package.json in `folder`, or None when there is no readable one."""
+    try:
+        with open(Path(folder) / "package.json", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def npmrc_prefix(path):
+    """The prefix= setting of an .npmrc, if it has one."""
+    try:
+        text = Path(path).read_text(encoding="utf-8")
+    except OSError:
+        return None
+    for line in text.splitlines():
+        key, sep, value = line.partition("=")
+        if sep and key.strip() == "prefix":
+            return value.strip().strip('"') or None
+    return None
+
+
+def npm_global_root(env=None, which=shutil.which, windows=None):
+    """Where `npm install -g` puts packages, worked out the way npm does: environment, user .npmrc, then the default."""
+    env = os.environ if env is None else env
+    windows = os.name == "nt" if windows is None else windows
+    prefix = env.get("NPM_CONFIG_PREFIX") or env.get("npm_config_prefix")
+    if not prefix:
+        home = env.get("USERPROFILE") or env.get("HOME")
+        prefix = npmrc_prefix(Path(home) / ".npmrc") if home else None
+    if not prefix:
+        if windows:
+            # npm's Windows default, whether or not Node has ever run
+            prefix = str(Path(env["APPDATA"]) / "npm") if env.get("APPDATA") else None
+        else:
+            # Elsewhere the prefix is the folder node itself lives under (/usr/local/bin/node -> /usr/local)
+            node = which("node")
+            prefix = str(Path(node).resolve().parent.parent) if node else None
+    if not prefix:
+        return None
+    return Path(prefix) / "node_modules" if windows else Path(prefix) / "lib" / "node_modules"
+
+
+def probe_npm_global(package, root):
+    """Reads <root>/<package>/package.json (scoped names are nested folders, just like on disk)."""
+    if root is None:
+        return ABSENT
+    folder = Path(root, *package.split("/"))
+    manifest = read_package_json(folder)
+    if manifest is None:
+        return ABSENT
+    return ProbeResult(True, str(manifest.get("version", "")), str(folder))
+
+
+def probe_files(candidates, env=None, exists=os.path.exists):
+    """The first of `candidates` (%VAR% paths) that exists. Paths with unknown variables are skipped."""
+    for candidate in candidates:
+        path = expand(candidate, env)
+        if "%" not in path and exists(path):
+            return ProbeResult(True, location=path)
+    return ABSENT
+
+
+class ProbeCache:
+    """Remembers every probe for the rest of the run; threads asking for the same key wait for one answer."""
+
+    def __init__(self):
+        self._results = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def probe(self, key, fn):
+        with self._lock:
+            if key in self._results:
+                return self._results[key]
+            gate = self._pending.setdefault(key, threading.Lock())
+        with gate:
+            with self._lock:
+                if key in self._results:
+                    return self._results[key]
+            result = fn()
+            with self._lock:
+                self._results[key] = result
+                self._pending.pop(key, None)
+            return result
+
+    def probe_all(self, probes, max_workers=8):
+        """Runs {key: fn} side by side and returns {key: result}."""
+        probes = dict(probes)
+        if not probes:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(probes))) as pool:
+            futures = {key: pool.submit(self.probe, key, fn) for key, fn in probes.items()}
+        return {key: future.result() for key, future in futures.items()}
+
+    def invalidate(self, key=None):
+        """Forgets one probe (after installing that thing), or all of them."""
+        with self._lock:
+            if key is None:
+                self._results.clear()
+            else:
+                self._results.pop(key, None)
+
+
+class ToolProbes:
+    """The probes the ritual asks: winget packages by their install folders, npm globals by their package.json."""
+
+    def __init__(self, env=None, which=shutil.which, windows=None, exists=os.path.exists):
+        self.env = env
+        self.which = which
+        self.windows = windows
+        self.exists = exists
+        self.cache = ProbeCache()
+
+    def npm_root(self):
+        return self.cache.probe("npm-root", lambda: npm_global_root(self.env, self.which, self.windows))
+
+    def _npm_probe(self, package):
+        return ("npm", package), lambda: probe_npm_global(package, self.npm_root())
+
+    def _package_probe(self, package):
+        return ("winget", package.pkg_id), lambda: probe_files(package.paths, self.env, self.exists)
+
+    def npm_global(self, package):
+        return self.cache.probe(*self._npm_probe(package))
+
+    def package(self, package):
+        return self.cache.probe(*self._package_probe(package))
+
+    def probe_all(self, packages=(), npm_packages=(), max_workers=8):
+        """Probes everything at once; returns {name: ProbeResult} for the confirmation screens."""
+        named = [(package.name, self._package_probe(package)) for package in packages]
+        named += [(name, self._npm_probe(name)) for name in npm_packages]
+        results = self.cache.probe_all(dict(probe for _, probe in named), max_workers)
+        return {name: results[key] for name, (key, _) in named}
+
+    def forget_package(self, package):
+        self.cache.invalidate(("winget", package.pkg_id))
+
+    def forget_npm(self, package):
+        self.cache.invalidate(("npm", package))
+
+    def forget_npm_root(self):
+        # Where npm puts globals can follow node, which may only just have arrived
+        self.cache.invalidate("npm-root")
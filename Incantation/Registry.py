@@ -0,0 +1,203 @@
+"""Batched, diff-aware registry writes on top of a swappable backend."""
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any
+
+# Same values as the winreg constants, so callers do not need winreg to describe a write
+REG_SZ = 1
+REG_EXPAND_SZ = 2
+REG_DWORD = 4
+REG_QWORD = 11
+
+MISSING = object()
+
+
+def split_path(path):
+    """'HKCU:\\Software\\X' -> ('HKCU', 'Software\\X')."""
+    hive, subkey = path.split(":\\", 1)
+    return hive.upper(), subkey
+
+
+def read_value(backend, path, name):
+    """The data stored at path/name, or MISSING."""
+    current = backend.query(*split_path(path), name)
+    return MISSING if current is MISSING else current[0]
+
+
+class WinRegBackend:
+    """The real registry, through winreg."""
+
+    def __init__(self):
+        import winreg
+        self.winreg = winreg
+        self.hives = {"HKCU": winreg.HKEY_CURRENT_USER, "HKLM": winreg.HKEY_LOCAL_MACHINE}
+
+    def open(self, hive, subkey):
+        return _WinRegKey(self.winreg, self._root(hive), subkey)
+
+    def _root(self, hive):
+        return self.hives.get(hive, self.winreg.HKEY_CURRENT_USER)
+
+    def query(self, hive, subkey, name):
+        """Reads one value as (value, type) without creating anything; MISSING if absent."""
+        try:
+            with self.winreg.OpenKey(self._root(hive), subkey, 0, self.winreg.KEY_QUERY_VALUE) as key:
+                return self.winreg.QueryValueEx(key, name)
+        except FileNotFoundError:
+            return MISSING
+
+    def values(self, hive, subkey):
+        """All values under a key as {name: (value, type)}; empty if the key is absent."""
+        found = {}
+        try:
+            with self.winreg.OpenKey(self._root(hive), subkey, 0, self.winreg.KEY_QUERY_VALUE) as key:
+                index = 0
+                while True:
+                    try:
+                        name, value, reg_type = self.winreg.EnumValue(key, index)
+                    except OSError:
+                        break
+                    found[name] = (value, reg_type)
+                    index += 1
+        except FileNotFoundError:
+            pass
+        return found
+
+
+class _WinRegKey:
+    def __init__(self, winreg, root, subkey):
+        self.winreg = winreg
+        self.readable = True
+        try:
+            self.handle = self._open(root, subkey, winreg.KEY_QUERY_VALUE | winreg.KEY_SET_VALUE)
+        except PermissionError:
+            # Write-only access avoids Access Denied on HKLM keys where full control is restricted;
+            # we just lose the ability to skip values that are already right
+            self.handle = self._open(root, subkey, winreg.KEY_SET_VALUE)
+            self.readable = False
+
+    def _open(self, root, subkey, access):
+        try:
+            return self.winreg.OpenKey(root, subkey, 0, access)
+        except FileNotFoundError:
+            return self.winreg.CreateKeyEx(root, subkey, 0, access)
+
+    def get(self, name):
+        if not self.readable:
+            return MISSING
+        try:
+            return self.winreg.QueryValueEx(self.handle, name)
+        except FileNotFoundError:
+            return MISSING
+
+    def set(self, name, value, reg_type):
+        self.winreg.SetValueEx(self.handle, name, 0, reg_type, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.handle.Close()
+
+
+class MemoryRegistry:
+    """In-memory registry for rehearsals. Counts opens and writes so batching can be checked."""
+
+    def __init__(self, values=None, denied=()):
+        # {(hive, subkey lower): {name: (value, type)}}
+        self.keys = defaultdict(dict)
+        for (path, name), (value, reg_type) in (values or {}).items():
+            hive, subkey = split_path(path)
+            self.keys[(hive, subkey.lower())][name] = (value, reg_type)
+        self.denied = {split_path(path)[0] + ":" + split_path(path)[1].lower() for path in denied}
+        self.opens = 0
+        self.writes = 0
+
+    def open(self, hive, subkey):
+        if f"{hive}:{subkey.lower()}" in self.denied:
+            raise PermissionError(f"{hive}:\\{subkey}")
+        self.opens += 1
+        return _MemoryKey(self, self.keys[(hive, subkey.lower())])
+
+    def query(self, hive, subkey, name):
+        return self.keys.get((hive, subkey.lower()), {}).get(name, MISSING)
+
+    def values(self, hive, subkey):
+        return dict(self.keys.get((hive, subkey.lower()), {}))
+
+
+class _MemoryKey:
+    def __init__(self, registry, values):
+        self.registry = registry
+        self.values = values
+
+    def get(self, name):
+        return self.values.get(name, MISSING)
+
+    def set(self, name, value, reg_type):
+        self.registry.writes += 1
+        self.values[name] = (value, reg_type)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+@dataclass
+class RegistryChange:
+    path: str
+    name: str
+    value: Any
+    previous: Any = MISSING
+    status: str = "pending"  # changed, unchanged or failed
+    detail: str = ""
+
+
+class RegistryTransaction:
+    """Queues writes, then opens each key once and only touches values that differ."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.pending = []
+
+    def set(self, path, name, value, reg_type=REG_DWORD):
+        self.pending.append((path, name, value, reg_type))
+        return self
+
+    def commit(self):
+        """Applies everything queued and returns one RegistryChange per write, in queue order."""
+        groups = defaultdict(list)
+        changes = []
+        for path, name, value, reg_type in self.pending:
+            change = RegistryChange(path, name, value)
+            changes.append(change)
+            hive, subkey = split_path(path)
+            groups[(hive, subkey.lower())].append((subkey, change, reg_type))
+        self.pending = []
+
+        for (hive, _), writes in groups.items():
+            try:
+                with self.backend.open(hive, writes[0][0]) as key:
+                    for _, change, reg_type in writes:
+                        current = key.get(change.name)
+                        if current is not MISSING:
+                            change.previous = current[0]
+                        if current is not MISSING and current == (change.value, reg_type):
+                            change.status = "unchanged"
+                            continue
+                        key.set(change.name, change.value, reg_type)
+                        change.status = "changed"
+            except PermissionError:
+                self._fail(writes, "Access Denied (Run as Admin)")
+            except Exception as e:
+                self._fail(writes, str(e))
+        return changes
+
+    @staticmethod
+    def _fail(writes, detail):
+        for _, change, _ in writes:
+            if change.status == "pending":
+                change.status = "failed"
+                change.detail = detail
@@ -0,0 +1,311 @@
+"""A fake Windows machine to rehearse the ritual on: sandbox folders, a lagged registry, winget, npm and PowerShell stand-ins."""
+import io
+import os
+import queue
+import random
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+
+from Fonts import FONT_KEYS
+from PathManager import MACHINE_ENVIRONMENT_KEY
+from Registry import REG_EXPAND_SZ, REG_SZ, MemoryRegistry, split_path
+from Resources import SHARES_KEY, TASKBAR_LAYOUT
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    """Seconds each fake operation takes. Scaled down from the real thing, but in proportion."""
+    winget_list: float = 0.30
+    winget_install: float = 0.20
+    npm_install: float = 0.15
+    download: float = 0.10
+    powershell_start: float = 0.25  # first script on each host
+    powershell_call: float = 0.02
+    registry_op: float = 0.0005
+    install_failure: float = 0.0    # chance that any one install fails
+
+
+PROFILES = {
+    "nominal": LatencyProfile(),
+    "slow-winget": LatencyProfile(winget_list=1.2, winget_install=0.8),
+    "slow-powershell": LatencyProfile(powershell_start=1.0, powershell_call=0.08),
+    "flaky": LatencyProfile(install_failure=0.3),
+}
+
+# Stand-in font archives: family -> files inside
+FONT_FILES = {
+    "Nunito": ["Nunito-Regular.ttf", "Nunito-Bold.ttf"],
+    "Fira Code": ["FiraCode-Regular.ttf", "FiraCode-Bold.ttf"],
+}
+
+
+class FakeMachine:
+    """A sandbox folder plus the state the fake tools read and change: packages, npm globals, fonts, shares."""
+
+    def __init__(self, profile, seed=0):
+        self.profile = profile
+        self.root = Path(tempfile.mkdtemp(prefix="incantation-bench"))
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.packages = set()
+        self.calls = {"winget": 0, "npm": 0, "powershell": 0, "download": 0}
+
+        self.local = self.root / "Local"
+        self.bin = self.root / "bin"
+        self.node = self.root / "nodejs" / "bin"  # only there once Node.js is installed
+        self.data = self.root / "Data"
+        self.drive = self.root / "R"
+        self.npm_root = self.root / "nodejs" / "lib" / "node_modules"  # npm's prefix is the folder above bin/node
+        for folder in (self.local, self.root / "Roaming", self.root / "home", self.bin):
+            folder.mkdir(parents=True, exist_ok=True)
+        self.stub(self.bin, "winget")
+        # The folders on the machine's PATH, as a process started now would see it
+        self.path = [self.bin]
+
+        self.registry = LaggedRegistry(MemoryRegistry({
+            (MACHINE_ENVIRONMENT_KEY, "Path"): (str(self.bin), REG_EXPAND_SZ),
+            (r"HKCU:\Environment", "Path"): ("/usr/bin;/usr/bin/", REG_EXPAND_SZ),
+        }), profile.registry_op)
+
+    @property
+    def env(self):
+        return {
+            "LOCALAPPDATA": str(self.local),
+            "APPDATA": str(self.root / "Roaming"),
+            "USERPROFILE": str(self.root / "home"),
+            "HOME": str(self.root / "home"),
+            "ProgramFiles": str(self.root / "Program Files"),
+            "USERNAME": "bench",
+            "PATH": os.pathsep.join([*map(str, self.path), os.environ.get("PATH", "")]),
+        }
+
+    @staticmethod
+    def stub(folder, tool):
+        # Only its presence on PATH matters: shutil.which() has to find it
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / tool).write_text("#!/bin/sh\n", encoding="utf-8")
+        (folder / tool).chmod(0o755)
+
+    def which(self, tool):
+        with self.lock:
+            folders = list(self.path)
+        return next((str(folder / tool) for folder in folders if (folder / tool).exists()), None)
+
+    def install_node(self):
+        """What Node's installer does: node and npm in its own folder, and that folder on the machine PATH."""
+        for tool in ("node", "npm"):
+            self.stub(self.node, tool)
+        with self.lock:
+            if self.node in self.path:
+                return
+            self.path.append(self.node)
+            key = self.registry.registry.keys[split_key(MACHINE_ENVIRONMENT_KEY)]
+            key["Path"] = (f"{key['Path'][0]};{self.node}", REG_EXPAND_SZ)
+
+    def provision(self, incantator):
+        """Everything the ritual would have done, done already."""
+        self.packages = {pkg.pkg_id for pkg in incantator.softwares}
+        self.install_node()
+        self.install_npm("@google/gemini-cli")
+        self.data.mkdir(exist_ok=True)
+        self.drive.mkdir(exist_ok=True)
+        self.write_layout()
+        backend = self.registry.registry
+        backend.keys[split_key(SHARES_KEY)]["Data$"] = ("Path=" + str(self.data), REG_SZ)
+        for family, files in FONT_FILES.items():
+            self.register_fonts(files, family)
+        explorer = split_key(r"HKCU:\Software\Microsoft\Windows\CurrentVersion\Explorer\Advanced")
+        personalize = split_key(r"HKCU:\Software\Microsoft\Windows\CurrentVersion\Themes\Personalize")
+        backend.keys[explorer].update({"ShowTaskViewButton": (0, 4), "Hidden": (1, 4), "HideFileExt": (0, 4), "HideIcons": (1, 4)})
+        backend.keys[personalize].update({"AppsUseLightTheme": (0, 4), "SystemUsesLightTheme": (0, 4)})
+        backend.keys[split_key(r"HKLM:\SOFTWARE\Microsoft\Windows\CurrentVersion\Policies\System")]["EnableLinkedConnections"] = (1, 4)
+        backend.keys[split_key(r"HKCU:\Environment")]["Path"] = (r"G:\My Drive\Data\Resonance\Spells", REG_EXPAND_SZ)
+
+    def install_npm(self, package):
+        folder = self.npm_root.joinpath(*package.split("/"))
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / "package.json").write_text(f'{{"name": "{package}", "version": "1.0.0"}}', encoding="utf-8")
+
+    def write_layout(self):
+        layout = self.local / "Microsoft" / "Windows" / "Shell" / "LayoutModification.xml"
+        layout.parent.mkdir(parents=True, exist_ok=True)
+        layout.write_text(TASKBAR_LAYOUT, encoding="utf-8")
+
+    def register_fonts(self, files, family=""):
+        # The value names carry the family, which is what a never-fetched font is looked up by
+        key = self.registry.registry.keys[split_key(FONT_KEYS[1])]
+        for name in files:
+            key[f"{family} {Path(name).stem} (TrueType)".strip()] = (name, REG_SZ)
+
+    def flaky(self):
+        with self.lock:
+            return self.random.random() < self.profile.install_failure
+
+    def count(self, tool):
+        with self.lock:
+            self.calls[tool] += 1
+
+    def cleanup(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def split_key(path):
+    hive, subkey = split_path(path)
+    return hive, subkey.lower()
+
+
+class LaggedRegistry:
+    """A registry backend where every open, read and write costs `delay` seconds."""
+
+    def __init__(self, registry, delay):
+        self.registry = registry
+        self.delay = delay
+        self.ops = 0
+
+    def _lag(self):
+        self.ops += 1
+        time.sleep(self.delay)
+
+    def open(self, hive, subkey):
+        self._lag()
+        return _LaggedKey(self.registry.open(hive, subkey), self)
+
+    def query(self, hive, subkey, name):
+        self._lag()
+        return self.registry.query(hive, subkey, name)
+
+    def values(self, hive, subkey):
+        self._lag()
+        return self.registry.values(hive, subkey)
+
+
+class _LaggedKey:
+    def __init__(self, key, lagged):
+        self.key = key
+        self.lagged = lagged
+
+    def get(self, name):
+        self.lagged._lag()
+        return self.key.get(name)
+
+    def set(self, name, value, reg_type):
+        self.lagged._lag()
+        return self.key.set(name, value, reg_type)
+
+    def __enter__(self):
+        self.key.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self.key.__exit__(*exc)
+
+
+class FakeRunner:
+    """winget and npm as far as the ritual can tell: a table to list, installs that take a while (and sometimes fail)."""
+
+    def __init__(self, machine):
+        self.machine = machine
+
+    def run(self, argv, timeout=None):
+        tool, args = os.path.basename(str(argv[0])), [str(arg) for arg in argv[1:]]
+        profile = self.machine.profile
+        if tool == "winget" and args[:1] == ["list"]:
+            self.machine.count("winget")
+            time.sleep(profile.winget_list)
+            return self._done(argv, 0, self.winget_table())
+        if tool == "winget" and args[:1] == ["install"]:
+            self.machine.count("winget")
+            time.sleep(profile.winget_install)
+            if self.machine.flaky():
+                return self._done(argv, 1603, "", "Installer failed with exit code: 1603")
+            pkg_id = args[args.index("--id") + 1]
+            if pkg_id == "OpenJS.NodeJS":
+                self.machine.install_node()
+            with self.machine.lock:
+                self.machine.packages.add(pkg_id)
+            return self._done(argv, 0, "Successfully installed")
+        if tool == "npm" and args[:2] == ["install", "-g"]:
+            self.machine.count("npm")
+            time.sleep(profile.npm_install)
+            if self.machine.flaky():
+                return self._done(argv, 1, "", "npm ERR! network socket hang up")
+            self.machine.install_npm(args[2])
+            return self._done(argv, 0, "added 1 package")
+        return self._done(argv, 1, "", f"the fake machine does not know {tool} {' '.join(args)}")
+
+    def winget_table(self):
+        rows = ["Name                          Id                                      Version     Source",
+                "-" * 86]
+        with self.machine.lock:
+            packages = sorted(self.machine.packages)
+        rows += [f"{pkg_id.split('.')[-1]:<30}{pkg_id:<40}{'1.0.0':<12}winget" for pkg_id in packages]
+        return "\n".join(rows) + "\n"
+
+    @staticmethod
+    def _done(argv, returncode, stdout="", stderr=""):
+        return subprocess.CompletedProcess(argv, returncode, stdout, stderr)
+
+
+class FakePowerShell:
+    """A pool of PowerShell hosts that pay their start-up once, then understand the few scripts the ritual sends."""
+
+    def __init__(self, machine, hosts=2):
+        self.machine = machine
+        self.idle = queue.Queue()
+        for _ in range(hosts):
+            self.idle.put({"warm": False})
+
+    def run(self, script, timeout=None):
+        host = self.idle.get()
+        try:
+            if not host["warm"]:
+                time.sleep(self.machine.profile.powershell_start)
+                host["warm"] = True
+            time.sleep(self.machine.profile.powershell_call)
+            self.machine.count("powershell")
+            self.perform(script)
+            return subprocess.CompletedProcess(script, 0, "", "")
+        finally:
+            self.idle.put(host)
+
+    def perform(self, script):
+        machine = self.machine
+        if "New-SmbShare" in script:
+            machine.registry.registry.keys[split_key(SHARES_KEY)]["Data$"] = ("Path=" + str(machine.data), REG_SZ)
+        mapping = re.search(r"New-SmbMapping -LocalPath (\S+)", script)
+        if mapping:
+            Path(mapping.group(1)).mkdir(exist_ok=True)
+        if "LayoutModification.xml" in script:
+            machine.write_layout()
+        staging = re.search(r"Get-ChildItem '([^']+)'", script)
+        if staging and "Shell.Application" in script:
+            machine.register_fonts(entry.name for entry in Path(staging.group(1)).iterdir())
+
+    def close(self):
+        pass
+
+
+class _Download(io.BytesIO):
+    status = 200
+
+
+def fake_opener(machine):
+    """Stands in for urlopen: a small zip holding the family's font files."""
+    def urlopen(request, timeout=None):
+        machine.count("download")
+        time.sleep(machine.profile.download)
+        url = request.full_url.lower()
+        family = next((name for name in FONT_FILES if name.lower().replace(" ", "") in url.replace("_", "")), "Nunito")
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as zf:
+            for name in FONT_FILES[family]:
+                zf.writestr(f"{family}/{name}", b"glyphs")
+        return _Download(buffer.getvalue())
+    return urlopen
@@ -0,0 +1,300 @@
+"""The concrete things the Incantation wants to be true, each with a check() and an apply()."""
+import filecmp
+import os
+import shutil
+from pathlib import Path
+
+from Fonts import FONT_KEYS
+from Installer import InstallScheduler
+from Plan import Resource
+from Registry import MISSING, REG_DWORD, REG_SZ, RegistryTransaction, read_value, split_path
+from Streaming import run_lines
+
+SHARES_KEY = r"HKLM:\SYSTEM\CurrentControlSet\Services\LanmanServer\Shares"
+DESKTOP_KEY = r"HKCU:\Control Panel\Desktop"
+
+TASKBAR_LAYOUT = """<?xml version="1.0" encoding="utf-8"?>
+<LayoutModificationTemplate
+    xmlns="http://schemas.microsoft.com/Start/2014/LayoutModification"
+    xmlns:defaultlayout="http://schemas.microsoft.com/Start/2014/FullDefaultLayout"
+    xmlns:start="http://schemas.microsoft.com/Start/2014/StartLayout"
+    xmlns:taskbar="http://schemas.microsoft.com/Start/2014/TaskbarLayout"
+    Version="1">
+  <CustomTaskbarLayoutCollection PinListPlacement="Replace">
+    <defaultlayout:TaskbarLayout>
+      <taskbar:TaskbarPinList>
+        <taskbar:UWA AppUserModelID="Microsoft.WindowsTerminal_8wekyb3d8bbwe!App" />
+      </taskbar:TaskbarPinList>
+    </defaultlayout:TaskbarLayout>
+  </CustomTaskbarLayoutCollection>
+</LayoutModificationTemplate>"""
+
+
+def run_ps(powershell, script):
+    """Runs a script on the shared host, raising with its stderr on failure."""
+    result = powershell.run(script)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"exit {result.returncode}")
+    return result.stdout
+
+
+class FontResource(Resource):
+    step = "fonts"
+
+    def __init__(self, source, pipeline, registry):
+        super().__init__(source.name)
+        self.source = source
+        self.pipeline = pipeline
+        self.registry = registry
+
+    def check(self):
+        missing = self.pipeline.missing(self.source)
+        if missing is None:
+            # Never fetched, so its file names are unknown: look for the family among registered fonts
+            key = self.name.lower()
+            for path in FONT_KEYS:
+                if any(key in value.lower() for value in self.registry.values(*split_path(path))):
+                    return None
+            return "glyph not inscribed"
+        return f"{len(missing)} glyph file(s) not inscribed" if missing else None
+
+    def apply(self):
+        result, = self.pipeline.run([self.source])
+        if result.error:
+            raise RuntimeError(result.error)
+
+
+class SmbShareResource(Resource):
+    step = "share"
+
+    def __init__(self, name, path, user, registry, powershell):
+        super().__init__(name)
+        self.path = Path(path)
+        self.user = user
+        self.registry = registry
+        self.powershell = powershell
+
+    def check(self):
+        if not self.path.exists():
+            return f"{self.path} missing"
+        # LanmanServer lists every share as a value; cheaper than asking Get-SmbShare
+        shares = {name.lower() for name in self.registry.values(*split_path(SHARES_KEY))}
+        if self.name.lower() not in shares:
+            return f"{self.name} not shared"
+        return None
+
+    def apply(self):
+        self.path.mkdir(exist_ok=True)
+        run_ps(self.powershell, f"New-SmbShare -Name '{self.name}' -Path '{self.path}' -FullAccess '{self.user}' -Description 'Data Repository' -ErrorAction SilentlyContinue")
+
+
+class DriveMappingResource(Resource):
+    step = "drive"
+
+    def __init__(self, letter, share, label, powershell):
+        super().__init__(letter)
+        self.share = share
+        self.label = label
+        self.powershell = powershell
+
+    def check(self):
+        return None if Path(self.name).exists() else "gateway closed"
+
+    def apply(self):
+        run_ps(self.powershell, f"""
+        New-SmbMapping -LocalPath {self.name} -RemotePath "\\\\localhost\\{self.share}" -Persistent $true
+        $RegPath = "HKCU:\\Software\\Microsoft\\Windows\\CurrentVersion\\Explorer\\MountPoints2\\##localhost#{self.share}"
+        if (-not (Test-Path $RegPath)) {{ New-Item -Path $RegPath -Force | Out-Null }}
+        Set-ItemProperty -Path $RegPath -Name "_LabelFromReg" -Value "{self.label}"
+        """)
+
+
+class PackageResource(Resource):
+    step = "software"
+
+    def __init__(self, package, inventory, runner, probes=None):
+        super().__init__(package.name)
+        self.package = package
+        self.inventory = inventory
+        self.runner = runner
+        self.probes = probes
+
+    def check(self):
+        # A file on disk settles it; only packages without one cost a (cached) `winget list`
+        if self.probes and self.probes.package(self.package).found:
+            return None
+        return None if self.inventory.load().is_installed(self.package.pkg_id) else "not installed"
+
+    def apply(self):
+        outcome, = self.install_all([self])
+        if not outcome.ok:
+            raise RuntimeError(outcome.detail or f"winget exit {outcome.returncode}")
+
+    @staticmethod
+    def install_all(resources, max_workers=1, timeout=None, on_event=None):
+        """Installs many packages side by side (see InstallScheduler) and returns their outcomes in order.
+
+        The machine changed under the inventory and the probes, so both forget what they knew.
+        """
+        resources = list(resources)
+        if not resources:
+            return []
+        scheduler = InstallScheduler(resources[0].runner, max_workers=max_workers, timeout=timeout, on_event=on_event)
+        outcomes = scheduler.run([resource.package for resource in resources])
+        for resource in resources:
+            resource.inventory.invalidate()
+            if resource.probes:
+                resource.probes.forget_package(resource.package)
+        return outcomes
+
+
+class RegistryValueResource(Resource):
+    def __init__(self, step, path, name, value, registry, reg_type=REG_DWORD):
+        super().__init__(name)
+        self.step = step
+        self.path = path
+        self.value = value
+        self.reg_type = reg_type
+        self.registry = registry
+
+    @property
+    def setting(self):
+        return (self.path, self.name, self.value, self.reg_type)
+
+    def check(self):
+        current = read_value(self.registry, self.path, self.name)
+        if current == self.value:
+            return None
+        return f"{'unset' if current is MISSING else current} -> {self.value}"
+
+    def apply(self):
+        change, = RegistryTransaction(self.registry).set(*self.setting).commit()
+        if change.status == "failed":
+            raise RuntimeError(change.detail)
+
+
+class WallpaperResource(Resource):
+    step = "settings"
+
+    def __init__(self, source, dest, registry, effects):
+        super().__init__("Wallpaper")
+        self.source = Path(source)
+        self.dest = Path(dest)
+        self.registry = registry
+        self.effects = effects
+
+    def check(self):
+        if not self.dest.exists() or not filecmp.cmp(self.source, self.dest, shallow=False):
+            return "artifact not copied"
+        if str(read_value(self.registry, DESKTOP_KEY, "WallPaper")).lower() != str(self.dest).lower():
+            return "reality not rewritten"
+        return None
+
+    def apply(self):
+        shutil.copy(self.source, self.dest)
+        change, = RegistryTransaction(self.registry).set(DESKTOP_KEY, "WallPaper", str(self.dest), REG_SZ).commit()
+        if change.status == "failed":
+            raise RuntimeError(change.detail)
+        # The desktop only repaints when told; that happens once, at the end of the ritual
+        self.effects.request("wallpaper", "new background")
+
+
+class NpmGlobalResource(Resource):
+    step = "gemini"
+
+    def __init__(self, package, runner, probes=None, which=shutil.which, on_progress=None):
+        super().__init__(package)
+        self.runner = runner
+        self.probes = probes
+        self.which = which
+        # on_progress(ProgressUpdate) while npm works, for whoever is showing a spinner
+        self.on_progress = on_progress
+
+    def _npm(self):
+        # Resolve npm.cmd ourselves so no shell is needed
+        npm = self.which("npm")
+        if npm is None:
+            raise RuntimeError("npm not found")
+        return npm
+
+    def check(self):
+        if self.probes is None:
+            # No files to read on that machine: ask npm itself
+            check = self.runner.run([self._npm(), "list", "-g", self.name])
+            return None if self.name in check.stdout else "not installed"
+        # Reads the package.json under npm's global prefix; `npm list -g` would walk every global module
+        if self.probes.npm_global(self.name).found:
+            return None
+        return "not installed" if self.probes.npm_root() else "not installed (no npm prefix yet)"
+
+    def apply(self):
+        # At the http log level npm names each fetch, which is the only progress it reports through a pipe
+        install = run_lines(self.runner, [self._npm(), "install", "-g", self.name, "--loglevel=http"], on_progress=self.on_progress)
+        if self.probes:
+            self.probes.forget_npm(self.name)
+        if install.returncode != 0:
+            raise RuntimeError(install.stderr.strip() or f"npm exit {install.returncode}")
+
+
+class PathResource(Resource):
+    step = "path"
+
+    def __init__(self, manager, effects):
+        super().__init__("PATH")
+        self.manager = manager
+        self.effects = effects
+
+    def check(self):
+        plan = self.manager.plan()
+        return plan.summary() if plan.changed else None
+
+    def apply(self):
+        if self.manager.apply().changed:
+            self.effects.request("environment", "PATH rewoven")
+
+
+class TaskbarResource(Resource):
+    step = "taskbar"
+
+    def __init__(self, powershell, effects, layout_path=None):
+        super().__init__("Taskbar")
+        self.powershell = powershell
+        self.effects = effects
+        self.layout_path = Path(layout_path or Path(os.environ.get("LOCALAPPDATA", "")) / "Microsoft" / "Windows" / "Shell" / "LayoutModification.xml")
+
+    def check(self):
+        try:
+            current = self.layout_path.read_text(encoding="utf-8-sig")
+        except OSError:
+            return "no anchor forged"
+        return None if current.strip() == TASKBAR_LAYOUT.strip() else "foreign anchors"
+
+    def apply(self):
+        run_ps(self.powershell, r"""
+            $ErrorActionPreference = 'SilentlyContinue'
+
+            # Path to LayoutModification.xml
+            $LayoutPath = "$env:LOCALAPPDATA\Microsoft\Windows\Shell\LayoutModification.xml"
+
+            # Define the XML content for replacing taskbar pins with Windows Terminal
+            $XmlContent = @'
+""" + TASKBAR_LAYOUT + r"""
+'@
+
+            # Backup existing layout if it exists
+            if (Test-Path $LayoutPath) {
+                Copy-Item $LayoutPath "$LayoutPath.bak" -Force
+            }
+
+            # Write the new XML
+            Set-Content -Path $LayoutPath -Value $XmlContent -Encoding UTF8
+
+            # Clear existing pins and registry state to force a reload
+            $TaskbarPath = "$env:APPDATA\Microsoft\Internet Explorer\Quick Launch\User Pinned\TaskBar"
+            if (Test-Path $TaskbarPath) {
+                Remove-Item "$TaskbarPath\*" -Force
+            }
+            Remove-ItemProperty -Path "HKCU:\Software\Microsoft\Windows\CurrentVersion\Explorer\Taskband" -Name "*"
+            """)
+        # Explorer only reads the new layout on start; the restart is shared with every other sigil at the end
+        self.effects.request("explorer", "taskbar layout")
@@ -0,0 +1,191 @@
+"""End-to-end benchmark of the whole ritual against a fake machine: no Windows, no network, configurable slowness."""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+import Incantation
+from Cache import atomic_write_json, cache_dir, read_json
+from Journal import RunJournal
+from Rehearsal import PROFILES, FakeMachine, FakePowerShell, FakeRunner, fake_opener
+from Tracing import Tracer
+
+SCENARIOS = ("fresh", "provisioned")
+REGRESSION_FLOOR = 0.005  # differences under 5 ms are noise, whatever the percentage
+
+
+@contextmanager
+def sandboxed(env):
+    """Points the ritual's per-user folders (and PATH) at the sandbox for the length of one run."""
+    saved = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def quiet_console():
+    """Swaps the ritual's console for one that writes nowhere; returns a function putting it back."""
+    real = Incantation.console.console
+    Incantation.console.console = Console(file=io.StringIO(), theme=Incantation.custom_theme, width=120)
+
+    def restore():
+        Incantation.console.console = real
+    return restore
+
+
+def build(machine, answers=None, journal=None):
+    """An Incantator wired to the fake machine, answering yes to everything unless told otherwise."""
+    tracer = Tracer(enabled=True)
+    inc = Incantation.Incantator(runner=FakeRunner(machine), powershell=FakePowerShell(machine), registry=machine.registry,
+                                 headless=True, answers=answers or {step: True for step in Incantation.STEPS}, tracer=tracer,
+                                 journal=journal or RunJournal(machine.root / "journal.json").load(fresh=True))
+    # Keep the share and drive inside the sandbox
+    inc.data_path = machine.data
+    inc.drive_letter = str(machine.drive)
+    inc.fonts.cache.opener = fake_opener(machine)
+    inc.resources = inc.build_resources()
+    # Window messages have no fake to go to; Explorer's restart still goes through the fake PowerShell
+    inc.effects.define("environment", "Broadcast the new environment", lambda: None, order=10)
+    inc.effects.define("wallpaper", "Repaint the wallpaper", lambda: None, order=20)
+    return inc, tracer
+
+
+def run_once(scenario, profile, seed=0):
+    """One full ritual (survey, council, every step) on a fresh fake machine; returns its timings."""
+    machine = FakeMachine(profile, seed=seed)
+    try:
+        with sandboxed(machine.env):
+            inc, tracer = build(machine)
+            if scenario == "provisioned":
+                machine.provision(inc)
+                # A provisioned machine had Node.js on PATH before the ritual started
+                os.environ["PATH"] = machine.env["PATH"]
+            start = time.perf_counter()
+            drifts = inc.survey()
+            inc.gather_consent()
+            inc.perform()
+            total = time.perf_counter() - start
+            inc.powershell.close()
+    finally:
+        machine.cleanup()
+
+    names = {method: step for step, (*_, method) in Incantation.RITES.items()}
+    names["survey"] = "survey"
+    steps = {names[span.name]: span.duration for span in tracer.spans if span.category == "step" and span.name in names}
+    return {
+        "total": total,
+        "steps": steps,
+        "drifts": len(drifts),
+        "failed": sorted(step for step, outcome in inc.outcomes.items() if outcome == "failed"),
+        "calls": dict(machine.calls, registry=machine.registry.ops),
+    }
+
+
+def summarize(runs):
+    """Medians across runs: {"total": s, "steps": {step: s}, "calls": {...}} plus the spread of the total."""
+    steps = sorted({step for run in runs for step in run["steps"]})
+    return {
+        "total": statistics.median(run["total"] for run in runs),
+        "best": min(run["total"] for run in runs),
+        "steps": {step: statistics.median(run["steps"].get(step, 0.0) for run in runs) for step in steps},
+        "calls": {tool: statistics.median(run["calls"][tool] for run in runs) for tool in runs[0]["calls"]},
+        "drifts": runs[0]["drifts"],
+        "failures": sum(bool(run["failed"]) for run in runs),
+    }
+
+
+def regressions(summary, baseline, threshold):
+    """[(what, now, before)] for the total and every step slower than the baseline by more than `threshold`."""
+    if not baseline:
+        return []
+    slower = []
+    pairs = [("total", summary["total"], baseline.get("total"))]
+    pairs += [(step, seconds, baseline.get("steps", {}).get(step)) for step, seconds in summary["steps"].items()]
+    for what, now, before in pairs:
+        if before is not None and now > before * (1 + threshold) and now - before > REGRESSION_FLOOR:
+            slower.append((what, now, before))
+    return slower
+
+
+def report(console, key, summary, baseline, threshold):
+    table = Table(title=f"[arcane]{key}[/arcane]", header_style="bold magenta", box=None)
+    table.add_column("Step")
+    table.add_column("Median", justify="right")
+    table.add_column("Baseline", justify="right")
+    table.add_column("Change", justify="right")
+    flagged = {what for what, _, _ in regressions(summary, baseline, threshold)}
+    rows = [*summary["steps"].items(), ("total", summary["total"])]
+    for what, seconds in rows:
+        before = (baseline or {}).get("total") if what == "total" else (baseline or {}).get("steps", {}).get(what)
+        change = "" if not before else f"{(seconds - before) / before:+.0%}"
+        style = "error" if what in flagged else "dim" if what != "total" else "success"
+        table.add_row(what, f"{seconds * 1000:.0f} ms", "" if before is None else f"{before * 1000:.0f} ms",
+                      f"[{style}]{change}[/{style}]" if change else "")
+    console.print(table)
+    calls = ", ".join(f"{tool} {count:g}" for tool, count in summary["calls"].items())
+    console.print(f"[dim]  . best {summary['best'] * 1000:.0f} ms; {summary['drifts']} drift(s); calls: {calls}[/dim]")
+    if summary["failures"]:
+        console.print(f"[warning]  ! {summary['failures']} run(s) had failing steps.[/warning]")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the whole ritual against a fake machine and compare with a baseline.")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per scenario; medians are compared.")
+    parser.add_argument("--profile", action="append", choices=sorted(PROFILES),
+                        help="Latency profile (repeatable). Default: nominal.")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="fresh or provisioned (repeatable). Default: both.")
+    parser.add_argument("--baseline", metavar="FILE", help="Baseline file (default: in the Resonance cache folder).")
+    parser.add_argument("--save-baseline", action="store_true", help="Record these results as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Slowdown that counts as a regression (0.15 = 15%%).")
+    args = parser.parse_args(argv)
+
+    console = Console(theme=Incantation.custom_theme)
+    # Resolved before any sandbox moves LOCALAPPDATA
+    baseline_path = Path(args.baseline) if args.baseline else cache_dir() / "incantation-benchmark.json"
+    baselines = read_json(baseline_path, {})
+    results = {}
+    regressed = []
+
+    console.rule("[arcane]~~~ THE RITUAL, TIMED ~~~[/arcane]")
+    for profile_name in args.profile or ["nominal"]:
+        for scenario in args.scenario or SCENARIOS:
+            key = f"{scenario}/{profile_name}"
+            restore = quiet_console()
+            try:
+                runs = [run_once(scenario, PROFILES[profile_name], seed=n) for n in range(args.runs)]
+            finally:
+                restore()
+            results[key] = summarize(runs)
+            report(console, key, results[key], baselines.get(key), args.threshold)
+            regressed += [(key, *row) for row in regressions(results[key], baselines.get(key), args.threshold)]
+
+    if args.save_baseline:
+        baselines.update(results)
+        atomic_write_json(baseline_path, baselines)
+        console.print(f"[success]  + Baseline saved to {baseline_path}.[/success]")
+    elif regressed:
+        for key, what, now, before in regressed:
+            console.print(f"[error]  ! {key} {what}: {before * 1000:.0f} ms -> {now * 1000:.0f} ms[/error]")
+        return 1
+    elif not any(baselines.get(key) for key in results):
+        console.print("[dim]  . No baseline yet; run again with --save-baseline to record one.[/dim]")
+    else:
+        console.print("[success]  + No step slowed down beyond the threshold.[/success]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
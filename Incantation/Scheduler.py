@@ -0,0 +1,122 @@
+"""Runs the ritual's steps as a graph: each step waits for the steps it needs, and steps sharing a lane never overlap."""
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+# How many steps may hold each lane at once. Lanes not listed here are serialized.
+LANES = {
+    "network": 4,   # downloads and installers: slow, and mostly waiting on someone else
+    "registry": 1,  # one writer at a time keeps read-modify-write values (PATH) safe
+    "explorer": 1,  # anything that restarts or repaints Explorer
+}
+
+
+@dataclass(frozen=True)
+class StepSpec:
+    name: str
+    run: object           # called with no arguments; raising marks the step failed
+    needs: tuple = ()     # steps that must finish first
+    lanes: tuple = ()     # lanes held for the whole run
+
+
+@dataclass
+class StepResult:
+    name: str
+    status: str           # done, failed or blocked (a step it needs failed)
+    error: str = ""
+    duration: float = 0.0
+
+
+class StepScheduler:
+    """Starts every step whose needs are met and whose lanes have room, in declaration order."""
+
+    def __init__(self, steps, lanes=None, max_workers=4, on_event=None, on_abort=None):
+        self.steps = list(steps)
+        self.lanes = dict(LANES if lanes is None else lanes)
+        self.max_workers = max(1, max_workers)
+        # on_event(name, state) with state in: waiting, running, done, failed, blocked
+        self.on_event = on_event or (lambda name, state: None)
+        # Called when the run is interrupted, before waiting on the steps still running, so they can be cut short
+        self.on_abort = on_abort or (lambda: None)
+        self._check()
+
+    def _check(self):
+        names = [step.name for step in self.steps]
+        if len(set(names)) != len(names):
+            raise ValueError("step names must be unique")
+        for step in self.steps:
+            unknown = set(step.needs) - set(names)
+            if unknown:
+                raise ValueError(f"{step.name} needs unknown steps: {', '.join(sorted(unknown))}")
+        # Kahn's algorithm: anything never freed sits on a cycle
+        needs = {step.name: set(step.needs) for step in self.steps}
+        ready = [name for name, deps in needs.items() if not deps]
+        while ready:
+            done = ready.pop()
+            del needs[done]
+            for name, deps in needs.items():
+                if done in deps:
+                    deps.discard(done)
+                    if not deps:
+                        ready.append(name)
+        if needs:
+            raise ValueError(f"steps depend on each other in a cycle: {', '.join(needs)}")
+
+    def _run(self, step):
+        self.on_event(step.name, "running")
+        start = time.perf_counter()
+        try:
+            step.run()
+            result = StepResult(step.name, "done", duration=time.perf_counter() - start)
+        except Exception as e:
+            result = StepResult(step.name, "failed", str(e) or type(e).__name__, time.perf_counter() - start)
+        self.on_event(step.name, result.status)
+        return result
+
+    def run(self):
+        """Runs everything and returns the results in declaration order."""
+        for step in self.steps:
+            self.on_event(step.name, "waiting")
+
+        results = {}
+        pending = list(self.steps)
+        running = {}
+        busy = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            try:
+                self._loop(pool, pending, running, busy, results)
+            except BaseException:
+                # Leaving the with block waits on every running step; tell them to stop first
+                self.on_abort()
+                raise
+
+        return [results[step.name] for step in self.steps]
+
+    def _loop(self, pool, pending, running, busy, results):
+        while pending or running:
+            for step in list(pending):
+                if any(results.get(name) and results[name].status != "done" for name in step.needs):
+                    pending.remove(step)
+                    results[step.name] = StepResult(step.name, "blocked", "a step it needs did not finish")
+                    self.on_event(step.name, "blocked")
+                    continue
+                if len(running) >= self.max_workers:
+                    continue
+                if not all(name in results for name in step.needs):
+                    continue
+                if any(busy.get(lane, 0) >= self.lanes.get(lane, 1) for lane in step.lanes):
+                    continue
+                pending.remove(step)
+                for lane in step.lanes:
+                    busy[lane] = busy.get(lane, 0) + 1
+                running[pool.submit(self._run, step)] = step
+
+            if not running:
+                continue  # only blocked steps were left; the loop above settled them
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                for lane in step.lanes:
+                    busy[lane] -= 1
+                results[step.name] = future.result()
@@ -0,0 +1,203 @@
+"""Processes read as they run: output line by line, progress as it is drawn, only a short tail kept for error reports."""
+import asyncio
+import os
+import re
+import subprocess
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+CHUNK = 4096
+TAIL_LINES = 200
+UNITS = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+
+class ProcessCancelled(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class ProgressUpdate:
+    stage: str
+    fraction: float = None  # 0..1 when the tool says how far along it is
+
+    @property
+    def label(self):
+        return f"{self.stage} {self.fraction:.0%}" if self.fraction is not None else self.stage
+
+
+class WingetProgress:
+    """Reads winget's redrawn bars ("██▒▒ 12.0 MB / 48.5 MB", "██▒▒ 40%") and the lines between its phases."""
+
+    STAGES = (
+        ("Downloading", "downloading"),
+        ("Successfully verified installer hash", "verified"),
+        ("Starting package install", "installing"),
+        ("Successfully installed", "installed"),
+    )
+    SIZE = re.compile(r"([\d.]+)\s*(B|KB|MB|GB)\s*/\s*([\d.]+)\s*(B|KB|MB|GB)")
+    PERCENT = re.compile(r"(\d{1,3})\s*%")
+
+    def __init__(self):
+        self.stage = "preparing"
+
+    def feed(self, line):
+        for prefix, stage in self.STAGES:
+            if line.lstrip().startswith(prefix):
+                self.stage = stage
+                return ProgressUpdate(stage)
+        size = self.SIZE.search(line)
+        if size:
+            done, total = float(size.group(1)) * UNITS[size.group(2)], float(size.group(3)) * UNITS[size.group(4)]
+            if total:
+                return ProgressUpdate(self.stage, min(done / total, 1.0))
+        percent = self.PERCENT.search(line)
+        if percent:
+            return ProgressUpdate(self.stage, min(int(percent.group(1)), 100) / 100)
+        return None
+
+
+class NpmProgress:
+    """npm draws no bar when piped; with --loglevel=http it names each fetch, then sums up what it added."""
+
+    def __init__(self):
+        self.fetched = 0
+
+    def feed(self, line):
+        if "http fetch" in line:
+            self.fetched += 1
+            return ProgressUpdate(f"fetching ({self.fetched})")
+        if line.startswith(("added ", "changed ", "up to date")):
+            return ProgressUpdate("linked", 1.0)
+        if "reify" in line:
+            return ProgressUpdate("unpacking")
+        return None
+
+
+class NoProgress:
+    def feed(self, line):
+        return None
+
+
+def progress_parser(argv):
+    """The progress reader for whatever tool argv starts."""
+    tool = os.path.splitext(os.path.basename(str(argv[0])))[0].lower()
+    if tool == "winget":
+        return WingetProgress()
+    if tool == "npm":
+        return NpmProgress()
+    return NoProgress()
+
+
+def _clean(raw):
+    # What finally landed on the line once the carriage-return redraws are done
+    return raw.decode("utf-8", errors="ignore").rstrip("\r").split("\r")[-1].rstrip()
+
+
+class StreamingRunner:
+    """Launches real processes and reads them while they run. Swap for a fake to rehearse the ritual off-Windows.
+
+    stdout and stderr of the result hold only the last `tail_lines` lines of each; pass on_line to see everything.
+    result.output_bytes still counts all of it, as it came off the pipes.
+    cancel() kills whatever is running (and anything started after), from any thread.
+    """
+
+    streams = True
+
+    def __init__(self, tail_lines=TAIL_LINES):
+        self.tail_lines = tail_lines
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def run(self, argv, timeout=None, on_line=None, on_progress=None):
+        # Each call gets its own loop, so the install workers can all stream at once from their threads
+        return asyncio.run(self.stream(argv, timeout, on_line, on_progress))
+
+    async def stream(self, argv, timeout=None, on_line=None, on_progress=None):
+        if self._cancelled.is_set():
+            raise ProcessCancelled(f"{os.path.basename(str(argv[0]))} was cancelled")
+        proc = await asyncio.create_subprocess_exec(*map(str, argv), stdin=subprocess.DEVNULL,
+                                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        tails = {"stdout": deque(maxlen=self.tail_lines), "stderr": deque(maxlen=self.tail_lines)}
+        sizes = {"stdout": 0, "stderr": 0}
+        parser = progress_parser(argv)
+
+        def emit(raw, name, final):
+            line = _clean(raw)
+            if final:
+                if on_line and name == "stdout":
+                    on_line(line)
+                if line.strip():
+                    tails[name].append(line)
+            update = parser.feed(line) if line.strip() else None
+            if update and on_progress:
+                on_progress(update)
+
+        async def pump(stream, name):
+            buffer = b""
+            while chunk := await stream.read(CHUNK):
+                sizes[name] += len(chunk)
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                for raw in lines:
+                    emit(raw, name, True)
+                # A trailing \r may be the first half of a \r\n split across reads: hold it until the next byte says which
+                held = b"\r" if buffer.endswith(b"\r") else b""
+                body = buffer[:-1] if held else buffer
+                if b"\r" in body:
+                    # A bar being redrawn in place: worth a progress update, not a line of its own
+                    *redraws, body = body.split(b"\r")
+                    emit(redraws[-1], name, False)
+                buffer = body + held
+            if buffer:
+                emit(buffer, name, True)
+
+        async def watch():
+            while not self._cancelled.is_set():
+                await asyncio.sleep(0.1)
+
+        work = asyncio.ensure_future(asyncio.gather(pump(proc.stdout, "stdout"), pump(proc.stderr, "stderr"), proc.wait()))
+        watcher = asyncio.ensure_future(watch())
+        try:
+            done, _ = await asyncio.wait({work, watcher}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            watcher.cancel()
+        if work not in done:
+            await self._kill(proc, work)
+            if watcher in done:
+                raise ProcessCancelled(f"{os.path.basename(str(argv[0]))} was cancelled")
+            raise subprocess.TimeoutExpired(argv, timeout, output="\n".join(tails["stdout"]), stderr="\n".join(tails["stderr"]))
+        work.result()
+        result = subprocess.CompletedProcess(argv, proc.returncode, "\n".join(tails["stdout"]), "\n".join(tails["stderr"]))
+        result.output_bytes = sizes["stdout"] + sizes["stderr"]
+        return result
+
+    @staticmethod
+    async def _kill(proc, work):
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+        # Let the readers drain what is left; a grandchild still holding the pipes is not worth waiting on
+        try:
+            await asyncio.wait_for(work, 5)
+        except Exception:
+            pass
+
+
+def run_lines(runner, argv, timeout=None, on_line=None, on_progress=None):
+    """Runs argv through any runner: streaming ones report as they go, the rest have their output replayed at the end."""
+    if getattr(runner, "streams", False):
+        return runner.run(argv, timeout=timeout, on_line=on_line, on_progress=on_progress)
+    result = runner.run(argv, timeout=timeout)
+    parser = progress_parser(argv)
+    for line in (result.stdout or "").splitlines():
+        line = line.split("\r")[-1].rstrip()
+        if on_line:
+            on_line(line)
+        update = parser.feed(line) if line.strip() else None
+        if update and on_progress:
+            on_progress(update)
+    return result
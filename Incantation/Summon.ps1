@@ -3,15 +3,23 @@
     Sets up the environment and trigger the Incatation.py script
 #>
 param (
-    [switch]$SkipDownload
+    [switch]$SkipDownload,
+    # Anything else is handed to Incantation.py (e.g. --steps fonts,software or --answers answers.json)
+    [Parameter(ValueFromRemainingArguments = $true)]
+    [string[]]$IncantationArgs
 )
 
 $ErrorActionPreference = "Stop"
 
+# Any argument for Incantation.py (--yes, --steps, --answers) means nobody is watching: no prompts, no pauses
+$Headless = [bool]$IncantationArgs
+function Invoke-Pause([int]$Seconds) { if (-not $Headless) { Start-Sleep -Seconds $Seconds } }
+function Invoke-Prompt([string]$Text) { if (-not $Headless) { Read-Host $Text | Out-Null } }
+
 trap {
     Write-Host "An error occurred:" -ForegroundColor Red
-    Write-Error $_
-    Read-Host "Press Enter to exit..."
+    Write-Error $_ -ErrorAction Continue
+    Invoke-Prompt "Press Enter to exit..."
     Exit 1
 }
 
@@ -20,18 +28,54 @@ Write-Host "~~~ PREPARING THE INCANTATION ~~~" -ForegroundColor Magenta
 # 1. Elevate (Admin Rights)
 if (-not ([Security.Principal.WindowsPrincipal][Security.Principal.WindowsIdentity]::GetCurrent()).IsInRole([Security.Principal.WindowsBuiltInRole] "Administrator")) {
     Write-Host "Focusing the energy..." -ForegroundColor Yellow
-    # Relaunch as Admin in the current directory
-    Start-Process powershell -ArgumentList "-NoProfile -ExecutionPolicy Bypass -File `"$PSCommandPath`" -SkipDownload" -Verb RunAs
-    Exit
+    # Relaunch as Admin in the current directory, handing on the arguments, and wait so its verdict becomes ours
+    $Forwarded = ($IncantationArgs | ForEach-Object { "`"$_`"" }) -join " "
+    $Elevated = Start-Process powershell -ArgumentList "-NoProfile -ExecutionPolicy Bypass -File `"$PSCommandPath`" -SkipDownload $Forwarded" -Verb RunAs -Wait -PassThru
+    Exit $Elevated.ExitCode
 }
 
 # 2. Check/Install Python
-if (-not (Get-Command python -ErrorAction SilentlyContinue)) {
+# Where winget's Python 3.12 lands, for when neither the py launcher nor PATH knows about it
+$PythonHomes = @(
+    "$env:ProgramFiles\Python312\python.exe",
+    "$env:LOCALAPPDATA\Programs\Python\Python312\python.exe"
+)
+
+# The interpreter's own path if it really is a Python 3.8 or newer, else nothing
+function Test-Python([string]$Command, [string[]]$Prefix = @()) {
+    try {
+        $Found = & $Command @Prefix -c "import sys; assert sys.version_info >= (3, 8); print(sys.executable)" 2>$null | Select-Object -Last 1
+        if ($LASTEXITCODE -eq 0 -and $Found -and (Test-Path $Found)) { return $Found }
+    } catch {}
+    return $null
+}
+
+function Find-Python {
+    # The py launcher knows every install, whatever folder or version it went to
+    if (Get-Command py -ErrorAction SilentlyContinue) {
+        $Found = Test-Python "py" @("-3")
+        if ($Found) { return $Found }
+    }
+    # Then PATH, skipping the Microsoft Store stub (WindowsApps\python.exe), which is not Python at all
+    $OnPath = Get-Command python -CommandType Application -All -ErrorAction SilentlyContinue |
+        Where-Object { $_.Source -notlike "*\WindowsApps\*" }
+    foreach ($Candidate in @($OnPath.Source) + $PythonHomes) {
+        if ($Candidate -and (Test-Path $Candidate)) {
+            $Found = Test-Python $Candidate
+            if ($Found) { return $Found }
+        }
+    }
+    return $null
+}
+
+$Python = Find-Python
+if (-not $Python) {
     Write-Host "Python is absent. Conjuring it via Winget..." -ForegroundColor Green
     winget install -e --id Python.Python.3.12 --scope machine --accept-source-agreements --accept-package-agreements
     # Refresh env vars for this session
     $env:Path = [System.Environment]::GetEnvironmentVariable("Path","Machine") + ";" + [System.Environment]::GetEnvironmentVariable("Path","User")
-    Start-Sleep -Seconds 2
+    Invoke-Pause 2
+    $Python = Find-Python
 }
 
 # 3. Install/Update uv
@@ -46,36 +90,52 @@ if (-not (Get-Command uv -ErrorAction SilentlyContinue)) {
 } else {
     uv self update
 }
-Start-Sleep -Seconds 1
+Invoke-Pause 1
 
 # 4. Create Virtual Environment
 $VenvPath = Join-Path $PSScriptRoot ".venv"
 if (-not (Test-Path $VenvPath)) {
     Write-Host "Weaving the containment field (.venv)..." -ForegroundColor Green
-    uv venv $VenvPath
+    if ($Python) {
+        # The Python found above, not whichever one uv would pick (or fetch) on its own
+        uv venv $VenvPath --python $Python
+    } else {
+        uv venv $VenvPath
+    }
 }
-Start-Sleep -Seconds 1
+Invoke-Pause 1
 
 # 5. Install Dependencies (Rich)
-Write-Host "Infusing reagents (Rich)..." -ForegroundColor Green
-# Using uv pip to install directly into the venv
-uv pip install rich requests --python "$VenvPath\Scripts\python.exe"
-Start-Sleep -Seconds 1
+# Already infused if their package folders are in the venv; no need to wake uv to find that out
+$SitePackages = Join-Path $VenvPath "Lib\site-packages"
+$Reagents = @("rich", "requests")
+if ($Reagents | Where-Object { -not (Test-Path (Join-Path $SitePackages "$_\__init__.py")) }) {
+    Write-Host "Infusing reagents (Rich)..." -ForegroundColor Green
+    # Using uv pip to install directly into the venv
+    uv pip install @Reagents --python "$VenvPath\Scripts\python.exe"
+    Invoke-Pause 1
+} else {
+    Write-Host "Reagents already infused." -ForegroundColor DarkGray
+}
 
 # 6. Execute the Grimoire (Python)
 Write-Host "Everything is ready." -ForegroundColor Green
-Start-Sleep -Seconds 1
-Read-Host "Press Enter to start the incantation..."
-Clear-Host
+Invoke-Pause 1
+if (-not $Headless) {
+    Read-Host "Press Enter to start the incantation..." | Out-Null
+    Clear-Host
+}
 
 # Ensure Incantation.py exists
 if (-not (Test-Path "Incantation.py")) {
-    Write-Error "The incantation failed"
-    Read-Host "Press Enter to exit..."
-    Exit
+    Write-Host "The incantation failed: Incantation.py is missing." -ForegroundColor Red
+    Invoke-Prompt "Press Enter to exit..."
+    Exit 1
 }
 
-& "$VenvPath\Scripts\python.exe" "Incantation.py"
+& "$VenvPath\Scripts\python.exe" "Incantation.py" @IncantationArgs
+$Verdict = $LASTEXITCODE
 
 Write-Host "The incantation has ended."
-Read-Host "Press Enter to vanish..."
\ No newline at end of file
+Invoke-Prompt "Press Enter to vanish..."
+Exit $Verdict
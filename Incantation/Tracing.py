@@ -0,0 +1,177 @@
+"""Span timings for steps, processes and registry calls, with a cost table and a Chrome trace export."""
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Span:
+    name: str
+    category: str
+    start: float = 0.0
+    duration: float = 0.0
+    thread: int = 0
+    attrs: dict = field(default_factory=dict)
+
+
+class Tracer:
+    """Collects spans when enabled; when disabled every span is a shared no-op context."""
+
+    _NOOP = nullcontext(Span("", ""))
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.spans = []
+        self.origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def span(self, name, category, **attrs):
+        if not self.enabled:
+            return self._NOOP
+        return self._span(name, category, attrs)
+
+    @contextmanager
+    def _span(self, name, category, attrs):
+        span = Span(name, category, time.perf_counter(), thread=threading.get_ident(), attrs=attrs)
+        try:
+            yield span
+        except BaseException as e:
+            span.attrs.setdefault("error", type(e).__name__)
+            raise
+        finally:
+            span.duration = time.perf_counter() - span.start
+            with self._lock:
+                self.spans.append(span)
+
+    def report(self, console, limit=25):
+        """Prints the costliest spans, most expensive first."""
+        from rich.table import Table
+
+        table = Table(title="[arcane]Where the time went[/arcane]", header_style="bold magenta", box=None)
+        table.add_column("Span")
+        table.add_column("Kind")
+        table.add_column("Wall", justify="right")
+        table.add_column("Exit", justify="right")
+        table.add_column("Output", justify="right")
+        for span in sorted(self.spans, key=lambda s: s.duration, reverse=True)[:limit]:
+            exit_code = span.attrs.get("exit_code", "")
+            output = span.attrs.get("output_bytes")
+            table.add_row(span.name, span.category, f"{span.duration:.3f}s", str(exit_code),
+                          "" if output is None else f"{output:,} B")
+        console.print(table)
+
+    def chrome_trace(self):
+        """The spans as Chrome trace-event JSON (open in chrome://tracing or Perfetto)."""
+        pid = os.getpid()
+        events = [{
+            "name": span.name,
+            "cat": span.category,
+            "ph": "X",
+            "ts": (span.start - self.origin) * 1e6,
+            "dur": span.duration * 1e6,
+            "pid": pid,
+            "tid": span.thread,
+            "args": {key: str(value) for key, value in span.attrs.items()},
+        } for span in self.spans]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+def traced(category):
+    """Decorates a method so each call becomes a span on `self.tracer`."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with self.tracer.span(func.__name__, category):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _output_bytes(result):
+    # A streaming runner keeps only a tail of what it read, so it counts the bytes itself
+    counted = getattr(result, "output_bytes", None)
+    if counted is not None:
+        return counted
+    return sum(len(text.encode("utf-8", errors="replace") if isinstance(text, str) else text)
+               for text in (result.stdout or "", result.stderr or ""))
+
+
+class TracedRunner:
+    def __init__(self, runner, tracer):
+        self.runner = runner
+        self.tracer = tracer
+
+    @property
+    def streams(self):
+        return getattr(self.runner, "streams", False)
+
+    def run(self, argv, timeout=None, **streaming):
+        name = " ".join([os.path.basename(str(argv[0])), *map(str, argv[1:])])
+        with self.tracer.span(name[:60], "process") as span:
+            result = self.runner.run(argv, timeout=timeout, **streaming)
+            span.attrs.update(exit_code=result.returncode, output_bytes=_output_bytes(result))
+            return result
+
+
+class TracedPowerShell:
+    def __init__(self, powershell, tracer):
+        self.powershell = powershell
+        self.tracer = tracer
+
+    def run(self, script, timeout=None):
+        first_line = next((line.strip() for line in script.splitlines() if line.strip()), "")
+        with self.tracer.span(f"ps: {first_line[:40]}", "powershell") as span:
+            result = self.powershell.run(script, timeout=timeout)
+            span.attrs.update(exit_code=result.returncode, output_bytes=_output_bytes(result))
+            return result
+
+    def close(self):
+        self.powershell.close()
+
+
+class TracedRegistry:
+    def __init__(self, registry, tracer):
+        self.registry = registry
+        self.tracer = tracer
+
+    def open(self, hive, subkey):
+        with self.tracer.span(f"open {hive}:\\{subkey}", "registry"):
+            return _TracedKey(self.registry.open(hive, subkey), self.tracer, f"{hive}:\\{subkey}")
+
+    def query(self, hive, subkey, name):
+        with self.tracer.span(f"query {hive}:\\{subkey}\\{name}", "registry"):
+            return self.registry.query(hive, subkey, name)
+
+    def values(self, hive, subkey):
+        with self.tracer.span(f"values {hive}:\\{subkey}", "registry"):
+            return self.registry.values(hive, subkey)
+
+
+class _TracedKey:
+    def __init__(self, key, tracer, path):
+        self.key = key
+        self.tracer = tracer
+        self.path = path
+
+    def get(self, name):
+        with self.tracer.span(f"get {self.path}\\{name}", "registry"):
+            return self.key.get(name)
+
+    def set(self, name, value, reg_type):
+        with self.tracer.span(f"set {self.path}\\{name}", "registry"):
+            return self.key.set(name, value, reg_type)
+
+    def __enter__(self):
+        self.key.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self.key.__exit__(*exc)
@@ -0,0 +1,224 @@
+"""How the ritual reaches a machine (processes, PowerShell, the registry, where tools live), here or over the network."""
+import json
+import os
+import re
+import shutil
+import subprocess
+
+from Cache import cache_dir
+from PathManager import fresh_path
+from PowerShell import PowerShellPool
+from Registry import MISSING, REG_DWORD, REG_EXPAND_SZ, REG_QWORD, REG_SZ, WinRegBackend
+from Streaming import StreamingRunner
+
+# RegistryValueKind names for New-ItemProperty, by REG_* number (the numbers are the same on both sides)
+PROPERTY_TYPES = {REG_SZ: "String", REG_EXPAND_SZ: "ExpandString", REG_DWORD: "DWord", REG_QWORD: "QWord"}
+EXIT_MARKER = "@@EXIT"
+
+
+def ps_quote(text):
+    """A PowerShell single-quoted literal."""
+    return "'" + str(text).replace("'", "''") + "'"
+
+
+class LocalTransport:
+    """This machine, as the ritual has always reached it."""
+
+    local = True
+
+    def __init__(self, runner=None, powershell=None, registry=None):
+        self.name = os.environ.get("COMPUTERNAME", "localhost")
+        self.user = os.environ.get("USERNAME")
+        # Read while they run, so winget and npm can show how far along they are
+        self.runner = runner or StreamingRunner()
+        self.powershell = powershell or PowerShellPool()
+        self.registry = registry or WinRegBackend()
+        self.cache = cache_dir()
+
+    def which(self, tool):
+        return shutil.which(tool)
+
+    def refresh_path(self):
+        """Picks up what installers just added to PATH; this process still has the one it started with."""
+        try:
+            os.environ["PATH"] = fresh_path(self.registry, os.environ.get("PATH", ""))
+        except OSError:
+            pass  # the old PATH is still better than none
+
+    def cancel(self):
+        """Kills the processes still running (an interrupted run should not wait out a 10-minute install)."""
+        cancel = getattr(self.runner, "cancel", None)
+        if cancel:
+            cancel()
+
+    def close(self):
+        self.powershell.close()
+
+
+class RemotePowerShell:
+    """Runs each script on `host` through PowerShell remoting (Invoke-Command), from a local warm host."""
+
+    def __init__(self, host, pool):
+        self.host = host
+        self.pool = pool
+
+    def run(self, script, timeout=None):
+        wrapped = f"Invoke-Command -ComputerName {ps_quote(self.host)} -ErrorAction Stop -ScriptBlock {{\n{script}\n}}"
+        return self.pool.run(wrapped, timeout=timeout)
+
+    def close(self):
+        self.pool.close()
+
+
+class RemoteRunner:
+    """Starts a program on the remote host; its exit code comes back on a marker line."""
+
+    def __init__(self, powershell):
+        self.powershell = powershell
+
+    def run(self, argv, timeout=None):
+        args = ", ".join(ps_quote(arg) for arg in argv[1:])
+        result = self.powershell.run(f"""
+        $out = & {ps_quote(argv[0])} @({args}) 2>&1 | Out-String
+        $out
+        "{EXIT_MARKER} $LASTEXITCODE"
+        """, timeout=timeout)
+        stdout, code = _split_exit(result.stdout)
+        if code is None:
+            return subprocess.CompletedProcess(argv, result.returncode or -1, stdout, result.stderr)
+        return subprocess.CompletedProcess(argv, code, stdout, result.stderr)
+
+
+def _split_exit(stdout):
+    lines = stdout.rstrip().splitlines()
+    if lines:
+        match = re.fullmatch(rf"{EXIT_MARKER} (-?\d+)", lines[-1].strip())
+        if match:
+            return "\n".join(lines[:-1]), int(match.group(1))
+    return stdout, None
+
+
+class PowerShellRegistry:
+    """A registry backend (query/values/open) spoken through PowerShell, for machines winreg cannot reach."""
+
+    def __init__(self, powershell):
+        self.powershell = powershell
+
+    def _json(self, script):
+        result = self.powershell.run(script)
+        if result.returncode != 0:
+            raise OSError(result.stderr.strip() or f"exit {result.returncode}")
+        return json.loads(result.stdout) if result.stdout.strip() else None
+
+    def values(self, hive, subkey):
+        path = ps_quote(f"{hive}:\\{subkey}")
+        data = self._json(f"""
+        $key = Get-Item -LiteralPath {path} -ErrorAction SilentlyContinue
+        if ($key) {{
+            $found = @{{}}
+            foreach ($name in $key.GetValueNames()) {{
+                $found[$name] = @($key.GetValue($name, $null, 'DoNotExpandEnvironmentNames'), [int]$key.GetValueKind($name))
+            }}
+            $found | ConvertTo-Json -Compress -Depth 3
+        }}
+        """)
+        return {name: (value, reg_type) for name, (value, reg_type) in (data or {}).items()}
+
+    def query(self, hive, subkey, name):
+        return self.values(hive, subkey).get(name, MISSING)
+
+    def open(self, hive, subkey):
+        return _PowerShellKey(self, hive, subkey)
+
+
+class _PowerShellKey:
+    def __init__(self, registry, hive, subkey):
+        self.registry = registry
+        self.path = f"{hive}:\\{subkey}"
+        self.hive = hive
+        self.subkey = subkey
+
+    def get(self, name):
+        return self.registry.query(self.hive, self.subkey, name)
+
+    def set(self, name, value, reg_type):
+        result = self.registry.powershell.run(f"""
+        if (-not (Test-Path -LiteralPath {ps_quote(self.path)})) {{ New-Item -Path {ps_quote(self.path)} -Force | Out-Null }}
+        New-ItemProperty -LiteralPath {ps_quote(self.path)} -Name {ps_quote(name)} -Value {ps_quote(value)} -PropertyType {PROPERTY_TYPES.get(reg_type, "String")} -Force | Out-Null
+        """)
+        if result.returncode != 0:
+            message = result.stderr.strip() or f"exit {result.returncode}"
+            raise PermissionError(message) if "denied" in message.lower() else OSError(message)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class RemoteTransport:
+    """Another Windows machine, over PowerShell remoting (WinRM must be enabled there).
+
+    HKCU is the hive of the account the session signs in as, so connect as the apprentice who will use the machine.
+    """
+
+    local = False
+
+    def __init__(self, host, user=None, pool=None):
+        self.name = host
+        self.user = user or os.environ.get("USERNAME")
+        self.powershell = RemotePowerShell(host, pool or PowerShellPool(size=1))
+        self.runner = RemoteRunner(self.powershell)
+        self.registry = PowerShellRegistry(self.powershell)
+        self.cache = cache_dir() / "hosts" / host
+        self.cache.mkdir(parents=True, exist_ok=True)
+        self._which = {}
+
+    def which(self, tool):
+        if tool not in self._which:
+            result = self.powershell.run(f"(Get-Command {ps_quote(tool)} -ErrorAction SilentlyContinue).Source")
+            found = result.stdout.strip() if result.returncode == 0 else ""
+            self._which[tool] = found or None
+        return self._which[tool]
+
+    def refresh_path(self):
+        # Every remote call starts a new session, which reads PATH afresh; only the answers kept here go stale
+        self._which.clear()
+
+    def cancel(self):
+        pass  # each remote call ends with its own timeout
+
+    def close(self):
+        self.powershell.close()
+
+
+class StandInTransport:
+    """A simulated host for rehearsing fleet runs on one machine: a sandbox with fake winget, npm, PowerShell and registry."""
+
+    local = False
+
+    def __init__(self, name, profile=None, seed=0):
+        from Rehearsal import PROFILES, FakeMachine, FakePowerShell, FakeRunner
+
+        self.name = name
+        self.user = f"apprentice@{name}"
+        self.machine = FakeMachine(profile or PROFILES["nominal"], seed=seed)
+        self.runner = FakeRunner(self.machine)
+        self.powershell = FakePowerShell(self.machine)
+        self.registry = self.machine.registry
+        self.cache = self.machine.root / "cache"
+        self.cache.mkdir(exist_ok=True)
+
+    def which(self, tool):
+        return self.machine.which(tool)
+
+    def refresh_path(self):
+        pass  # which() looks at the fake machine as it is now
+
+    def cancel(self):
+        pass
+
+    def close(self):
+        self.powershell.close()
+        self.machine.cleanup()
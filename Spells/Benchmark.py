@@ -0,0 +1,144 @@
+"""Cold-start benchmark for the spells: fresh interpreters, timed to exit or to the first prompt, against a budget."""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from Voice import Voice
+
+HERE = Path(__file__).resolve().parent
+
+# name -> (argv after the interpreter, text that means "ready" or None to wait for exit, extra env, budget in seconds)
+SCENARIOS = {
+    "rune --help": (["Rune.py", "--help"], None, {}, 0.30),
+    "rune prompt (plain)": (["Rune.py"], "Trigger", {}, 0.25),
+    "rune prompt (rich)": (["Rune.py"], "Trigger", {"FORCE_COLOR": "1"}, 0.45),
+}
+# module -> budget in seconds for `import module` alone
+IMPORTS = {
+    "Rune": 0.10,
+}
+
+
+def espanso_sandbox():
+    """A throwaway APPDATA with a small match file, so nothing real is read or touched."""
+    root = Path(tempfile.mkdtemp(prefix="rune-bench"))
+    match_dir = root / "espanso" / "match"
+    match_dir.mkdir(parents=True)
+    lines = ["matches:\n"]
+    for n in range(200):
+        lines += [f'  - trigger: ":bench{n}"\n', f'    replace: "rune number {n}"\n']
+    (match_dir / "base.yml").write_text("".join(lines), encoding="utf-8")
+    return root
+
+
+def time_to(argv, ready, env, timeout=10):
+    """Seconds from launch until `ready` shows up on stdout (or until exit when ready is None)."""
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-u", *argv], cwd=HERE, env=env,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    if ready is None:
+        proc.communicate(timeout=timeout)
+        return time.perf_counter() - start
+
+    seen = threading.Event()
+    marks = {}
+
+    def watch():
+        buffer = b""
+        while True:
+            chunk = proc.stdout.read1(4096)
+            if not chunk:
+                break
+            buffer += chunk
+            if ready.encode() in buffer:
+                marks["at"] = time.perf_counter()
+                seen.set()
+                break
+
+    reader = threading.Thread(target=watch, daemon=True)
+    reader.start()
+    seen.wait(timeout)
+    proc.kill()
+    proc.wait()
+    if "at" not in marks:
+        raise TimeoutError(f"{' '.join(argv)}: never printed {ready!r}")
+    return marks["at"] - start
+
+
+def import_cost(module, env):
+    """Cumulative microseconds of `import module` and its five costliest dependencies, from -X importtime."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=HERE, env=env, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            rows.append((int(cumulative), name.strip()))
+        except ValueError:
+            continue  # the header line
+    total = next((us for us, name in reversed(rows) if name == module), 0)
+    heaviest = sorted((row for row in rows if row[1] != module), reverse=True)[:5]
+    return total, heaviest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure how fast each spell starts.")
+    parser.add_argument("--runs", type=int, default=7, help="Launches per scenario; the median is compared to the budget.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget, e.g. 2 on a slow machine.")
+    parser.add_argument("--plain", action="store_true", help="Plain text output, without rich.")
+    args = parser.parse_args(argv)
+
+    voice = Voice(plain=True if args.plain else None)
+    appdata = espanso_sandbox()
+    env = {**os.environ, "APPDATA": str(appdata)}
+    env.pop("FORCE_COLOR", None)
+    try:
+        return report(voice, env, args)
+    finally:
+        shutil.rmtree(appdata, ignore_errors=True)
+
+
+def report(voice, env, args):
+    over = []
+    voice.rule("[arcane]~~~ SPELL STARTUP ~~~[/arcane]")
+    for name, (spell_argv, ready, extra, budget) in SCENARIOS.items():
+        budget *= args.scale
+        # The first launch warms the OS file cache and writes the rune index; it does not count
+        time_to(spell_argv, ready, {**env, **extra})
+        times = [time_to(spell_argv, ready, {**env, **extra}) for _ in range(args.runs)]
+        median = statistics.median(times)
+        style = "success" if median <= budget else "error"
+        voice.print(f"[{style}]  {'+' if median <= budget else '!'} {name}: median {median * 1000:.0f} ms, "
+                    f"best {min(times) * 1000:.0f} ms (budget {budget * 1000:.0f} ms)[/{style}]")
+        if median > budget:
+            over.append(name)
+
+    for module, budget in IMPORTS.items():
+        budget *= args.scale
+        total, heaviest = import_cost(module, env)
+        style = "success" if total / 1e6 <= budget else "error"
+        voice.print(f"[{style}]  {'+' if total / 1e6 <= budget else '!'} import {module}: {total / 1000:.1f} ms "
+                    f"(budget {budget * 1000:.0f} ms)[/{style}]")
+        for us, dependency in heaviest:
+            voice.print(f"[dim]      {dependency}: {us / 1000:.1f} ms[/dim]")
+        if total / 1e6 > budget:
+            over.append(f"import {module}")
+
+    if over:
+        voice.print(f"[error]  ! Over budget: {', '.join(over)}[/error]")
+        return 1
+    voice.print("[success]  + Every spell wakes within its budget.[/success]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+"""Reading Espanso match files without a YAML library: just enough to find every trigger and its replacement."""
+import json
+import re
+
+_KEY = re.compile(r"^(?P<indent>\s*)(?P<dash>-\s+)?(?P<key>[A-Za-z_]+):\s*(?P<rest>.*)$")
+_ITEM = re.compile(r"^(?P<indent>\s*)-\s+(?P<rest>.*)$")
+
+
+class Match:
+    # A plain class rather than a dataclass: dataclasses imports inspect, a noticeable slice of Rune's startup
+    __slots__ = ("triggers", "replace", "start", "end", "keys")
+
+    def __init__(self, triggers=None, replace="", start=0, end=0, keys=None):
+        self.triggers = triggers if triggers is not None else []
+        self.replace = replace
+        self.start = start  # first line of the entry (0-based)
+        self.end = end      # one past its last line
+        self.keys = keys if keys is not None else {}  # key -> (first line, one past its last), at the entry's own level
+
+    def __repr__(self):
+        return f"Match(triggers={self.triggers!r}, replace={self.replace!r}, start={self.start}, end={self.end})"
+
+
+def _strip_comment(value):
+    # Only for plain scalars: a " #" starts a comment
+    hit = value.find(" #")
+    return value[:hit] if hit >= 0 else value
+
+
+def unquote(value):
+    """Turns a one-line YAML scalar into its string value."""
+    value = value.strip()
+    if value.startswith('"'):
+        end = _closing_quote(value)
+        try:
+            return json.loads(value[:end + 1])
+        except ValueError:
+            return value[1:end]
+    if value.startswith("'"):
+        end = 1
+        while end < len(value):
+            if value[end] == "'" and value[end + 1:end + 2] != "'":
+                break
+            end += 2 if value[end] == "'" else 1
+        return value[1:end].replace("''", "'")
+    return _strip_comment(value).strip()
+
+
+def _closing_quote(value):
+    i = 1
+    while i < len(value):
+        if value[i] == "\\":
+            i += 2
+            continue
+        if value[i] == '"':
+            return i
+        i += 1
+    return len(value) - 1
+
+
+def _flow_list(value):
+    """Parses `[":a", ':b', c]` into a list of strings."""
+    inner = value.strip()[1:].rsplit("]", 1)[0]
+    items, current, quote = [], "", None
+    for char in inner:
+        if quote:
+            current += char
+            if char == quote and not current.endswith("\\" + quote):
+                quote = None
+        elif char in "\"'":
+            quote = char
+            current += char
+        elif char == ",":
+            items.append(current)
+            current = ""
+        else:
+            current += char
+    if current.strip():
+        items.append(current)
+    return [unquote(item) for item in items if item.strip()]
+
+
+def _block_scalar(lines, i, parent_indent, style):
+    """Collects a `|` or `>` block; returns (text, index of the next line)."""
+    body = []
+    block_indent = None
+    while i < len(lines):
+        line = lines[i]
+        if line.strip():
+            indent = len(line) - len(line.lstrip())
+            if indent <= parent_indent:
+                break
+            if block_indent is None:
+                block_indent = indent
+            body.append(line[block_indent:])
+        else:
+            body.append("")
+        i += 1
+    while body and not body[-1]:
+        body.pop()
+    text = "\n".join(body) if style.startswith("|") else " ".join(part for part in body if part)
+    if not style.endswith("-"):
+        text += "\n"
+    return text, i
+
+
+def scan(text):
+    """Returns every Match under `matches:` in a match file's text."""
+    lines = text.splitlines()
+    matches = []
+    current = None
+    item_indent = key_indent = None
+    in_matches = False
+
+    def close():
+        if current:
+            matches.append(current)
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            i += 1
+            continue
+        indent = len(line) - len(line.lstrip())
+
+        if indent == 0 and not stripped.startswith("-"):
+            # A new top-level section (matches:, global_vars:, imports:...)
+            close()
+            current = None
+            in_matches = stripped.startswith("matches:")
+            item_indent = None
+            i += 1
+            continue
+        if not in_matches:
+            i += 1
+            continue
+
+        key = _KEY.match(line)
+        if key and key.group("dash") and (item_indent is None or indent == item_indent):
+            # "- trigger: ..." at the list's own indent opens the next entry
+            close()
+            item_indent = indent
+            key_indent = indent + len(key.group("dash"))
+            current = Match(start=i, end=i + 1)
+        elif current is None:
+            i += 1
+            continue
+        elif not key or key.group("dash") or indent != key_indent:
+            # Nested structures (vars, params...) belong to the entry but hold no triggers
+            current.end = i + 1
+            i += 1
+            continue
+
+        name, rest = key.group("key"), key.group("rest")
+        key_start = i
+        i += 1
+        if name == "trigger":
+            current.triggers.append(unquote(rest))
+        elif name == "triggers":
+            if rest.strip().startswith("["):
+                current.triggers.extend(_flow_list(rest))
+            else:
+                while i < len(lines):
+                    item = _ITEM.match(lines[i])
+                    if not item or len(item.group("indent")) < key_indent:
+                        break
+                    current.triggers.append(unquote(item.group("rest")))
+                    i += 1
+        elif name == "replace":
+            style = rest.strip()
+            if style[:1] in ("|", ">"):
+                current.replace, i = _block_scalar(lines, i, key_indent, style)
+            else:
+                current.replace = unquote(rest)
+        current.keys[name] = (key_start, i)
+        current.end = i
+
+    close()
+    return matches
+
+
+def quote(value):
+    """A YAML double-quoted scalar. JSON string syntax is valid YAML and escapes quotes, backslashes and newlines."""
+    return json.dumps(value, ensure_ascii=False)
+
+
+def entry_lines(trigger, replace, indent="  "):
+    return [f"{indent}- trigger: {quote(trigger)}\n", f"{indent}  replace: {quote(replace)}\n"]
+
+
+def _trimmed(lines, start, end):
+    # Block scalars swallow the blank lines after them; those belong between entries, not to the entry
+    while end > start + 1 and not lines[end - 1].strip():
+        end -= 1
+    return start, end
+
+
+def _indent(line):
+    return line[:len(line) - len(line.lstrip())]
+
+
+def rewrite_problem(match, triggers):
+    """Why these triggers of `match` cannot be given new replacements in place, or None when they can."""
+    if "trigger" in match.keys and "triggers" in match.keys:
+        return "its entry has both trigger: and triggers:; edit it by hand"
+    if set(match.triggers) <= set(triggers) and "replace" not in match.keys:
+        return "its entry expands to something other than text (a form, an image...); edit it by hand"
+    return None
+
+
+def _triggers_edit(lines, match, kept):
+    """Rewrites the entry's `triggers:` list down to `kept`, in the list style it already uses."""
+    start, end = match.keys["triggers"]
+    line = lines[start]
+    at = line.index("triggers:")
+    if line[at + len("triggers:"):].strip().startswith("["):
+        return start, start + 1, [f"{line[:at]}triggers: [{', '.join(quote(t) for t in kept)}]\n"]
+    items = [item for item in lines[start + 1:end] if _ITEM.match(item) and unquote(_ITEM.match(item).group("rest")) in kept]
+    return start, end, [line, *items]
+
+
+def _rewrite(lines, match, runes):
+    """Edits giving some of an entry's triggers new replacements; its other triggers and keys stay as they are.
+
+    A trigger that shares its entry is split out into an entry of its own, right after the one it leaves.
+    """
+    problem = rewrite_problem(match, [trigger for trigger, _ in runes])
+    if problem:
+        raise ValueError(f"cannot rewrite {runes[0][0]}: {problem}")
+    rewritten = {trigger for trigger, _ in runes}
+    kept = [trigger for trigger in match.triggers if trigger not in rewritten]
+    edits = []
+    if not kept:
+        # Every trigger of the entry is rewritten: the entry itself carries the first one
+        (trigger, replace), runes = runes[0], runes[1:]
+        kept = [trigger]
+        start, end = _trimmed(lines, *match.keys["replace"])
+        line = lines[start]
+        edits.append((start, end, [f"{line[:line.index('replace:')]}replace: {quote(replace)}\n"]))
+    if kept != match.triggers:
+        edits.append(_triggers_edit(lines, match, kept))
+    if runes:
+        at = _trimmed(lines, match.start, match.end)[1]
+        edits.append((at, at, [line for trigger, replace in runes for line in entry_lines(trigger, replace, _indent(lines[match.start]))]))
+    return edits
+
+
+def edit(text, replaced=None, appended=()):
+    """Returns the file text with some triggers given new replacements and new entries added to the end of `matches:`.
+
+    replaced maps the (start, end) line span of an entry from scan() to the (trigger, replace) pairs to
+    rewrite in it; appended is a list of (trigger, replace) pairs. Raises ValueError for an entry that
+    cannot be rewritten safely (see rewrite_problem).
+    """
+    lines = text.splitlines(keepends=True)
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+    matches = scan(text)
+    by_start = {match.start: match for match in matches}
+
+    edits = []
+    for (start, _), runes in (replaced or {}).items():
+        if start not in by_start:
+            raise ValueError(f"no entry starts on line {start + 1} any more")
+        edits.extend(_rewrite(lines, by_start[start], list(runes)))
+
+    if appended:
+        if matches:
+            indent = _indent(lines[matches[0].start])
+            at = matches[-1].end
+            new = []
+        else:
+            header = next((i for i, line in enumerate(lines) if line.rstrip() == "matches:"), None)
+            indent = "  "
+            at = len(lines) if header is None else header + 1
+            new = ["matches:\n"] if header is None else []
+        for trigger, replace in appended:
+            new.extend(entry_lines(trigger, replace, indent))
+        edits.append((at, at, new))
+
+    # Bottom-up, so earlier spans keep their line numbers
+    for start, end, new in sorted(edits, key=lambda e: (e[0], e[1]), reverse=True):
+        lines[start:end] = new
+    return "".join(lines)
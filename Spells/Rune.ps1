@@ -1 +1 @@
-python "$PSScriptRoot\Rune.py"
\ No newline at end of file
+python "$PSScriptRoot\Rune.py" @args
\ No newline at end of file
@@ -2,53 +2,32 @@ import os
 import sys
 from pathlib import Path
 
-# Try to import rich, as it is used in the project
-try:
-    from rich.console import Console
-    from rich.prompt import Prompt
-    from rich.panel import Panel
-    from rich.theme import Theme
-except ImportError:
-    print("This spell requires the 'rich' library. Please ensure it is installed.")
-    sys.exit(1)
-
-# Theme matching Incantation
-custom_theme = Theme({
-    "info": "dim white",
-    "warning": "yellow",
-    "error": "bold red",
-    "success": "bold green",
-    "arcane": "magenta",
-    "spell": "italic violet",
-})
-console = Console(theme=custom_theme)
+from MatchFile import edit, rewrite_problem, scan
+from RuneIndex import open_index, write_atomic
+from RuneJournal import RuneJournal
+from Voice import Voice
+
+# rich is only imported once something is actually shown; pipes and --plain never load it
+voice = Voice()
 
 def get_espanso_dir():
     """Locates the Espanso match directory."""
     appdata = os.environ.get("APPDATA")
     if not appdata:
-        console.print("[error]Could not find APPDATA environment variable.[/error]")
+        voice.print("[error]Could not find APPDATA environment variable.[/error]")
         return None
     
     # Standard location
     match_path = Path(appdata) / "espanso" / "match"
     
     if not match_path.exists():
-        console.print(f"[warning]Espanso match directory not found at: {match_path}[/warning]")
+        voice.print(f"[warning]Espanso match directory not found at: {match_path}[/warning]")
         return None
         
     return match_path
 
-def create_rune():
-    console.clear()
-    console.rule("[arcane]~~~ RUNE SCRIBE ~~~[/arcane]")
-    console.print("[dim]Inscribing new rune into the fabric of Espanso...[/dim]\n")
-
-    match_dir = get_espanso_dir()
-    if not match_dir:
-        console.print("[error]Espanso match directory not found. Is Espanso installed?[/error]")
-        return
-
+def choose_target(match_dir):
+    """The match file new runes go to: base.yml, else the first .yml, else a fresh base.yml."""
     # Select file - defaulting to base.yml
     target_file = match_dir / "base.yml"
     
@@ -58,51 +37,319 @@ def create_rune():
         if yml_files:
             # Just pick the first one if base.yml is missing
             target_file = yml_files[0]
-            console.print(f"[info]base.yml not found. Targeting {target_file.name} instead.")
+            voice.print(f"[info]base.yml not found. Targeting {target_file.name} instead.")
         else:
             # Create base.yml
-            console.print("[info]No match files found. Creating base.yml...")
+            voice.print("[info]No match files found. Creating base.yml...")
             try:
                 match_dir.mkdir(parents=True, exist_ok=True)
                 with open(target_file, "w", encoding="utf-8") as f:
                     f.write("matches:\n")
             except Exception as e:
-                console.print(f"[error]Failed to create match file: {e}[/error]")
-                return
+                voice.print(f"[error]Failed to create match file: {e}[/error]")
+                return None
+    return target_file
+
+def full_trigger(trigger):
+    """Runes are typed with a leading colon; add it unless it is already there."""
+    trigger = trigger.strip()
+    return trigger if trigger.startswith(":") else f":{trigger}"
+
+def inscribe(match_dir, index, target_file, runes, overwrite=False):
+    """Writes many runes at once: one atomic replace per touched file, so Espanso reloads once.
+
+    runes is a list of (trigger, replacement) with full triggers. Existing triggers are rewritten
+    in place when overwrite is set, otherwise skipped; so are entries that cannot be rewritten safely
+    (see rewrite_problem). Returns (added, rewritten, skipped) lists.
+    """
+    added, rewritten, skipped = [], [], []
+    edits = {}  # relative file -> {"replaced": {(start, end): [runes]}, "appended": [runes]}
+    target_rel = target_file.relative_to(match_dir).as_posix()
+
+    for trigger, replace in runes:
+        existing = index.lookup(trigger)
+        if existing and not overwrite:
+            skipped.append((trigger, replace))
+            continue
+        if existing:
+            rel, start, end = existing[0]
+            edits.setdefault(rel, {"replaced": {}, "appended": []})["replaced"].setdefault((start, end), []).append((trigger, replace))
+        else:
+            edits.setdefault(target_rel, {"replaced": {}, "appended": []})["appended"].append((trigger, replace))
+            added.append((trigger, replace))
+
+    for rel, change in edits.items():
+        path = match_dir / rel
+        text = path.read_text(encoding="utf-8-sig") if path.exists() else ""
+        if change["replaced"]:
+            # Forms and images have no text to swap; leave those entries alone
+            by_start = {match.start: match for match in scan(text)}
+            for span, pairs in list(change["replaced"].items()):
+                match = by_start.get(span[0])
+                if match is None or rewrite_problem(match, [trigger for trigger, _ in pairs]):
+                    skipped.extend(change["replaced"].pop(span))
+                else:
+                    rewritten.extend(pairs)
+        if change["replaced"] or change["appended"]:
+            write_atomic(path, edit(text, change["replaced"], change["appended"]))
+
+    if edits:
+        index.refresh()
+    return added, rewritten, skipped
+
+def settle_entries(match_dir, target_file, entries):
+    """The journal's writer: folds queued entries in order against a fresh index, then inscribes them in one go."""
+    index = open_index(match_dir)
+    runes = {}
+    for entry in entries:
+        trigger, replace = entry["trigger"], entry["replace"]
+        if (trigger in runes or index.lookup(trigger)) and not entry.get("overwrite"):
+            continue  # first come, first served unless the later one asked to overwrite
+        runes[trigger] = replace
+    inscribe(match_dir, index, target_file, list(runes.items()), overwrite=True)
+
+def refusals(match_dir, index, runes):
+    """{trigger: why} for the existing runes whose entries cannot be rewritten in place (see rewrite_problem)."""
+    spans = {}
+    for trigger, _ in runes:
+        found = index.lookup(trigger)
+        if found:
+            rel, start, _ = found[0]
+            spans.setdefault((rel, start), []).append(trigger)
+    entries = {}
+    why = {}
+    for (rel, start), triggers in spans.items():
+        if rel not in entries:
+            entries[rel] = {match.start: match for match in scan((match_dir / rel).read_text(encoding="utf-8-sig"))}
+        match = entries[rel].get(start)
+        problem = match and rewrite_problem(match, triggers)
+        if problem:
+            why.update(dict.fromkeys(triggers, problem))
+    return why
+
+def write_runes(match_dir, target_file, runes, overwrite=False):
+    """Queues runes through the journal, so concurrent Rune calls land in one write and one Espanso reload.
+
+    Returns (added, rewritten, skipped, lost, refused): lost runes were beaten to their trigger by another
+    process; refused ones are (trigger, replace, why) for entries that cannot be overwritten (forms, images...).
+    """
+    before = open_index(match_dir)
+    existed = {trigger for trigger, _ in runes if before.lookup(trigger)}
+    skipped = [] if overwrite else [(t, r) for t, r in runes if t in existed]
+    why = refusals(match_dir, before, [(t, r) for t, r in runes if t in existed]) if overwrite else {}
+    refused = [(t, r, why[t]) for t, r in runes if t in why]
+    queued = [(t, r) for t, r in runes if (overwrite or t not in existed) and t not in why]
+
+    RuneJournal(match_dir).submit(queued, lambda entries: settle_entries(match_dir, target_file, entries), overwrite)
+
+    after = open_index(match_dir)
+    added, rewritten, lost = [], [], []
+    for trigger, replace in queued:
+        if after.replacement(trigger) != replace:
+            lost.append((trigger, replace))
+        elif trigger in existed:
+            rewritten.append((trigger, replace))
+        else:
+            added.append((trigger, replace))
+    return added, rewritten, skipped, lost, refused
+
+def create_rune():
+    voice.clear()
+    voice.rule("[arcane]~~~ RUNE SCRIBE ~~~[/arcane]")
+    voice.print("[dim]Inscribing new rune into the fabric of Espanso...[/dim]\n")
+
+    match_dir = get_espanso_dir()
+    if not match_dir:
+        voice.print("[error]Espanso match directory not found. Is Espanso installed?[/error]")
+        return
+
+    target_file = choose_target(match_dir)
+    if not target_file:
+        return
+
+    # Every trigger across all match files, re-reading only files that changed since last time
+    index = open_index(match_dir)
 
     # Gather input
-    console.print("[info]Define your new rune:[/info]")
-    trigger = Prompt.ask("[spell]  Trigger (what you type)[/spell]")
-    replace = Prompt.ask("[spell]  Replacement (what appears)[/spell]")
+    voice.print("[info]Define your new rune:[/info]")
+    trigger = voice.ask("[spell]  Trigger (what you type)[/spell]")
+    if not trigger:
+        voice.print("[warning]The incantation was mumbled (empty input). Aborting.[/warning]")
+        return
+
+    existing = index.lookup(full_trigger(trigger))
+    if existing:
+        rel, start, end = existing[0]
+        voice.print(f"[warning]The rune :{trigger} is already inscribed in {rel} (line {start + 1}).[/warning]")
+        if not voice.confirm("[spell]  Overwrite it?[/spell]", default=False):
+            voice.print("[dim]The old rune stands.[/dim]")
+            return
+        # Only this trigger is rewritten; its siblings and the entry's vars and options stay
+        text = (match_dir / rel).read_text(encoding="utf-8-sig")
+        match = next((m for m in scan(text) if m.start == start), None)
+        problem = match and rewrite_problem(match, [full_trigger(trigger)])
+        if problem:
+            voice.print(f"[warning]Cannot overwrite :{trigger}: {problem}.[/warning]")
+            return
+    else:
+        fires_first, hidden = index.shadowing(full_trigger(trigger))
+        if fires_first or hidden:
+            # Espanso fires a trigger as soon as it is typed, so prefixes swallow longer runes
+            clashes = ", ".join(fires_first + hidden[:5]) + ("..." if len(hidden) > 5 else "")
+            voice.print(f"[warning]The rune :{trigger} would clash with {clashes}.[/warning]")
+            if not voice.confirm("[spell]  Inscribe it anyway?[/spell]", default=False):
+                return
 
-    if not trigger or not replace:
-        console.print("[warning]The incantation was mumbled (empty input). Aborting.[/warning]")
+    replace = voice.ask("[spell]  Replacement (what appears)[/spell]")
+    if not replace:
+        voice.print("[warning]The incantation was mumbled (empty input). Aborting.[/warning]")
         return
 
-    # Prepare the block to append
-    # We append a simple match entry. 
-    # NOTE: We assume 'matches:' parent key exists and we are appending to it.
-    # We add a newline before to ensure separation.
-    block = f"\n  - trigger: \":{trigger}\"\n    replace: \"{replace}\"\n"
-    
     try:
-        # check if file needs 'matches:' header
-        if target_file.stat().st_size == 0:
-             with open(target_file, "w", encoding="utf-8") as f:
-                f.write("matches:\n")
-
-        with open(target_file, "a", encoding="utf-8") as f:
-            f.write(block)
-        
-        console.print(Panel(
+        # Quotes, backslashes and newlines are escaped, and the file is swapped atomically
+        _, _, _, lost, _ = write_runes(match_dir, target_file, [(full_trigger(trigger), replace)], overwrite=True)
+        if lost:
+            voice.print(f"[warning]Another scribe inscribed :{trigger} at the same moment; theirs stands.[/warning]")
+            return
+        voice.panel(
             f"[bold]Trigger:[/bold] {trigger}\n[bold]Replace:[/bold] {replace}",
-            title="[success]Rune Inscribed[/success]",
+            title="[success]Rune Rewritten[/success]" if existing else "[success]Rune Inscribed[/success]",
             border_style="green"
-        ))
-        console.print("[dim]Espanso should reload automatically.[/dim]")
+        )
+        voice.print("[dim]Espanso should reload automatically.[/dim]")
         
     except Exception as e:
-        console.print(f"[error]Failed to inscribe rune: {e}[/error]")
+        voice.print(f"[error]Failed to inscribe rune: {e}[/error]")
 
-if __name__ == "__main__":
+def read_pairs(stream, fmt):
+    """Yields (line number, trigger, replacement) from CSV or JSONL, one record at a time."""
+    import csv
+    import json
+    if fmt == "jsonl":
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                yield number, record.get("trigger"), record.get("replace")
+            except (ValueError, AttributeError):
+                yield number, None, None
+    else:
+        for number, row in enumerate(csv.reader(stream), 1):
+            if not row or (number == 1 and [cell.strip().lower() for cell in row[:2]] == ["trigger", "replace"]):
+                continue
+            yield number, row[0], row[1] if len(row) > 1 else None
+
+def import_runes(source, fmt=None, overwrite=False):
+    """Bulk inscription from a CSV/JSONL file, or stdin when source is '-'."""
+    match_dir = get_espanso_dir()
+    if not match_dir:
+        voice.print("[error]Espanso match directory not found. Is Espanso installed?[/error]")
+        return 1
+    target_file = choose_target(match_dir)
+    if not target_file:
+        return 1
+
+    if source == "-":
+        import io
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig", newline="")
+    else:
+        try:
+            stream = open(source, encoding="utf-8-sig", newline="")
+        except OSError as e:
+            voice.print(f"[error]Cannot read {source}: {e.strerror or e}[/error]")
+            return 1
+    if fmt is None:
+        if source != "-":
+            fmt = "jsonl" if source.lower().endswith((".jsonl", ".json")) else "csv"
+        else:
+            # Sniff stdin: JSON lines start with a brace
+            first = stream.buffer.peek(1)[:1] if hasattr(stream, "buffer") else b""
+            fmt = "jsonl" if first == b"{" else "csv"
+
+    runes = {}  # trigger -> replacement; a later line wins over an earlier one
+    invalid = 0
+    with stream:
+        for number, trigger, replace in read_pairs(stream, fmt):
+            if not isinstance(trigger, str) or not isinstance(replace, str) or not trigger.strip() or not replace:
+                voice.print(f"[warning]  ! Line {number}: needs a trigger and a replacement. Skipped.[/warning]")
+                invalid += 1
+                continue
+            if "\n" in trigger or "\r" in trigger:
+                voice.print(f"[warning]  ! Line {number}: a trigger cannot span lines. Skipped.[/warning]")
+                invalid += 1
+                continue
+            runes[full_trigger(trigger)] = replace
+
+    try:
+        added, rewritten, skipped, lost, refused = write_runes(match_dir, target_file, list(runes.items()), overwrite)
+    except Exception as e:
+        voice.print(f"[error]Failed to inscribe runes: {e}[/error]")
+        return 1
+    for trigger, _, why in refused:
+        voice.print(f"[warning]  ! Cannot overwrite {trigger}: {why}. Left alone.[/warning]")
+
+    voice.panel(
+        f"[bold]Inscribed:[/bold] {len(added)}\n[bold]Rewritten:[/bold] {len(rewritten)}\n"
+        f"[bold]Already known:[/bold] {len(skipped) + len(lost)}\n[bold]Left alone:[/bold] {len(refused)}\n"
+        f"[bold]Invalid:[/bold] {invalid}",
+        title="[success]Runes Inscribed[/success]",
+        border_style="green"
+    )
+    if skipped and not overwrite:
+        voice.print("[dim]Use --overwrite to rewrite runes that already exist.[/dim]")
+    return 0
+
+def find_runes(query, limit=20):
+    """Ranked fuzzy search over every trigger and replacement."""
+    match_dir = get_espanso_dir()
+    if not match_dir:
+        voice.print("[error]Espanso match directory not found. Is Espanso installed?[/error]")
+        return 1
+
+    from RuneSearch import open_search
+    hits = open_search(match_dir).search(query, limit)
+    shown = voice.escape(query)
+    if not hits:
+        voice.print(f"[warning]No rune answers to '{shown}'.[/warning]")
+        return 1
+
+    rows = []
+    for _, rel, line, triggers, replace in hits:
+        preview = " ".join(replace.split())
+        rows.append((", ".join(triggers), preview[:60] + ("..." if len(preview) > 60 else ""), f"{rel}:{line}"))
+    voice.table(f"[arcane]Runes answering '{shown}'[/arcane]",
+                [("Trigger", "spell"), ("Replacement", None), ("Where", "dim")], rows)
+    return 0
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        # The everyday call: straight to the prompt, argparse not even loaded
+        create_rune()
+        return 0
+
+    import argparse
+    parser = argparse.ArgumentParser(prog="Rune", description="Inscribe Espanso runes.")
+    parser.add_argument("--plain", action="store_true", help="Plain text output, without rich.")
+    sub = parser.add_subparsers(dest="command")
+    batch = sub.add_parser("import", help="Inscribe many runes from CSV (trigger,replace) or JSONL ({\"trigger\", \"replace\"}).")
+    batch.add_argument("source", help="File to read, or - for stdin. Triggers get a leading ':' unless they have one.")
+    batch.add_argument("--format", choices=["csv", "jsonl"], help="Input format (guessed from the extension or content).")
+    batch.add_argument("--overwrite", action="store_true", help="Rewrite runes whose trigger already exists instead of skipping them.")
+    seek = sub.add_parser("find", help="Fuzzy search over triggers and replacements.")
+    seek.add_argument("query", nargs="+", help="Words to look for.")
+    seek.add_argument("--limit", type=int, default=20, help="How many runes to show.")
+    args = parser.parse_args(argv)
+    if args.plain:
+        voice.plain = True
+
+    if args.command == "import":
+        return import_runes(args.source, args.format, args.overwrite)
+    if args.command == "find":
+        return find_runes(" ".join(args.query), args.limit)
     create_rune()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""An on-disk index of every trigger in the Espanso match directory, refreshed file by file."""
+import bisect
+import json
+import os
+from pathlib import Path
+
+from MatchFile import scan
+
+INDEX_VERSION = 1
+
+
+def match_files(match_dir):
+    """Every .yml/.yaml file under the match directory, skipping hidden folders."""
+    for root, dirs, files in os.walk(match_dir):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in files:
+            if name.endswith((".yml", ".yaml")):
+                yield Path(root, name)
+
+
+def index_dir(match_dir):
+    """Rune keeps its indexes next to the match directory, where Espanso does not look for matches."""
+    return Path(match_dir).parent / ".rune"
+
+
+def write_atomic(path, text):
+    import tempfile  # pulls in shutil and random; only writers pay for it
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        # mkstemp makes the file private (0600); the match file keeps the mode it had
+        try:
+            os.chmod(tmp, os.stat(path).st_mode)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class TriggerIndex:
+    """trigger -> [(file, line)] across all match files. Only files whose mtime or size moved are re-parsed."""
+
+    def __init__(self, match_dir, path=None):
+        self.match_dir = Path(match_dir)
+        self.path = Path(path) if path else index_dir(match_dir) / "triggers.json"
+        self.files = {}  # relative path -> {"mtime_ns", "size", "matches": [[triggers, replace, start, end]]}
+        self._triggers = None
+        self._sorted = None
+        self.reparsed = 0
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self.files = data["files"]
+        except (OSError, ValueError, KeyError):
+            self.files = {}
+        return self
+
+    def save(self):
+        write_atomic(self.path, json.dumps({"version": INDEX_VERSION, "files": self.files}, separators=(",", ":")))
+
+    def refresh(self):
+        """Re-parses new or changed files, forgets deleted ones, and saves if anything moved."""
+        seen = set()
+        changed = False
+        self.reparsed = 0
+        for path in match_files(self.match_dir):
+            rel = path.relative_to(self.match_dir).as_posix()
+            seen.add(rel)
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entry = self.files.get(rel)
+            if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                continue
+            try:
+                text = path.read_text(encoding="utf-8-sig", errors="replace")
+            except OSError:
+                continue
+            self.files[rel] = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "matches": [[m.triggers, m.replace, m.start, m.end] for m in scan(text)],
+            }
+            self.reparsed += 1
+            changed = True
+
+        for rel in set(self.files) - seen:
+            del self.files[rel]
+            changed = True
+
+        if changed:
+            self._triggers = self._sorted = None
+            self.save()
+        return self
+
+    @property
+    def triggers(self):
+        if self._triggers is None:
+            triggers = {}
+            for rel, entry in self.files.items():
+                for match_triggers, _, start, end in entry["matches"]:
+                    for trigger in match_triggers:
+                        triggers.setdefault(trigger, []).append((rel, start, end))
+            self._triggers = triggers
+        return self._triggers
+
+    def __len__(self):
+        return len(self.triggers)
+
+    def lookup(self, trigger):
+        """Where an exact trigger is defined: [(file, start line, end line)]."""
+        return self.triggers.get(trigger, [])
+
+    def replacement(self, trigger):
+        """What the first definition of a trigger expands to, or None."""
+        for rel, start, _ in self.lookup(trigger):
+            for match_triggers, replace, match_start, _ in self.files[rel]["matches"]:
+                if match_start == start:
+                    return replace
+        return None
+
+    def shadowing(self, trigger):
+        """Triggers that would clash by prefix: (existing ones that fire first, existing ones this would hide)."""
+        if self._sorted is None:
+            self._sorted = sorted(self.triggers)
+        before = [trigger[:n] for n in range(1, len(trigger)) if trigger[:n] in self.triggers]
+        hidden = []
+        i = bisect.bisect_right(self._sorted, trigger)
+        while i < len(self._sorted) and self._sorted[i].startswith(trigger):
+            hidden.append(self._sorted[i])
+            i += 1
+        return before, hidden
+
+
+def open_index(match_dir):
+    """Loads the saved index and brings it up to date."""
+    return TriggerIndex(match_dir).load().refresh()
@@ -0,0 +1,156 @@
+"""A journal in front of the match-file writer: Rune processes queue runes under a lock, one of them writes the burst."""
+import json
+import os
+import time
+from pathlib import Path
+
+from RuneIndex import index_dir
+
+
+class FileLock:
+    """An exclusive lock on a file, held across processes. Polls, so it behaves the same on Windows and POSIX."""
+
+    def __init__(self, path, poll=0.01):
+        self.path = Path(path)
+        self.poll = poll
+        self._file = None
+
+    def _try(self):
+        if os.name == "nt":
+            import msvcrt
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def acquire(self, blocking=True, timeout=None):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a+b")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                self._try()
+                return True
+            except OSError:
+                if not blocking or (deadline is not None and time.monotonic() >= deadline):
+                    self._file.close()
+                    self._file = None
+                    return False
+                time.sleep(self.poll)
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if os.name == "nt":
+                import msvcrt
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class RuneJournal:
+    """Pending runes in .rune/journal.jsonl. Whoever holds the flush lock waits for the burst to settle, then writes it.
+
+    Every submitter appends first and then queues on the flush lock, so by the time it gets the lock its runes were
+    either written by the previous holder or are still in the journal for it to write. Entries being written sit in
+    journal.flushing, so a writer that dies mid-flush leaves them for the next one rather than losing them.
+    """
+
+    def __init__(self, match_dir, debounce=0.2, max_wait=2.0, root=None):
+        self.root = Path(root) if root else index_dir(match_dir)
+        self.path = self.root / "journal.jsonl"
+        self.flushing = self.root / "journal.flushing"
+        self.journal_lock = FileLock(self.root / "journal.lock")
+        self.flush_lock = FileLock(self.root / "flush.lock")
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self.flushes = 0
+
+    def append(self, runes, overwrite=False):
+        lines = "".join(json.dumps({"trigger": t, "replace": r, "overwrite": overwrite}, ensure_ascii=False) + "\n"
+                        for t, r in runes)
+        with self.journal_lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _signature(self):
+        try:
+            stat = self.path.stat()
+            return stat.st_size, stat.st_mtime_ns
+        except OSError:
+            return 0, 0
+
+    def pending(self):
+        return self._signature()[0] > 0 or self.flushing.exists()
+
+    def settle(self):
+        """Waits until nothing was appended for `debounce` seconds, or `max_wait` passed."""
+        start = time.monotonic()
+        last = self._signature()
+        quiet_since = start
+        while time.monotonic() - start < self.max_wait:
+            time.sleep(self.debounce / 4)
+            now = self._signature()
+            if now != last:
+                last, quiet_since = now, time.monotonic()
+            elif time.monotonic() - quiet_since >= self.debounce:
+                return
+
+    def drain(self):
+        """Moves the journal aside and returns its entries (plus any left by a writer that died), oldest first."""
+        with self.journal_lock:
+            if self.path.exists() and not self.flushing.exists():
+                os.replace(self.path, self.flushing)
+            elif self.path.exists():
+                # A previous flush never finished: keep its entries first, then today's
+                with open(self.flushing, "a", encoding="utf-8") as out, open(self.path, encoding="utf-8") as f:
+                    out.write(f.read())
+                self.path.unlink()
+        entries = []
+        try:
+            with open(self.flushing, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue  # a torn line from a crashed append
+        except OSError:
+            pass
+        return entries
+
+    def flush(self, write):
+        """Writes everything pending with write(entries), once per settled burst. Returns the number of writes."""
+        writes = 0
+        with self.flush_lock:
+            while self.pending():
+                if self._signature()[0]:
+                    self.settle()
+                entries = self.drain()
+                if entries:
+                    write(entries)
+                    writes += 1
+                self.flushing.unlink(missing_ok=True)
+        self.flushes += writes
+        return writes
+
+    def submit(self, runes, write, overwrite=False):
+        """Queues runes and returns once they are on disk, whichever process wrote them."""
+        if runes:
+            self.append(runes, overwrite)
+        return self.flush(write)
@@ -0,0 +1,149 @@
+"""Fuzzy rune search over triggers and replacements, backed by a trigram index kept next to the match files."""
+import json
+from pathlib import Path
+
+from RuneIndex import index_dir, match_files, open_index, write_atomic
+
+SEARCH_VERSION = 1
+PREVIEW = 400     # replacement characters worth indexing; the rest of a long snippet rarely identifies it
+CANDIDATES = 300  # rescored after the posting-list vote
+
+
+def grams(text):
+    """Lowercased trigrams, padded so the start and end of a word count too."""
+    text = f" {text.lower()} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def fit(needle, wanted, triggers, preview):
+    """How snugly a rune fits the query, 0..1: the query's share of the shortest trigger or replacement holding it.
+
+    Fields that only share grams with the query fall back to their gram overlap (Jaccard).
+    """
+    fields = [trigger.lower() for trigger in triggers] + [preview.lower()]
+    holding = [field for field in fields if needle in field]
+    if holding:
+        return len(needle) / min(len(field) for field in holding)
+    return max((len(wanted & grams(field)) / len(wanted | grams(field)) for field in fields), default=0.0)
+
+
+class TrigramIndex:
+    """trigram -> runes, per match file. Postings are stored as strings and only split for the grams a query uses."""
+
+    def __init__(self, match_dir, path=None):
+        self.match_dir = Path(match_dir)
+        self.path = Path(path) if path else index_dir(match_dir) / "trigrams.json"
+        self.files = {}  # relative path -> {"mtime_ns", "size", "docs": [[triggers, replace, start]], "grams": {gram: "0 4 9"}}
+        self.rebuilt = 0
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == SEARCH_VERSION:
+                self.files = data["files"]
+        except (OSError, ValueError, KeyError):
+            self.files = {}
+        return self
+
+    def save(self):
+        write_atomic(self.path, json.dumps({"version": SEARCH_VERSION, "files": self.files},
+                                           ensure_ascii=False, separators=(",", ":")))
+
+    def refresh(self, trigger_index=None):
+        """Rebuilds postings only for files whose mtime or size moved; the trigger index is opened only then."""
+        current = {}
+        for path in match_files(self.match_dir):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            current[path.relative_to(self.match_dir).as_posix()] = (stat.st_mtime_ns, stat.st_size)
+
+        self.rebuilt = 0
+        stale = [rel for rel, (mtime_ns, size) in current.items()
+                 if (self.files.get(rel, {}).get("mtime_ns"), self.files.get(rel, {}).get("size")) != (mtime_ns, size)]
+        gone = set(self.files) - set(current)
+        if not stale and not gone:
+            return self
+
+        for rel in gone:
+            del self.files[rel]
+        if stale:
+            trigger_index = trigger_index or open_index(self.match_dir)
+            for rel in stale:
+                entry = trigger_index.files.get(rel)
+                if entry is not None:
+                    self.files[rel] = self._build(entry)
+                    self.rebuilt += 1
+        self.save()
+        return self
+
+    @staticmethod
+    def _build(entry):
+        docs, postings = [], {}
+        for number, (triggers, replace, start, _) in enumerate(entry["matches"]):
+            preview = replace[:PREVIEW]
+            docs.append([triggers, preview, start])
+            for gram in grams(" ".join(triggers)) | grams(preview):
+                postings.setdefault(gram, []).append(number)
+        return {
+            "mtime_ns": entry["mtime_ns"],
+            "size": entry["size"],
+            "docs": docs,
+            "grams": {gram: " ".join(map(str, numbers)) for gram, numbers in postings.items()},
+        }
+
+    def _candidates(self, query):
+        wanted = grams(query)
+        if len(query) < 3:
+            # Too short to be a trigram of its own: every gram containing it points at the runes that do
+            needle = query.lower()
+            found = set()
+            for rel, entry in self.files.items():
+                for gram, posting in entry["grams"].items():
+                    if needle in gram:
+                        found.update((rel, number) for number in posting.split())
+            return [(rel, int(number)) for rel, number in found]
+        votes = {}
+        for rel, entry in self.files.items():
+            for gram in wanted:
+                posting = entry["grams"].get(gram)
+                if posting:
+                    for number in posting.split():
+                        key = (rel, number)
+                        votes[key] = votes.get(key, 0) + 1
+        floor = max(1, len(wanted) // 3)
+        ranked = sorted((key for key, count in votes.items() if count >= floor), key=votes.get, reverse=True)
+        return [(rel, int(number)) for rel, number in ranked[:CANDIDATES]]
+
+    def search(self, query, limit=20):
+        """Best matches first, as (score, file, line, triggers, replacement)."""
+        query = query.strip()
+        if not query:
+            return []
+        needle = query.lower()
+        wanted = grams(query)
+        hits = []
+        for rel, number in self._candidates(query):
+            triggers, preview, start = self.files[rel]["docs"][number]
+            trigger_text = " ".join(triggers).lower()
+            # Trigger hits outrank replacement hits; whole substrings and exact triggers outrank scattered grams
+            score = 0
+            if len(query) >= 3:
+                score = max(2 * len(wanted & grams(trigger_text)), len(wanted & grams(preview))) / len(wanted)
+            if needle in trigger_text:
+                score += 1
+            if needle in preview.lower():
+                score += 0.5
+            if any(t.lower() in (needle, f":{needle}") for t in triggers):
+                score += 2
+            hits.append((round(score, 3), rel, start + 1, triggers, preview))
+        # Equal scores go to the closer fit (":t14" before ":t140" for "14"); the alphabet only settles true ties
+        hits.sort(key=lambda hit: (-hit[0], -fit(needle, wanted, hit[3], hit[4]), hit[3][0] if hit[3] else ""))
+        return hits[:limit]
+
+
+def open_search(match_dir):
+    """Loads the saved trigram index and brings it up to date."""
+    return TrigramIndex(match_dir).load().refresh()
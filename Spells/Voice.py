@@ -0,0 +1,110 @@
+"""How spells speak: rich when someone is watching, plain text otherwise. rich is only imported on first use."""
+import os
+import re
+import sys
+
+THEME = {
+    "info": "dim white",
+    "warning": "yellow",
+    "error": "bold red",
+    "success": "bold green",
+    "arcane": "magenta",
+    "spell": "italic violet",
+}
+
+# [info], [/error], [bold green]... but not [1/3] or paths with brackets; a backslash before one shows it as written
+_MARKUP = re.compile(r"(\\?)(\[/?[a-z][a-z ]*\])")
+
+
+def strip_markup(text):
+    return _MARKUP.sub(lambda m: m.group(2) if m.group(1) else "", str(text))
+
+
+class PlainConsole:
+    """Just enough of rich.Console for the spells, with the markup stripped."""
+
+    def print(self, *objects, **kwargs):
+        print(*(strip_markup(o) for o in objects))
+
+    def rule(self, title=""):
+        print(f"~~~ {strip_markup(title).strip('~ ')} ~~~" if title else "~" * 40)
+
+    def clear(self):
+        pass
+
+
+class Voice:
+    """The spell's console. plain=None picks rich only for a terminal (or when FORCE_COLOR is set)."""
+
+    def __init__(self, plain=None):
+        self.plain = plain
+        self._console = None
+
+    @property
+    def console(self):
+        if self._console is None:
+            if self.plain is None:
+                self.plain = not sys.stdout.isatty() and "FORCE_COLOR" not in os.environ
+            if not self.plain:
+                try:
+                    from rich.console import Console
+                    from rich.theme import Theme
+                    self._console = Console(theme=Theme(THEME))
+                except ImportError:
+                    self.plain = True
+            if self.plain:
+                self._console = PlainConsole()
+        return self._console
+
+    def print(self, *objects, **kwargs):
+        self.console.print(*objects, **kwargs)
+
+    def escape(self, text):
+        """Text to print as-is inside markup, such as what the user typed."""
+        if isinstance(self.console, PlainConsole):
+            return _MARKUP.sub(lambda m: "\\" + m.group(2), str(text))
+        from rich.markup import escape
+        return escape(str(text))
+
+    def rule(self, title=""):
+        self.console.rule(title)
+
+    def clear(self):
+        self.console.clear()
+
+    def ask(self, question):
+        if isinstance(self.console, PlainConsole):
+            return input(f"{strip_markup(question)}: ").strip()
+        from rich.prompt import Prompt
+        return Prompt.ask(question, console=self.console)
+
+    def confirm(self, question, default=False):
+        if isinstance(self.console, PlainConsole):
+            answer = input(f"{strip_markup(question)} [{'Y/n' if default else 'y/N'}]: ").strip().lower()
+            return default if not answer else answer.startswith("y")
+        from rich.prompt import Confirm
+        return Confirm.ask(question, default=default, console=self.console)
+
+    def panel(self, body, title="", border_style="green"):
+        if isinstance(self.console, PlainConsole):
+            self.console.rule(title)
+            self.console.print(body)
+            return
+        from rich.panel import Panel
+        self.console.print(Panel(body, title=title, border_style=border_style))
+
+    def table(self, title, columns, rows):
+        """columns is [(header, style)]; cells are shown as-is, never parsed as markup."""
+        if isinstance(self.console, PlainConsole):
+            self.console.rule(title)
+            for row in rows:
+                print("  ".join(str(cell) for cell in row))
+            return
+        from rich.table import Table
+        from rich.text import Text
+        table = Table(title=title, header_style="bold magenta", box=None)
+        for header, style in columns:
+            table.add_column(header, style=style, overflow="fold")
+        for row in rows:
+            table.add_row(*(Text(str(cell)) for cell in row))
+        self.console.print(table)
@@ -0,0 +1,11 @@
+"""The scripts import each other by bare name from their own folder; give the tests the same view."""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+for folder in ("Incantation", "Spells"):
+    sys.path.insert(0, str(ROOT / folder))
+# Deploy.py sits at the top
+sys.path.append(str(ROOT))
@@ -0,0 +1,40 @@
+"""Stands in for the PowerShell host: speaks its framed protocol, but runs a tiny language of its own.
+
+    echo TEXT     TEXT on stdout, exit 0
+    fail CODE     "boom" on stderr, exit CODE
+    sleep SECS    answers after SECS
+    pid           this process's id
+    stray         prints a line outside any frame first
+    crash         dies without answering
+"""
+import base64
+import os
+import sys
+import time
+
+
+def frame(request_id, code, out="", err=""):
+    blob = lambda text: base64.b64encode(text.encode("utf-8")).decode("ascii")
+    print(f"@@RESONANCE {request_id} {code} {blob(out)} {blob(err)}", flush=True)
+
+
+for line in sys.stdin:
+    request_id, payload = line.rstrip("\n").split(" ", 1)
+    command, _, arg = base64.b64decode(payload).decode("utf-8").partition(" ")
+    if command == "echo":
+        frame(request_id, 0, arg)
+    elif command == "fail":
+        frame(request_id, int(arg), err="boom")
+    elif command == "sleep":
+        time.sleep(float(arg))
+        frame(request_id, 0, arg)
+    elif command == "pid":
+        frame(request_id, 0, str(os.getpid()))
+    elif command == "stray":
+        print("WARNING: something chatty", flush=True)
+        frame(request_id, 0, "after the noise")
+    elif command == "crash":
+        print("host going down", file=sys.stderr, flush=True)
+        os._exit(7)
+    else:
+        frame(request_id, 1, err=f"unknown command {command}")
@@ -0,0 +1,38 @@
+import argparse
+import json
+
+import pytest
+
+from Incantation import STEPS, load_answers
+
+
+def sheet(tmp_path, content=None, steps=None, yes=False):
+    parser = argparse.ArgumentParser()
+    path = None
+    if content is not None:
+        path = tmp_path / "answers.json"
+        path.write_text(content, encoding="utf-8")
+    return load_answers(parser, argparse.Namespace(answers=path and str(path), steps=steps, yes=yes))
+
+
+def test_interactive_without_any_flag(tmp_path):
+    assert sheet(tmp_path) is None
+
+
+def test_yes_and_steps(tmp_path):
+    assert sheet(tmp_path, yes=True) == {step: True for step in STEPS}
+    answers = sheet(tmp_path, steps="fonts, software")
+    assert [step for step, answer in answers.items() if answer] == ["fonts", "software"]
+
+
+def test_answer_file_overrides(tmp_path):
+    answers = sheet(tmp_path, json.dumps({"gemini": 1, "fonts": False}), yes=True)
+    assert answers["gemini"] is True and answers["fonts"] is False and answers["path"] is True
+
+
+@pytest.mark.parametrize("content", ["[1]", '"x"', "3", "null", "{not json", '{"telepathy": true}'])
+def test_bad_answer_files_are_usage_errors(tmp_path, content, capsys):
+    with pytest.raises(SystemExit) as exit:
+        sheet(tmp_path, content)
+    assert exit.value.code == 2
+    assert "answer file" in capsys.readouterr().err
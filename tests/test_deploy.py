@@ -0,0 +1,68 @@
+import os
+
+from Deploy import MANIFEST, deploy, load_manifest
+
+
+def tree(root, files):
+    for rel, text in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+
+def quiet(*args):
+    pass
+
+
+def test_first_deploy_copies_and_records(tmp_path):
+    source, dest = tmp_path / "src", tmp_path / "dest"
+    tree(source, {"a.py": "a", "Spells/b.py": "b", ".git/config": "x", "__pycache__/c.pyc": "x"})
+    result, failures = deploy(source, dest, log=quiet)
+    assert not failures
+    assert sorted(result.copy) == ["Spells/b.py", "a.py"]
+    assert sorted(load_manifest(dest)) == ["Spells/b.py", "a.py"]
+
+
+def test_no_op_deploy_leaves_the_manifest_alone(tmp_path):
+    source, dest = tmp_path / "src", tmp_path / "dest"
+    tree(source, {"a.py": "a"})
+    deploy(source, dest, log=quiet)
+    manifest = dest / MANIFEST
+    os.utime(manifest, ns=(1, 1))
+    result, _ = deploy(source, dest, log=quiet)
+    assert result.copy == [] and result.unchanged == ["a.py"]
+    assert manifest.stat().st_mtime_ns == 1
+
+
+def test_a_change_rewrites_the_manifest(tmp_path):
+    source, dest = tmp_path / "src", tmp_path / "dest"
+    tree(source, {"a.py": "a"})
+    deploy(source, dest, log=quiet)
+    tree(source, {"a.py": "changed"})
+    result, _ = deploy(source, dest, log=quiet)
+    assert result.copy == ["a.py"]
+    assert (dest / "a.py").read_text(encoding="utf-8") == "changed"
+    assert load_manifest(dest)["a.py"]["size"] == len("changed")
+
+
+def test_dry_run_touches_nothing(tmp_path):
+    source, dest = tmp_path / "src", tmp_path / "dest"
+    tree(source, {"a.py": "a"})
+    deploy(source, dest, log=quiet)
+    os.utime(dest / MANIFEST, ns=(1, 1))
+    tree(source, {"a.py": "changed", "new.py": "n"})
+    result, _ = deploy(source, dest, dry_run=True, log=quiet)
+    assert sorted(result.copy) == ["a.py", "new.py"]
+    assert (dest / MANIFEST).stat().st_mtime_ns == 1
+    assert not (dest / "new.py").exists()
+
+
+def test_prune_removes_what_the_source_lost(tmp_path):
+    source, dest = tmp_path / "src", tmp_path / "dest"
+    tree(source, {"a.py": "a", "old/gone.py": "g"})
+    deploy(source, dest, log=quiet)
+    (source / "old" / "gone.py").unlink()
+    result, _ = deploy(source, dest, prune=True, log=quiet)
+    assert result.prune == ["old/gone.py"]
+    assert not (dest / "old").exists()
+    assert sorted(load_manifest(dest)) == ["a.py"]
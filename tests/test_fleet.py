@@ -0,0 +1,96 @@
+import asyncio
+import io
+
+import pytest
+from rich.console import Console
+
+import Incantation
+from Fleet import FLEET_STEPS, FleetRunner, load_hosts, summary_table
+from Rehearsal import LatencyProfile
+from Transport import StandInTransport
+
+QUICK = LatencyProfile(winget_list=0.01, winget_install=0.02, npm_install=0.01, download=0.0,
+                       powershell_start=0.02, powershell_call=0.0, registry_op=0.0)
+FLAKY = LatencyProfile(winget_list=0.01, winget_install=0.02, npm_install=0.01, download=0.0,
+                       powershell_start=0.02, powershell_call=0.0, registry_op=0.0, install_failure=1.0)
+
+
+class UnreachableTransport(StandInTransport):
+    """A host whose cache cannot be written: the ritual breaks before any step runs."""
+
+    def __init__(self, name):
+        super().__init__(name, QUICK)
+        blocker = self.machine.root / "blocker"
+        blocker.write_text("", encoding="utf-8")
+        self.cache = blocker / "cache"
+
+
+@pytest.fixture(autouse=True)
+def private_cache(tmp_path, monkeypatch):
+    # The ritual keeps font and inventory caches under LOCALAPPDATA; keep them out of the real one
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "Local"))
+
+
+def run_fleet(transports, tmp_path, max_concurrent):
+    events, running, peak = [], set(), [0]
+
+    def on_event(name, state):
+        events.append((name, state))
+        if state == "running":
+            running.add(name)
+            peak[0] = max(peak[0], len(running))
+        elif state != "waiting":
+            running.discard(name)
+
+    runner = FleetRunner(transports, FLEET_STEPS, max_concurrent, tmp_path / "logs", on_event=on_event)
+    return asyncio.run(runner.run()), events, peak[0]
+
+
+def test_the_fleet_never_runs_more_than_the_cap(tmp_path):
+    transports = [StandInTransport(f"host-{n:02d}", QUICK, seed=n) for n in range(7)]
+    results, events, peak = run_fleet(transports, tmp_path, max_concurrent=3)
+    assert peak == 3
+    assert [result.name for result in results] == [f"host-{n:02d}" for n in range(7)]
+    assert all(result.status == "done" for result in results), [(r.name, r.status, r.error) for r in results]
+    assert all(result.outcomes["software"] in ("done", "harmony") for result in results)
+    assert [state for name, state in events if name == "host-00"] == ["waiting", "running", "done"]
+
+
+def test_each_target_gets_its_own_log(tmp_path):
+    transports = [StandInTransport(f"host-{n}", QUICK, seed=n) for n in range(3)]
+    results, _, _ = run_fleet(transports, tmp_path, max_concurrent=3)
+    for result in results:
+        text = (tmp_path / "logs" / f"{result.name}.log").read_text(encoding="utf-8")
+        assert result.log == str(tmp_path / "logs" / f"{result.name}.log")
+        assert result.name in text
+        assert all(other.name not in text for other in results if other is not result)
+
+
+def test_failing_hosts_do_not_stop_the_others(tmp_path):
+    transports = [StandInTransport("steady-1", QUICK), StandInTransport("flaky", FLAKY),
+                  UnreachableTransport("unreachable"), StandInTransport("steady-2", QUICK)]
+    results, _, _ = run_fleet(transports, tmp_path, max_concurrent=2)
+    by_name = {result.name: result for result in results}
+    assert by_name["steady-1"].status == by_name["steady-2"].status == "done"
+    assert by_name["flaky"].status == "failed"
+    assert by_name["flaky"].outcomes["software"] == "failed"
+    assert by_name["unreachable"].status == "error" and by_name["unreachable"].error
+    assert "The ritual broke" in (tmp_path / "logs" / "unreachable.log").read_text(encoding="utf-8")
+
+    console = Console(file=io.StringIO(), theme=Incantation.custom_theme, width=200)
+    console.print(summary_table(results))
+    rows = {line.split()[0]: line for line in console.file.getvalue().splitlines() if line.strip()[:1].isalpha()}
+    assert "attuned" in rows["steady-1"] and "attuned" in rows["steady-2"]
+    assert "resisted" in rows["flaky"] and "software" in rows["flaky"]
+    assert "broken" in rows["unreachable"] and by_name["unreachable"].error[:30] in rows["unreachable"]
+
+
+def test_steps_that_read_this_machine_are_refused():
+    with pytest.raises(ValueError, match="fonts"):
+        FleetRunner([], ["software", "fonts"])
+
+
+def test_load_hosts_skips_blanks_and_comments(tmp_path):
+    hosts = tmp_path / "hosts.txt"
+    hosts.write_text("# the lab\nlab-01\n\n  lab-02  # by the window\n", encoding="utf-8")
+    assert load_hosts(hosts) == ["lab-01", "lab-02"]
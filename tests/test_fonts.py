@@ -0,0 +1,154 @@
+import hashlib
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import FIXTURES
+from Fonts import FontCache, FontPipeline, FontSource, font_member_names, font_members
+
+ARCHIVE = (FIXTURES / "fonts" / "glyphs.zip").read_bytes()
+DIGEST = hashlib.sha256(ARCHIVE).hexdigest()
+FONTS = ["Glyphs-Regular.ttf", "Glyphs-Bold.otf"]
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Serves the fixture archive. /cut breaks off halfway the first time; /norange ignores Range."""
+
+    def do_GET(self):
+        server = self.server
+        wanted = self.headers.get("Range")
+        server.requests.append((self.path, wanted))
+        if self.path == "/garbage":
+            return self._send(200, b"<html>not today</html>")
+        match = re.fullmatch(r"bytes=(\d+)-", wanted or "")
+        if match and not self.path.startswith("/norange"):
+            start = int(match.group(1))
+            if start >= len(ARCHIVE):
+                return self._send(416, b"")
+            return self._send(206, ARCHIVE[start:], {"Content-Range": f"bytes {start}-{len(ARCHIVE) - 1}/{len(ARCHIVE)}"})
+        if self.path.startswith("/cut") and not server.cut:
+            server.cut = True
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(ARCHIVE)))
+            self.end_headers()
+            self.wfile.write(ARCHIVE[:len(ARCHIVE) // 2])
+            self.close_connection = True
+            return
+        self._send(200, ARCHIVE)
+
+    def _send(self, code, body, headers=()):
+        self.send_response(code)
+        for name, value in dict(headers).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.requests, httpd.cut = [], False
+    threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_only_font_files_leave_the_archive():
+    archive = FIXTURES / "fonts" / "glyphs.zip"
+    assert font_member_names(archive) == FONTS
+    assert [name for name, _ in font_members(archive)] == FONTS
+    assert all(data for _, data in font_members(archive))
+
+
+def test_a_cut_off_download_resumes_from_where_it_stopped(server, tmp_path):
+    cache = FontCache(tmp_path)
+    source = FontSource("Glyphs", server.url + "/cut/glyphs.zip", DIGEST)
+    with pytest.raises(ConnectionError, match="cut off"):
+        cache.fetch(source)
+    partial, = tmp_path.glob("*.part")
+    assert partial.stat().st_size == len(ARCHIVE) // 2
+
+    path = cache.fetch(source)
+    assert path == tmp_path / f"{DIGEST}.zip"
+    assert path.read_bytes() == ARCHIVE
+    assert server.requests[-1] == ("/cut/glyphs.zip", f"bytes={len(ARCHIVE) // 2}-")
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_a_server_ignoring_the_range_starts_over(server, tmp_path):
+    cache = FontCache(tmp_path)
+    source = FontSource("Glyphs", server.url + "/norange/glyphs.zip", DIGEST)
+    partial = tmp_path / f"{hashlib.sha256(source.url.encode()).hexdigest()[:16]}.part"
+    partial.write_bytes(b"stale bytes from some other day")
+    assert cache.fetch(source).read_bytes() == ARCHIVE
+
+
+def test_a_checksum_mismatch_keeps_nothing(server, tmp_path):
+    cache = FontCache(tmp_path)
+    source = FontSource("Glyphs", server.url + "/glyphs.zip", "0" * 64)
+    with pytest.raises(ValueError, match="checksum mismatch"):
+        cache.fetch(source)
+    assert sorted(path.name for path in tmp_path.iterdir()) == []
+    assert cache.members(source) is None
+
+
+def test_a_cache_hit_downloads_nothing(server, tmp_path):
+    source = FontSource("Glyphs", server.url + "/glyphs.zip", DIGEST)
+    path = FontCache(tmp_path).fetch(source)
+    assert len(server.requests) == 1
+    # A new cache over the same folder reads index.json instead of the network
+    again = FontCache(tmp_path)
+    assert again.fetch(source) == path
+    assert again.members(source) == FONTS
+    assert len(server.requests) == 1
+
+
+def test_a_damaged_cached_archive_is_fetched_again(server, tmp_path):
+    source = FontSource("Glyphs", server.url + "/glyphs.zip", DIGEST)
+    path = FontCache(tmp_path).fetch(source)
+    path.write_bytes(ARCHIVE[:100])
+    assert FontCache(tmp_path).fetch(source).read_bytes() == ARCHIVE
+    assert len(server.requests) == 2
+
+
+def test_a_download_that_is_no_archive_is_refused(server, tmp_path):
+    with pytest.raises(ValueError, match="not a zip archive"):
+        FontCache(tmp_path).fetch(FontSource("Glyphs", server.url + "/garbage"))
+    assert sorted(path.name for path in tmp_path.iterdir()) == []
+
+
+class Backend:
+    def __init__(self, installed=()):
+        self.installed = set(installed)
+        self.calls = []
+
+    def installed_files(self):
+        return set(self.installed)
+
+    def install(self, files):
+        self.calls.append([name for name, _ in files])
+        self.installed.update(name.lower() for name, _ in files)
+
+
+def test_an_unpinned_archive_is_reported_with_its_hash(server, tmp_path):
+    backend = Backend(installed={"glyphs-bold.otf"})
+    pipeline = FontPipeline(backend, FontCache(tmp_path))
+    result, = pipeline.run([FontSource("Glyphs", server.url + "/glyphs.zip")])
+    assert (result.error, result.installed, result.present) == ("", 1, 1)
+    assert result.unpinned == DIGEST
+    assert backend.calls == [["Glyphs-Regular.ttf"]]
+
+
+def test_a_pinned_archive_is_not_reported(server, tmp_path):
+    pipeline = FontPipeline(Backend(), FontCache(tmp_path))
+    result, = pipeline.run([FontSource("Glyphs", server.url + "/glyphs.zip", DIGEST.upper())])
+    assert (result.error, result.installed, result.unpinned) == ("", 2, "")
+    assert pipeline.missing(FontSource("Glyphs", server.url + "/glyphs.zip")) == []
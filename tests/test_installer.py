@@ -0,0 +1,111 @@
+import subprocess
+import threading
+import time
+
+from Installer import InstallScheduler, Package
+
+
+def pkg(name, exclusive=False):
+    return Package(name, f"Vendor.{name}", exclusive=exclusive)
+
+
+class LatencyRunner:
+    """Pretends to run winget: each install takes a while, and overlaps are counted as they happen."""
+
+    def __init__(self, latency=0.05, fail=None, hang=(), explode=()):
+        self.latency = latency
+        self.fail = fail or {}
+        self.hang = set(hang)
+        self.explode = set(explode)
+        self.lock = threading.Lock()
+        self.active = set()
+        self.peak = 0
+        self.exclusive_peak = 0
+        self.started = []
+        self.exclusive = set()
+
+    def run(self, argv, timeout=None):
+        pkg_id = argv[argv.index("--id") + 1]
+        with self.lock:
+            self.active.add(pkg_id)
+            self.started.append(pkg_id)
+            self.peak = max(self.peak, len(self.active))
+            self.exclusive_peak = max(self.exclusive_peak, len(self.active & self.exclusive))
+        try:
+            if pkg_id in self.hang:
+                time.sleep(timeout)
+                raise subprocess.TimeoutExpired(argv, timeout)
+            time.sleep(self.latency)
+            if pkg_id in self.explode:
+                raise OSError("winget vanished")
+            code = self.fail.get(pkg_id, 0)
+            stdout = "Downloading x\n  ██▒▒ 1.0 MB / 2.0 MB\nSuccessfully installed\n" if not code else ""
+            return subprocess.CompletedProcess(argv, code, stdout, "Installer failed with exit code: 1603" if code else "")
+        finally:
+            with self.lock:
+                self.active.discard(pkg_id)
+
+
+def scheduler_for(packages, runner, **kwargs):
+    runner.exclusive = {p.pkg_id for p in packages if p.exclusive}
+    return InstallScheduler(runner, **kwargs)
+
+
+def test_no_more_than_max_workers_at_once():
+    packages = [pkg(f"P{n}") for n in range(10)]
+    runner = LatencyRunner()
+    outcomes = scheduler_for(packages, runner, max_workers=3).run(packages)
+    assert all(outcome.ok for outcome in outcomes)
+    assert runner.peak == 3
+
+
+def test_exclusive_installers_never_overlap():
+    packages = [pkg("Python", True), pkg("A"), pkg("Node", True), pkg("B"), pkg("PowerToys", True), pkg("C")]
+    runner = LatencyRunner()
+    outcomes = scheduler_for(packages, runner, max_workers=4).run(packages)
+    assert [outcome.package for outcome in outcomes] == packages
+    assert runner.exclusive_peak == 1
+    assert runner.peak > 1  # the shared ones still ran beside them
+
+
+def test_shared_installers_jump_past_a_waiting_exclusive_one():
+    packages = [pkg("Python", True), pkg("Node", True), pkg("Git")]
+    runner = LatencyRunner()
+    scheduler_for(packages, runner, max_workers=2).run(packages)
+    # Git takes the free slot while Node waits for Python
+    assert set(runner.started[:2]) == {"Vendor.Python", "Vendor.Git"}
+    assert runner.started[2] == "Vendor.Node"
+
+
+def test_a_stuck_install_times_out_and_the_rest_carry_on():
+    packages = [pkg("Stuck"), pkg("Fine"), pkg("Also")]
+    runner = LatencyRunner(hang={"Vendor.Stuck"})
+    stuck, fine, also = scheduler_for(packages, runner, max_workers=2, timeout=0.1).run(packages)
+    assert (stuck.ok, stuck.returncode, stuck.detail) == (False, -1, "timed out after 0.1s")
+    assert fine.ok and also.ok
+
+
+def test_one_failure_does_not_stop_the_others():
+    packages = [pkg("Broken"), pkg("Gone"), pkg("Fine"), pkg("Also")]
+    runner = LatencyRunner(fail={"Vendor.Broken": 1603}, explode={"Vendor.Gone"})
+    broken, gone, fine, also = scheduler_for(packages, runner, max_workers=1).run(packages)
+    assert (broken.ok, broken.returncode, broken.detail) == (False, 1603, "Installer failed with exit code: 1603")
+    assert (gone.ok, gone.returncode, gone.detail) == (False, -1, "winget vanished")
+    assert fine.ok and also.ok
+    assert len(runner.started) == 4
+
+
+def test_events_follow_each_package():
+    packages = [pkg("Fine"), pkg("Broken")]
+    events = []
+    runner = LatencyRunner(latency=0, fail={"Vendor.Broken": 1603})
+    scheduler_for(packages, runner, max_workers=1,
+                  on_event=lambda package, state, outcome=None: events.append((package.name, state))).run(packages)
+    assert [state for name, state in events if name == "Fine"] == ["queued", "summoning", "progress", "progress", "progress", "summoned"]
+    assert [state for name, state in events if name == "Broken"] == ["queued", "summoning", "failed"]
+
+
+def test_install_command_is_exact_and_silent():
+    assert InstallScheduler.install_command(pkg("Git")) == [
+        "winget", "install", "-e", "--id", "Vendor.Git", "--silent",
+        "--accept-source-agreements", "--accept-package-agreements"]
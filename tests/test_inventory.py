@@ -0,0 +1,65 @@
+from conftest import FIXTURES
+from Inventory import InventoryReader, WingetInventory
+
+
+def load(name):
+    # newline="" keeps winget's \r\n and spinner carriage returns as captured
+    with open(FIXTURES / "winget" / name, encoding="utf-8", newline="") as f:
+        return WingetInventory.parse(f.read())
+
+
+def test_english_listing_with_available_column():
+    inventory = load("list_en.txt")
+    assert len(inventory) == 8
+    git = inventory.get("git.git")
+    assert (git.name, git.version, git.available, git.source) == ("Git", "2.45.1", "2.46.0", "winget")
+    assert inventory.is_outdated("Git.Git")
+    assert not inventory.is_outdated("Python.Python.3.12")
+    # Local installs have no source at all
+    assert inventory.get(r"ARP\Machine\X64\SomeLocalTool").source == ""
+
+
+def test_truncated_ids_match_by_prefix():
+    inventory = load("list_en.txt")
+    assert inventory.is_installed("Microsoft.VisualStudio.2022.BuildTools")
+    assert not inventory.is_installed("Microsoft.VisualStudio.2019.BuildTools")
+    # A truncated name is just a name; its ID is whole
+    assert inventory.get("Microsoft.DotNet.DesktopRuntime.8").name.endswith("…")
+
+
+def test_non_english_header_without_available_column():
+    inventory = load("list_de.txt")
+    assert len(inventory) == 3
+    notepad = inventory.get("Notepad++.Notepad++")
+    assert (notepad.version, notepad.available, notepad.source) == ("8.6.7", "", "winget")
+
+
+def test_wide_glyphs_count_as_two_cells():
+    wechat = load("list_de.txt").get("Tencent.WeChat")
+    assert (wechat.name, wechat.version) == ("微信", "3.9.10")
+
+
+def test_overflowing_cells_push_the_rest_right():
+    inventory = load("list_shift.txt")
+    assert inventory.get("Vendor.OverflowingIdentifier").version == "1.0"
+    nightly = inventory.get("Vendor.Nightly")
+    assert (nightly.version, nightly.source) == ("2024.06.13-nightly+abc", "winget")
+    assert inventory.get("Vendor.Plain").version == "3.1"
+
+
+def test_no_table_means_empty_inventory():
+    assert len(load("list_empty.txt")) == 0
+
+
+def test_reader_stops_at_the_blank_line():
+    reader = InventoryReader()
+    for line in ["Name   Id        Version  Source", "-" * 40, "Git    Git.Git   2.45.1   winget", "", "x      Not.Row   1        winget"]:
+        reader.feed(line)
+    assert [entry.pkg_id for entry in reader.entries] == ["Git.Git"]
+
+
+def test_round_trip_through_json():
+    inventory = load("list_en.txt")
+    again = WingetInventory.from_json(inventory.to_json())
+    assert again.is_installed("Microsoft.VisualStudio.2022.BuildTools")
+    assert again.get("Git.Git") == inventory.get("Git.Git")
@@ -0,0 +1,149 @@
+import json
+
+import pytest
+
+from Incantation import STEPS
+from Journal import RunJournal
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def interrupted(path, clock=None):
+    journal = RunJournal(path, clock=clock or Clock()).load()
+    journal.record_consent({"fonts": True})
+    journal.record_step("fonts", "done")
+    return journal
+
+
+def test_a_missing_journal_starts_blank(tmp_path):
+    journal = RunJournal(tmp_path / "journal.json").load()
+    assert not journal.resumed
+    assert journal.summary() == ([], [])
+
+
+@pytest.mark.parametrize("text", ["", "{", "not json at all", "[1, 2]", '"journal"', "\x00\x00\x00"])
+def test_a_corrupt_journal_starts_blank(tmp_path, text):
+    path = tmp_path / "journal.json"
+    path.write_text(text, encoding="utf-8")
+    journal = RunJournal(path).load()
+    assert not journal.resumed
+    assert journal.step_status("fonts") is None
+
+
+def test_a_journal_cut_off_mid_write_starts_blank(tmp_path):
+    path = tmp_path / "journal.json"
+    interrupted(path)
+    text = path.read_text(encoding="utf-8")
+    for cut in range(1, len(text) - 1, 7):
+        path.write_text(text[:cut], encoding="utf-8")
+        assert not RunJournal(path).load().resumed, cut
+
+
+@pytest.mark.parametrize("damage", [
+    {"version": 99},
+    {"finished": True},
+    {"steps": ["fonts"]},
+    {"items": None},
+    {"effects": "explorer"},
+])
+def test_a_journal_of_the_wrong_shape_starts_blank(tmp_path, damage):
+    path = tmp_path / "journal.json"
+    interrupted(path, Clock())
+    data = json.loads(path.read_text(encoding="utf-8"))
+    path.write_text(json.dumps({**data, **damage}), encoding="utf-8")
+    journal = RunJournal(path, clock=Clock()).load()
+    assert not journal.resumed
+    assert journal.step_status("fonts") is None
+
+
+def test_a_stale_journal_starts_blank(tmp_path):
+    path = tmp_path / "journal.json"
+    interrupted(path, Clock(1000))
+    assert RunJournal(path, clock=Clock(1000 + 3600)).load().resumed
+    assert not RunJournal(path, clock=Clock(1000 + 25 * 3600)).load().resumed
+
+
+def test_fresh_ignores_the_journal(tmp_path):
+    path = tmp_path / "journal.json"
+    interrupted(path)
+    assert not RunJournal(path, clock=Clock()).load(fresh=True).resumed
+
+
+def test_a_finished_journal_is_not_resumed(tmp_path):
+    path = tmp_path / "journal.json"
+    interrupted(path).finish()
+    assert not RunJournal(path, clock=Clock()).load().resumed
+
+
+@pytest.mark.parametrize("stop", range(len(STEPS)))
+def test_resume_after_each_step(tmp_path, stop):
+    # The ritual dies part-way through STEPS[stop], one item landed and one still to go
+    path = tmp_path / "journal.json"
+    journal = RunJournal(path, clock=Clock()).load()
+    journal.record_consent({step: step != "desktop" for step in STEPS})
+    for step in STEPS[:stop]:
+        journal.record_step(step, "running")
+        journal.record_item(step, f"{step}-item", "done")
+        journal.record_step(step, "declined" if step == "desktop" else "done")
+    current = STEPS[stop]
+    journal.record_step(current, "running")
+    journal.record_item(current, "landed", "done")
+    journal.record_item(current, "resisted", "failed", "exit 1603")
+    journal.record_effect("explorer", current)
+
+    resumed = RunJournal(path, clock=Clock()).load()
+    assert resumed.resumed
+    assert resumed.consent == {step: step != "desktop" for step in STEPS}
+    # Declined is not settled: the rerun asks about it again
+    settled = [step for step in STEPS[:stop] if step != "desktop"]
+    assert [step for step in STEPS if resumed.settled(step)] == settled
+    assert resumed.summary() == (settled, [step for step in STEPS[:stop] if step == "desktop"] + [current])
+    assert resumed.step_status(current) == "running"
+    assert resumed.item_status(current, "landed") == "done"
+    assert resumed.item_status(current, "resisted") == "failed"
+    assert resumed.item_status(current, "never started") is None
+    assert resumed.effects == {"explorer": [current]}
+
+
+def test_effects_owed_are_remembered_until_done(tmp_path):
+    path = tmp_path / "journal.json"
+    journal = RunJournal(path, clock=Clock()).load()
+    journal.record_effect("explorer", "taskbar layout")
+    journal.record_effect("explorer", "taskbar layout")
+    journal.record_effect("explorer", "apparatus settings")
+    journal.record_effect("environment")
+    assert RunJournal(path, clock=Clock()).load().effects == {"explorer": ["taskbar layout", "apparatus settings"], "environment": []}
+    journal.effect_done("explorer")
+    assert RunJournal(path, clock=Clock()).load().effects == {"environment": []}
+
+
+def test_a_handed_off_journal_resumes_without_calling_it_an_interruption(tmp_path):
+    path = tmp_path / "journal.json"
+    interrupted(path).hand_off()
+    elevated = RunJournal(path, clock=Clock()).load()
+    assert elevated.resumed and not elevated.interrupted
+    assert elevated.consent == {"fonts": True}
+    # Had the elevated run died, the next one is picking up an interruption
+    after_crash = RunJournal(path, clock=Clock()).load()
+    assert after_crash.resumed and after_crash.interrupted
+
+
+def test_a_taken_back_journal_is_an_interruption_again(tmp_path):
+    path = tmp_path / "journal.json"
+    journal = interrupted(path)
+    journal.hand_off()
+    journal.hand_off(False)  # UAC was declined, so this run carried on itself
+    assert RunJournal(path, clock=Clock()).load().interrupted
+
+
+def test_a_crashed_run_is_an_interruption(tmp_path):
+    path = tmp_path / "journal.json"
+    interrupted(path)
+    journal = RunJournal(path, clock=Clock()).load()
+    assert journal.resumed and journal.interrupted
@@ -0,0 +1,98 @@
+import pytest
+
+from MatchFile import edit, rewrite_problem, scan
+
+FLOW = """matches:
+  - triggers: [":a", ":b"]
+    replace: "old"
+    word: true
+    vars:
+      - name: now
+        type: date
+  - trigger: ":z"
+    replace: "zed"
+"""
+
+BLOCK = """matches:
+  - triggers:
+      - ":a"
+      - ':b'
+      - :c
+    replace: |
+      two
+      lines
+
+  - trigger: ":z"
+    replace: "zed"
+"""
+
+
+def rewrite(text, *runes):
+    match = next(m for m in scan(text) if runes[0][0] in m.triggers)
+    return edit(text, {(match.start, match.end): list(runes)})
+
+
+def by_trigger(text):
+    return {trigger: match for match in scan(text) for trigger in match.triggers}
+
+
+def test_sole_trigger_keeps_its_other_keys():
+    text = rewrite(FLOW.replace('[":a", ":b"]', '[":a"]'), (":a", "new"))
+    assert "word: true" in text and "type: date" in text
+    assert by_trigger(text)[":a"].replace == "new"
+
+
+def test_flow_list_sibling_survives():
+    text = rewrite(FLOW, (":a", "new"))
+    found = by_trigger(text)
+    assert found[":a"].replace == "new"
+    assert found[":b"].replace == "old" and found[":b"].triggers == [":b"]
+    assert "word: true" in text and "type: date" in text
+    assert found[":z"].replace == "zed"
+    # The split-out rune sits right after the entry it left
+    assert found[":b"].end <= found[":a"].start < found[":z"].start
+
+
+def test_block_list_sibling_survives_with_its_quoting():
+    text = rewrite(BLOCK, (":b", "new"))
+    found = by_trigger(text)
+    assert found[":a"].triggers == [":a", ":c"]
+    assert found[":a"].replace == "two\nlines\n"
+    assert found[":b"].replace == "new"
+    assert '      - ":a"\n      - :c\n' in text
+
+
+def test_every_trigger_of_an_entry_at_once():
+    text = rewrite(FLOW, (":a", "one"), (":b", "two"))
+    found = by_trigger(text)
+    assert (found[":a"].replace, found[":b"].replace) == ("one", "two")
+    assert found[":a"].start != found[":b"].start
+    # The entry itself keeps the first rune, options and all
+    assert found[":a"].triggers == [":a"] and "word: true" in text
+
+
+def test_block_replace_is_swapped_whole():
+    text = rewrite(BLOCK.replace("      - ':b'\n      - :c\n", ""), (":a", "short"))
+    found = by_trigger(text)
+    assert found[":a"].replace == "short" and "lines" not in text
+    assert found[":z"].replace == "zed"
+
+
+def test_forms_are_not_rewritten():
+    text = 'matches:\n  - trigger: ":f"\n    form: "Hi [[name]]"\n'
+    match, = scan(text)
+    assert rewrite_problem(match, [":f"])
+    with pytest.raises(ValueError):
+        edit(text, {(match.start, match.end): [(":f", "new")]})
+    # A sibling of a form can still be split out: the form keeps the rest
+    text = 'matches:\n  - triggers: [":f", ":g"]\n    form: "Hi [[name]]"\n'
+    match, = scan(text)
+    assert rewrite_problem(match, [":g"]) is None
+    found = by_trigger(edit(text, {(match.start, match.end): [(":g", "new")]}))
+    assert found[":g"].replace == "new" and found[":f"].triggers == [":f"]
+
+
+def test_append_to_existing_and_missing_section():
+    text = edit(FLOW, appended=[(":n", 'say "hi"\n')])
+    assert by_trigger(text)[":n"].replace == 'say "hi"\n'
+    assert scan(edit("", appended=[(":n", "x")]))[0].triggers == [":n"]
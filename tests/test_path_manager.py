@@ -0,0 +1,77 @@
+import os
+
+from PathManager import MACHINE_ENVIRONMENT_KEY, MemoryEnvStore, PathManager, RegistryEnvStore, compact, expand, fresh_path
+from Registry import REG_EXPAND_SZ, REG_SZ, MemoryRegistry
+
+ENV = {"HOME": "/home/apprentice", "PROGRAMS": "/opt"}
+FOLDERS = {"/", "/usr/bin", "/opt/git", "/home/apprentice/spells", "/opt/python/bin"}
+
+
+def exists(path):
+    return path in FOLDERS
+
+
+def manager(value, **kwargs):
+    store = MemoryEnvStore(value)
+    return store, PathManager(store, env=ENV, exists=exists, **kwargs)
+
+
+def test_expand_is_case_insensitive_and_keeps_unknowns():
+    assert expand("%home%/x;%NOPE%", ENV) == "/home/apprentice/x;%NOPE%"
+
+
+def test_duplicates_dead_and_empty_go():
+    plan = compact(["/usr/bin", "%PROGRAMS%/git", "/opt/git/", "/gone", " ", "%UNSET%/bin"], env=ENV, exists=exists)
+    assert plan.after == ["/usr/bin", "%PROGRAMS%/git", "%UNSET%/bin"]
+    assert dict(plan.removed) == {"/opt/git/": "duplicate", "/gone": "dead", " ": "empty"}
+    assert plan.summary() == "1 duplicate, 1 dead, 1 empty"
+
+
+def test_missing_drive_keeps_its_entries():
+    # Only the root counts: with no "/" at all, nothing can be called dead
+    plan = compact(["/gone"], env=ENV, exists=lambda path: False)
+    assert plan.after == ["/gone"]
+
+
+def test_ensure_and_priorities():
+    plan = compact(["/usr/bin", "/opt/git", "/opt/python/bin"], ensure=["%HOME%/spells"], priorities=["/opt/python"],
+                   env=ENV, exists=exists)
+    assert plan.after == ["/opt/python/bin", "/usr/bin", "/opt/git", "%HOME%/spells"]
+    assert ("+", "%HOME%/spells") in plan.diff() and ("~", "/opt/python/bin") in plan.diff()
+
+
+def test_apply_writes_only_when_changed():
+    store, paths = manager("/usr/bin;/usr/bin", ensure=["/opt/git"])
+    assert paths.apply().changed
+    assert store.value == "/usr/bin;/opt/git" and store.writes == 1
+    assert not paths.apply().changed
+    assert store.writes == 1
+
+
+def test_apply_rereads_the_store():
+    store, paths = manager("/usr/bin")
+    paths.plan()
+    store.value = "/usr/bin;/opt/git;/opt/git"
+    paths.apply()
+    assert store.value == "/usr/bin;/opt/git"
+
+
+def test_registry_store_keeps_the_value_type():
+    registry = MemoryRegistry({(r"HKCU:\Environment", "Path"): ("/usr/bin;/usr/bin", REG_SZ)})
+    store = RegistryEnvStore(registry)
+    PathManager(store, env=ENV, exists=exists).apply()
+    assert store.get() == ("/usr/bin", REG_SZ)
+    assert RegistryEnvStore(MemoryRegistry()).get() == ("", REG_EXPAND_SZ)
+
+
+def test_fresh_path_puts_machine_then_user_then_process_only_entries():
+    registry = MemoryRegistry({
+        (MACHINE_ENVIRONMENT_KEY, "Path"): ("/usr/bin;%PROGRAMS%/node", REG_EXPAND_SZ),
+        (r"HKCU:\Environment", "Path"): ("%HOME%/spells;/usr/bin/", REG_EXPAND_SZ),
+    })
+    current = os.pathsep.join(["/venv/bin", "/usr/bin"])
+    assert fresh_path(registry, current, ENV).split(os.pathsep) == ["/usr/bin", "/opt/node", "/home/apprentice/spells", "/venv/bin"]
+
+
+def test_fresh_path_without_registry_values_keeps_the_current_one():
+    assert fresh_path(MemoryRegistry(), os.pathsep.join(["/a", "/b"])) == os.pathsep.join(["/a", "/b"])
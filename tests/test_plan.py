@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+from Plan import Resource, apply, survey
+
+
+class Stub(Resource):
+    def __init__(self, name, drift=None, error=None, fails=None):
+        super().__init__(name)
+        self.drift = drift
+        self.error = error
+        self.fails = fails
+        self.applied = False
+
+    def check(self):
+        if self.error:
+            raise self.error
+        return self.drift
+
+    def apply(self):
+        if self.fails:
+            raise self.fails
+        self.applied = True
+
+
+def test_survey_keeps_only_drift_in_resource_order():
+    resources = [Stub("a", "off"), Stub("b"), Stub("c", "missing")]
+    assert [(d.resource.name, d.detail) for d in survey(resources)] == [("a", "off"), ("c", "missing")]
+
+
+def test_a_check_that_raises_counts_as_drift():
+    drift, = survey([Stub("a", error=OSError("no access"))])
+    assert drift.detail == "probe failed: no access"
+
+
+def test_checks_run_side_by_side():
+    # Each check waits for all three: only passes if they run at the same time
+    barrier = threading.Barrier(3, timeout=5)
+
+    class Waiting(Stub):
+        def check(self):
+            barrier.wait()
+            return "drift"
+
+    assert len(survey([Waiting(str(n)) for n in range(3)])) == 3
+
+
+def test_survey_of_nothing():
+    assert survey([]) == []
+
+
+def test_apply_reports_each_outcome_and_carries_on():
+    ok, broken, also_ok = Stub("ok", "x"), Stub("broken", "x", fails=RuntimeError("denied")), Stub("also", "x")
+    results = apply(survey([ok, broken, also_ok]))
+    assert [(d.resource.name, error) for d, error in results] == [("ok", None), ("broken", "denied"), ("also", None)]
+    assert ok.applied and also_ok.applied and not broken.applied
+
+
+def test_apply_names_errors_without_a_message():
+    (_, error), = apply(survey([Stub("a", "x", fails=KeyError())]))
+    assert error == "KeyError"
+
+
+def test_a_resource_without_apply_cannot_be_created():
+    class CheckOnly(Resource):
+        def check(self):
+            return None
+
+    with pytest.raises(TypeError, match="apply"):
+        CheckOnly("half a spell")
@@ -0,0 +1,100 @@
+import base64
+import sys
+import threading
+import time
+
+from conftest import FIXTURES
+from PowerShell import PowerShellHost, PowerShellPool, decode_response, encode_request
+
+HOST = [sys.executable, "-u", str(FIXTURES / "powershell" / "host.py")]
+
+
+def test_frames_round_trip():
+    request_id, payload = encode_request(7, "Write-Output 'ünï'").rstrip("\n").split(" ")
+    assert request_id == "7"
+    assert base64.b64decode(payload).decode("utf-8") == "Write-Output 'ünï'"
+    line = "@@RESONANCE 7 3 w7xuw68= Ym9vbQ==\r\n"
+    assert decode_response(line) == (7, 3, "ünï", "boom")
+    assert decode_response("WARNING: not a frame\n") is None
+    assert decode_response("@@RESONANCE 7 0 half\n") is None
+
+
+def test_a_normal_command():
+    host = PowerShellHost(HOST)
+    try:
+        result = host.run("echo hello, ünïcode")
+        assert (result.returncode, result.stdout, result.stderr) == (0, "hello, ünïcode", "")
+        assert host.run("echo again").stdout == "again"
+        assert host.starts == 1
+    finally:
+        host.close()
+
+
+def test_a_non_zero_exit():
+    host = PowerShellHost(HOST)
+    try:
+        result = host.run("fail 3")
+        assert (result.returncode, result.stdout, result.stderr) == (3, "", "boom")
+        assert host.alive
+    finally:
+        host.close()
+
+
+def test_stray_output_is_not_an_answer():
+    host = PowerShellHost(HOST)
+    try:
+        assert host.run("stray").stdout == "after the noise"
+        assert "WARNING: something chatty" in host.stray
+    finally:
+        host.close()
+
+
+def test_a_crashed_host_reports_and_restarts():
+    host = PowerShellHost(HOST)
+    try:
+        first = host.run("pid").stdout
+        crashed = host.run("crash")
+        assert crashed.returncode == -1
+        assert "host going down" in crashed.stderr
+        assert not host.alive
+        assert host.run("pid").stdout != first
+        assert host.starts == 2
+    finally:
+        host.close()
+
+
+def test_a_timeout_sacrifices_the_host():
+    host = PowerShellHost(HOST)
+    try:
+        started = time.monotonic()
+        result = host.run("sleep 5", timeout=0.3)
+        assert time.monotonic() - started < 3
+        assert (result.returncode, result.stderr) == (-1, "timed out after 0.3s")
+        # The late answer died with the old host; the next command gets its own
+        assert host.run("echo fresh").stdout == "fresh"
+        assert host.starts == 2
+    finally:
+        host.close()
+
+
+def test_the_pool_shares_its_hosts_between_threads():
+    pool = PowerShellPool(size=2, argv=HOST)
+    results = {}
+
+    def ask(n):
+        results[n] = pool.run(f"sleep 0.{n}")
+    try:
+        started = time.monotonic()
+        threads = [threading.Thread(target=ask, args=(n,)) for n in range(1, 7)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+        # Each thread got its own answer, and two hosts shared the work
+        assert {n: result.stdout for n, result in results.items()} == {n: f"0.{n}" for n in range(1, 7)}
+        assert elapsed < 2.1 * 0.8  # one host would need 2.1s of sleeping alone
+        assert len({pool.run("pid").stdout for _ in range(6)}) <= 2
+        assert all(host.starts == 1 for host in pool.hosts)
+    finally:
+        pool.close()
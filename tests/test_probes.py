@@ -0,0 +1,168 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from conftest import FIXTURES
+from Installer import Package
+from Probes import (ABSENT, ProbeCache, ProbeResult, ToolProbes, npm_global_root, npmrc_prefix, probe_files,
+                    probe_npm_global, read_package_json)
+
+PROBES = FIXTURES / "probes"
+PREFIX = PROBES / "prefix"
+ROOT = PREFIX / "lib" / "node_modules"
+NODE = Package("Node.js", "OpenJS.NodeJS", paths=("%ProgramFiles%/nodejs/node.exe",))
+GIT = Package("Git", "Git.Git", paths=("%ProgramFiles%/Git/cmd/git.exe",))
+
+
+def no_node(tool):
+    return None
+
+
+def test_read_package_json():
+    assert read_package_json(ROOT / "typescript") == {"name": "typescript", "version": "5.4.5"}
+    assert read_package_json(ROOT / "broken") is None      # cut off mid-write
+    assert read_package_json(ROOT / "listed") is None      # valid JSON, not a manifest
+    assert read_package_json(ROOT / "nowhere") is None
+
+
+def test_probe_npm_global_present():
+    found = probe_npm_global("typescript", ROOT)
+    assert found == ProbeResult(True, "5.4.5", str(ROOT / "typescript"))
+
+
+def test_probe_npm_global_scoped_names_are_nested_folders():
+    found = probe_npm_global("@google/gemini-cli", ROOT)
+    assert found.found and found.version == "0.1.5"
+    assert Path(found.location) == ROOT / "@google" / "gemini-cli"
+
+
+@pytest.mark.parametrize("package", ["left-pad", "broken", "listed", "@google/missing"])
+def test_probe_npm_global_absent_or_malformed(package):
+    assert probe_npm_global(package, ROOT) is ABSENT
+
+
+def test_probe_npm_global_without_a_version_is_still_installed():
+    assert probe_npm_global("unversioned", ROOT) == ProbeResult(True, "", str(ROOT / "unversioned"))
+
+
+def test_probe_npm_global_without_a_root():
+    assert probe_npm_global("typescript", None) is ABSENT
+
+
+def test_npmrc_prefix():
+    assert npmrc_prefix(PROBES / "home" / ".npmrc") == "/opt/npm-global"
+    assert npmrc_prefix(PROBES / "home-plain" / ".npmrc") is None  # prefix= with nothing after it
+    assert npmrc_prefix(PROBES / "nowhere" / ".npmrc") is None
+
+
+def test_npm_global_root_from_the_environment_first():
+    env = {"NPM_CONFIG_PREFIX": str(PREFIX), "HOME": str(PROBES / "home")}
+    assert npm_global_root(env, no_node, windows=False) == ROOT
+    assert npm_global_root({"npm_config_prefix": "C:/npm"}, no_node, windows=True) == Path("C:/npm") / "node_modules"
+
+
+def test_npm_global_root_from_the_user_npmrc():
+    assert npm_global_root({"HOME": str(PROBES / "home")}, no_node, windows=False) == Path("/opt/npm-global/lib/node_modules")
+    assert npm_global_root({"USERPROFILE": str(PROBES / "home")}, no_node, windows=True) == Path("/opt/npm-global/node_modules")
+
+
+def test_npm_global_root_windows_default_is_appdata():
+    env = {"USERPROFILE": str(PROBES / "home-plain"), "APPDATA": "C:/Users/apprentice/AppData/Roaming"}
+    assert npm_global_root(env, no_node, windows=True) == Path("C:/Users/apprentice/AppData/Roaming/npm/node_modules")
+    assert npm_global_root({"USERPROFILE": str(PROBES / "home-plain")}, no_node, windows=True) is None
+
+
+def test_npm_global_root_elsewhere_follows_node():
+    env = {"HOME": str(PROBES / "home-plain")}
+    assert npm_global_root(env, lambda tool: str(PREFIX / "bin" / tool), windows=False) == ROOT.resolve()
+    assert npm_global_root(env, no_node, windows=False) is None
+
+
+def test_probe_files_takes_the_first_that_exists():
+    env = {"ProgramFiles": str(PROBES / "Program Files")}
+    found = probe_files(["%ProgramFiles%/nodejs/nodemon.exe", "%PROGRAMFILES%/nodejs/node.exe"], env)
+    assert found == ProbeResult(True, location=str(PROBES / "Program Files" / "nodejs" / "node.exe"))
+
+
+def test_probe_files_skips_unknown_variables_and_misses():
+    env = {"ProgramFiles": str(PROBES / "Program Files")}
+    assert probe_files(["%NOWHERE%/nodejs/node.exe", "%ProgramFiles%/Git/cmd/git.exe"], env) is ABSENT
+    assert probe_files([], env) is ABSENT
+
+
+def test_probe_cache_remembers_until_invalidated():
+    cache, calls = ProbeCache(), []
+
+    def probe():
+        calls.append(1)
+        return ProbeResult(True, str(len(calls)))
+    assert cache.probe("key", probe).version == "1"
+    assert cache.probe("key", probe).version == "1"
+    cache.invalidate("key")
+    assert cache.probe("key", probe).version == "2"
+    cache.invalidate()
+    assert cache.probe("key", probe).version == "3"
+
+
+def test_probe_cache_asks_once_for_threads_racing_on_a_key():
+    cache, calls, start = ProbeCache(), [], threading.Barrier(8)
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.05)
+        return ProbeResult(True)
+
+    def ask():
+        start.wait()
+        results.append(cache.probe("key", slow))
+    results = []
+    threads = [threading.Thread(target=ask) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and len(results) == 8
+
+
+def test_probe_cache_probe_all():
+    results = ProbeCache().probe_all({"a": lambda: ProbeResult(True), "b": lambda: ABSENT})
+    assert results == {"a": ProbeResult(True), "b": ABSENT}
+    assert ProbeCache().probe_all({}) == {}
+
+
+def test_tool_probes_probe_all_by_name():
+    env = {"ProgramFiles": str(PROBES / "Program Files"), "NPM_CONFIG_PREFIX": str(PREFIX)}
+    probes = ToolProbes(env, no_node, windows=False)
+    found = probes.probe_all([NODE, GIT], ["@google/gemini-cli", "broken"])
+    assert found["Node.js"].found and not found["Git"].found
+    assert found["@google/gemini-cli"].version == "0.1.5"
+    assert found["broken"] is ABSENT
+
+
+def test_tool_probes_forget_after_an_install(tmp_path):
+    (tmp_path / "lib" / "node_modules").mkdir(parents=True)
+    probes = ToolProbes({"NPM_CONFIG_PREFIX": str(tmp_path), "ProgramFiles": str(tmp_path)}, no_node, windows=False)
+    assert not probes.npm_global("typescript").found and not probes.package(GIT).found
+
+    folder = tmp_path / "lib" / "node_modules" / "typescript"
+    folder.mkdir()
+    (folder / "package.json").write_text('{"version": "5.4.5"}', encoding="utf-8")
+    (tmp_path / "Git" / "cmd").mkdir(parents=True)
+    (tmp_path / "Git" / "cmd" / "git.exe").touch()
+    assert not probes.npm_global("typescript").found  # still the memo
+    probes.forget_npm("typescript")
+    probes.forget_package(GIT)
+    assert probes.npm_global("typescript").version == "5.4.5"
+    assert probes.package(GIT).found
+
+
+def test_tool_probes_find_npm_once_node_arrives():
+    node = []
+    probes = ToolProbes({"HOME": str(PROBES / "home-plain")}, lambda tool: node[0] if node else None, windows=False)
+    assert probes.npm_root() is None
+    node.append(str(PREFIX / "bin" / "node"))
+    assert probes.npm_root() is None  # still the memo
+    probes.forget_npm_root()
+    assert probes.npm_global("typescript").version == "5.4.5"
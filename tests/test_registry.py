@@ -0,0 +1,65 @@
+from Registry import (MISSING, REG_DWORD, REG_EXPAND_SZ, REG_SZ, MemoryRegistry, RegistryTransaction, read_value,
+                      split_path)
+
+EXPLORER = r"HKCU:\Software\Microsoft\Windows\CurrentVersion\Explorer\Advanced"
+THEMES = r"HKCU:\Software\Microsoft\Windows\CurrentVersion\Themes\Personalize"
+POLICIES = r"HKLM:\SOFTWARE\Microsoft\Windows\CurrentVersion\Policies\System"
+
+
+def settings(transaction):
+    return (transaction.set(EXPLORER, "Hidden", 1).set(EXPLORER, "HideFileExt", 0)
+            .set(EXPLORER, "ShowTaskViewButton", 0).set(THEMES, "AppsUseLightTheme", 0))
+
+
+def test_split_path_and_read_value():
+    assert split_path(r"hkcu:\Environment") == ("HKCU", "Environment")
+    registry = MemoryRegistry({(r"HKCU:\Environment", "Path"): ("C:\\bin", REG_EXPAND_SZ)})
+    assert read_value(registry, r"HKCU:\Environment", "Path") == "C:\\bin"
+    assert read_value(registry, r"HKCU:\Environment", "Nope") is MISSING
+
+
+def test_values_under_one_key_share_one_open():
+    registry = MemoryRegistry()
+    changes = settings(RegistryTransaction(registry)).commit()
+    assert [change.status for change in changes] == ["changed"] * 4
+    assert registry.opens == 2  # Explorer\Advanced once, Personalize once
+    assert registry.writes == 4
+
+
+def test_subkeys_differing_only_in_case_are_one_key():
+    registry = MemoryRegistry()
+    RegistryTransaction(registry).set(EXPLORER, "Hidden", 1).set(EXPLORER.lower().replace("hkcu", "HKCU"), "HideFileExt", 0).commit()
+    assert registry.opens == 1
+
+
+def test_reapplying_identical_values_writes_nothing():
+    registry = MemoryRegistry()
+    settings(RegistryTransaction(registry)).commit()
+    opens, writes = registry.opens, registry.writes
+    changes = settings(RegistryTransaction(registry)).commit()
+    assert [change.status for change in changes] == ["unchanged"] * 4
+    assert registry.writes == writes
+    assert registry.opens == opens + 2
+
+
+def test_only_differing_values_are_written():
+    registry = MemoryRegistry({(EXPLORER, "Hidden"): (1, REG_DWORD), (EXPLORER, "HideFileExt"): (1, REG_DWORD)})
+    hidden, ext = RegistryTransaction(registry).set(EXPLORER, "Hidden", 1).set(EXPLORER, "HideFileExt", 0).commit()
+    assert (hidden.status, ext.status, ext.previous) == ("unchanged", "changed", 1)
+    assert registry.writes == 1
+
+
+def test_same_data_of_another_type_is_rewritten():
+    registry = MemoryRegistry({(r"HKCU:\Environment", "Path"): ("C:\\bin", REG_SZ)})
+    change, = RegistryTransaction(registry).set(r"HKCU:\Environment", "Path", "C:\\bin", REG_EXPAND_SZ).commit()
+    assert change.status == "changed"
+    assert registry.query("HKCU", "Environment", "Path") == ("C:\\bin", REG_EXPAND_SZ)
+
+
+def test_a_denied_key_fails_alone():
+    registry = MemoryRegistry(denied=[POLICIES])
+    transaction = settings(RegistryTransaction(registry)).set(POLICIES, "EnableLinkedConnections", 1)
+    *rest, policy = transaction.commit()
+    assert (policy.status, policy.detail) == ("failed", "Access Denied (Run as Admin)")
+    assert all(change.status == "changed" for change in rest)
+    assert transaction.pending == []
@@ -0,0 +1,64 @@
+from pathlib import Path
+
+import pytest
+
+import RitualBenchmark
+from Incantation import STEPS
+from Journal import RunJournal
+from Rehearsal import PROFILES, FakeMachine
+
+
+def test_npm_arrives_with_node_and_is_found_after_the_install(monkeypatch):
+    machine = FakeMachine(PROFILES["nominal"])
+    try:
+        assert machine.which("npm") is None
+        env = dict(machine.env, PATH=str(machine.bin))  # nothing of this host's own node
+        for key, value in env.items():
+            monkeypatch.setenv(key, value)
+        restore = RitualBenchmark.quiet_console()
+        try:
+            inc, _ = RitualBenchmark.build(machine)
+            inc.survey()
+            inc.gather_consent()
+            inc.perform()
+            inc.powershell.close()
+        finally:
+            restore()
+        assert machine.which("npm") == str(machine.node / "npm")
+        assert inc.outcomes.get("gemini") != "failed"
+        assert Path(machine.npm_root, "@google", "gemini-cli", "package.json").exists()
+    finally:
+        machine.cleanup()
+
+
+def ritual(machine, answers, journal=None):
+    restore = RitualBenchmark.quiet_console()
+    try:
+        inc, _ = RitualBenchmark.build(machine, answers, journal)
+        inc.survey()
+        inc.gather_consent()
+        inc.perform()
+        inc.powershell.close()
+    finally:
+        restore()
+    return inc
+
+
+@pytest.mark.parametrize("handed_off, expected", [(False, "done"), (True, "declined")])
+def test_a_declined_step_is_asked_again_unless_the_run_was_handed_on(monkeypatch, handed_off, expected):
+    machine = FakeMachine(PROFILES["nominal"])
+    try:
+        for key, value in machine.env.items():
+            monkeypatch.setenv(key, value)
+        first = ritual(machine, {step: step != "desktop" for step in STEPS})
+        assert first.outcomes["desktop"] == "declined"
+        if handed_off:
+            first.journal.hand_off()
+
+        # Said yes this time; only the elevated relaunch of the same run holds them to the earlier no
+        journal = RunJournal(first.journal.path).load()
+        second = ritual(machine, {step: True for step in STEPS}, journal)
+        assert second.outcomes["desktop"] == expected
+        assert journal.step_status("desktop") == expected
+    finally:
+        machine.cleanup()
@@ -0,0 +1,154 @@
+import subprocess
+
+import pytest
+
+from Effects import EffectQueue
+from Installer import Package
+from PathManager import MemoryEnvStore, PathManager
+from Probes import ABSENT, ProbeResult
+from Registry import REG_DWORD, MemoryRegistry
+from Resources import NpmGlobalResource, PackageResource, PathResource, RegistryValueResource
+
+EXPLORER = r"HKCU:\Software\Microsoft\Windows\CurrentVersion\Explorer\Advanced"
+
+
+class FakeRunner:
+    """Answers winget/npm with fixed exit codes and remembers what it was asked."""
+
+    def __init__(self, codes=None, stdout=""):
+        self.codes = codes or {}
+        self.stdout = stdout
+        self.calls = []
+
+    def run(self, argv, timeout=None):
+        self.calls.append([str(arg) for arg in argv])
+        code = next((code for key, code in self.codes.items() if key in argv), 0)
+        return subprocess.CompletedProcess(argv, code, self.stdout, "boom" if code else "")
+
+
+class FakeInventory:
+    def __init__(self, installed=()):
+        self.installed = set(installed)
+        self.invalidated = 0
+
+    def load(self):
+        return self
+
+    def is_installed(self, pkg_id):
+        return pkg_id in self.installed
+
+    def invalidate(self):
+        self.invalidated += 1
+
+
+class FakeProbes:
+    def __init__(self, found=(), root="/npm"):
+        self.found = set(found)
+        self.root = root
+        self.forgotten = []
+
+    def package(self, package):
+        return ProbeResult(True) if package.pkg_id in self.found else ABSENT
+
+    def npm_global(self, name):
+        return ProbeResult(True, "1.0.0") if name in self.found else ABSENT
+
+    def npm_root(self):
+        return self.root
+
+    def forget_package(self, package):
+        self.forgotten.append(package.pkg_id)
+
+    def forget_npm(self, name):
+        self.forgotten.append(name)
+
+
+GIT = Package("Git", "Git.Git")
+NODE = Package("Node.js", "OpenJS.NodeJS", exclusive=True)
+
+
+def test_package_found_on_disk_skips_the_inventory():
+    inventory = FakeInventory()
+    assert PackageResource(GIT, inventory, FakeRunner(), FakeProbes(found={"Git.Git"})).check() is None
+
+
+def test_package_falls_back_to_the_inventory():
+    assert PackageResource(GIT, FakeInventory({"Git.Git"}), FakeRunner(), FakeProbes()).check() is None
+    assert PackageResource(GIT, FakeInventory(), FakeRunner(), FakeProbes()).check() == "not installed"
+    assert PackageResource(GIT, FakeInventory(), FakeRunner()).check() == "not installed"
+
+
+def test_package_apply_installs_and_forgets_what_it_knew():
+    inventory, probes, runner = FakeInventory(), FakeProbes(), FakeRunner()
+    PackageResource(GIT, inventory, runner, probes).apply()
+    assert runner.calls[0][:5] == ["winget", "install", "-e", "--id", "Git.Git"]
+    assert inventory.invalidated == 1
+    assert probes.forgotten == ["Git.Git"]
+
+
+def test_package_apply_raises_on_a_failed_install():
+    with pytest.raises(RuntimeError, match="boom"):
+        PackageResource(GIT, FakeInventory(), FakeRunner({"Git.Git": 1603})).apply()
+
+
+def test_install_all_returns_outcomes_in_order():
+    inventory, probes, runner = FakeInventory(), FakeProbes(), FakeRunner({"OpenJS.NodeJS": 1})
+    resources = [PackageResource(pkg, inventory, runner, probes) for pkg in (GIT, NODE)]
+    events = []
+    outcomes = PackageResource.install_all(resources, max_workers=2, on_event=lambda pkg, state, outcome=None: events.append(state))
+    assert [(o.package.name, o.ok) for o in outcomes] == [("Git", True), ("Node.js", False)]
+    assert sorted(probes.forgotten) == ["Git.Git", "OpenJS.NodeJS"]
+    assert events.count("queued") == 2 and "summoned" in events and "failed" in events
+    assert PackageResource.install_all([]) == []
+
+
+def test_registry_value_check_and_apply():
+    registry = MemoryRegistry({(EXPLORER, "Hidden"): (2, REG_DWORD)})
+    resource = RegistryValueResource("settings", EXPLORER, "Hidden", 1, registry)
+    assert resource.check() == "2 -> 1"
+    resource.apply()
+    assert resource.check() is None
+    assert RegistryValueResource("settings", EXPLORER, "HideFileExt", 0, registry).check() == "unset -> 0"
+
+
+def test_registry_value_apply_raises_when_denied():
+    resource = RegistryValueResource("settings", EXPLORER, "Hidden", 1, MemoryRegistry(denied=[EXPLORER]))
+    with pytest.raises(RuntimeError, match="Access Denied"):
+        resource.apply()
+
+
+def test_npm_global_reads_probes_then_installs():
+    probes, runner = FakeProbes(), FakeRunner()
+    resource = NpmGlobalResource("@google/gemini-cli", runner, probes, which=lambda tool: "/bin/npm")
+    assert resource.check() == "not installed"
+    resource.apply()
+    assert runner.calls == [["/bin/npm", "install", "-g", "@google/gemini-cli", "--loglevel=http"]]
+    assert probes.forgotten == ["@google/gemini-cli"]
+    probes.found.add("@google/gemini-cli")
+    assert resource.check() is None
+
+
+def test_npm_global_without_probes_asks_npm():
+    runner = FakeRunner(stdout="/usr/lib\n`-- @google/gemini-cli@0.1.0\n")
+    assert NpmGlobalResource("@google/gemini-cli", runner, which=lambda tool: "npm").check() is None
+    assert runner.calls == [["npm", "list", "-g", "@google/gemini-cli"]]
+
+
+def test_npm_global_without_npm():
+    resource = NpmGlobalResource("@google/gemini-cli", FakeRunner(), FakeProbes(), which=lambda tool: None)
+    with pytest.raises(RuntimeError, match="npm not found"):
+        resource.apply()
+
+
+def test_path_resource_rewrites_and_asks_for_a_broadcast(tmp_path):
+    spells = tmp_path / "Spells"
+    spells.mkdir()
+    store = MemoryEnvStore(str(tmp_path))
+    effects = EffectQueue()
+    effects.define("environment", "Broadcast", lambda: None)
+    resource = PathResource(PathManager(store, ensure=[str(spells)]), effects)
+    assert resource.check()
+    resource.apply()
+    assert str(spells) in store.value
+    assert resource.check() is None
+    assert [effect.name for effect, _ in effects.pending()] == ["environment"]
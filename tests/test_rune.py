@@ -0,0 +1,61 @@
+import pytest
+
+import Rune
+from MatchFile import scan
+
+
+@pytest.fixture
+def match_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("APPDATA", str(tmp_path))
+    monkeypatch.setattr(Rune.voice, "plain", True)
+    folder = tmp_path / "espanso" / "match"
+    folder.mkdir(parents=True)
+    return folder
+
+
+def runes(match_dir):
+    text = (match_dir / "base.yml").read_text(encoding="utf-8")
+    return {trigger: match.replace for match in scan(text) for trigger in match.triggers}, text
+
+
+def test_import_overwrite_keeps_sibling_triggers(match_dir, tmp_path):
+    (match_dir / "base.yml").write_text('matches:\n  - triggers: [":a", ":b"]\n    replace: "old"\n    word: true\n', encoding="utf-8")
+    source = tmp_path / "runes.csv"
+    source.write_text("a,new\n", encoding="utf-8")
+    assert Rune.import_runes(str(source), overwrite=True) == 0
+    found, text = runes(match_dir)
+    assert found == {":a": "new", ":b": "old"}
+    assert "word: true" in text
+
+
+def test_import_overwrites_two_triggers_of_one_entry(match_dir, tmp_path):
+    (match_dir / "base.yml").write_text('matches:\n  - triggers: [":a", ":b", ":c"]\n    replace: "old"\n', encoding="utf-8")
+    source = tmp_path / "runes.jsonl"
+    source.write_text('{"trigger": "a", "replace": "one"}\n{"trigger": ":b", "replace": "two"}\n', encoding="utf-8")
+    assert Rune.import_runes(str(source), overwrite=True) == 0
+    assert runes(match_dir)[0] == {":a": "one", ":b": "two", ":c": "old"}
+
+
+def test_import_without_overwrite_skips_existing(match_dir, tmp_path):
+    (match_dir / "base.yml").write_text('matches:\n  - trigger: ":a"\n    replace: "old"\n', encoding="utf-8")
+    source = tmp_path / "runes.csv"
+    source.write_text("trigger,replace\na,new\nn,fresh\n", encoding="utf-8")
+    assert Rune.import_runes(str(source)) == 0
+    assert runes(match_dir)[0] == {":a": "old", ":n": "fresh"}
+
+
+def test_import_leaves_forms_alone(match_dir, tmp_path, capsys):
+    (match_dir / "base.yml").write_text('matches:\n  - trigger: ":f"\n    form: "Hi [[name]]"\n', encoding="utf-8")
+    source = tmp_path / "runes.csv"
+    source.write_text("f,text\n", encoding="utf-8")
+    assert Rune.import_runes(str(source), overwrite=True) == 0
+    assert 'form: "Hi [[name]]"' in runes(match_dir)[1]
+    out = capsys.readouterr().out
+    assert "Cannot overwrite :f: its entry expands to something other than text" in out
+    assert "Left alone: 1" in out
+    assert "Already known: 0" in out
+
+
+def test_import_from_a_missing_file(match_dir, tmp_path, capsys):
+    assert Rune.import_runes(str(tmp_path / "nowhere.csv")) == 1
+    assert "Cannot read" in capsys.readouterr().out
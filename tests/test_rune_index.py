@@ -0,0 +1,39 @@
+import os
+import stat
+
+import pytest
+
+from RuneIndex import TriggerIndex, write_atomic
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX modes")
+def test_write_atomic_keeps_the_mode(tmp_path):
+    path = tmp_path / "base.yml"
+    path.write_text("matches:\n", encoding="utf-8")
+    path.chmod(0o644)
+    write_atomic(path, "matches:\n  - trigger: \":a\"\n    replace: \"x\"\n")
+    assert stat.S_IMODE(path.stat().st_mode) == 0o644
+    assert not [p for p in tmp_path.iterdir() if p.name.endswith(".tmp")]
+
+
+def test_write_atomic_creates_new_files(tmp_path):
+    path = tmp_path / "deep" / "new.yml"
+    write_atomic(path, "matches:\n")
+    assert path.read_text(encoding="utf-8") == "matches:\n"
+
+
+def test_index_only_reparses_changed_files(tmp_path):
+    match_dir = tmp_path / "match"
+    match_dir.mkdir()
+    (match_dir / "a.yml").write_text('matches:\n  - trigger: ":a"\n    replace: "x"\n', encoding="utf-8")
+    (match_dir / "b.yml").write_text('matches:\n  - triggers: [":b", ":bb"]\n    replace: "y"\n', encoding="utf-8")
+    index = TriggerIndex(match_dir).load().refresh()
+    assert index.reparsed == 2
+    assert index.lookup(":bb") == [("b.yml", 1, 3)]
+    assert index.replacement(":a") == "x"
+
+    write_atomic(match_dir / "a.yml", 'matches:\n  - trigger: ":a"\n    replace: "changed"\n')
+    again = TriggerIndex(match_dir).load().refresh()
+    assert again.reparsed == 1
+    assert again.replacement(":a") == "changed"
+    assert again.shadowing(":b") == ([], [":bb"])
@@ -0,0 +1,70 @@
+import json
+import subprocess
+import sys
+
+from conftest import ROOT
+from MatchFile import scan
+from RuneJournal import RuneJournal
+
+SCRIBE = """
+import json, sys
+from pathlib import Path
+sys.path.insert(0, {spells!r})
+from Rune import write_runes
+match_dir = Path({match_dir!r})
+n = int(sys.argv[1])
+added, rewritten, skipped, lost, _ = write_runes(match_dir, match_dir / "base.yml", [(f":p{{n}}", f"mine {{n}}"), (":shared", f"from {{n}}")])
+print(json.dumps({{"added": [t for t, _ in added], "lost": [t for t, _ in lost], "skipped": [t for t, _ in skipped]}}))
+"""
+
+
+def test_many_scribes_at_once(tmp_path):
+    match_dir = tmp_path / "match"
+    match_dir.mkdir()
+    (match_dir / "base.yml").write_text("matches:\n", encoding="utf-8")
+    script = SCRIBE.format(spells=str(ROOT / "Spells"), match_dir=str(match_dir))
+    scribes = [subprocess.Popen([sys.executable, "-c", script, str(n)], stdout=subprocess.PIPE, text=True) for n in range(16)]
+    reports = [json.loads(scribe.communicate(timeout=60)[0]) for scribe in scribes]
+    assert all(scribe.returncode == 0 for scribe in scribes)
+
+    text = (match_dir / "base.yml").read_text(encoding="utf-8")
+    found = {trigger: match.replace for match in scan(text) for trigger in match.triggers}
+    assert {f":p{n}": f"mine {n}" for n in range(16)}.items() <= found.items()
+    assert sum(len(match.triggers) for match in scan(text)) == 17  # no trigger written twice
+    # Exactly one scribe got :shared; the rest were told theirs did not land
+    assert sum(":shared" in report["added"] for report in reports) == 1
+    assert all(":shared" in report["added"] + report["lost"] + report["skipped"] for report in reports)
+    assert all(f":p{n}" in report["added"] for n, report in enumerate(reports))
+
+
+def test_a_burst_is_written_once(tmp_path):
+    journal = RuneJournal(tmp_path, debounce=0.05, root=tmp_path / ".rune")
+    journal.append([(":a", "1")])
+    journal.append([(":b", "2")], overwrite=True)
+    writes = []
+    assert journal.flush(writes.append) == 1
+    assert [[entry["trigger"] for entry in batch] for batch in writes] == [[":a", ":b"]]
+    assert writes[0][1]["overwrite"] is True
+    assert not journal.pending()
+
+
+def test_torn_lines_are_skipped(tmp_path):
+    journal = RuneJournal(tmp_path, debounce=0.05, root=tmp_path / ".rune")
+    journal.append([(":a", "1")])
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"trigger": ":b", "repl')  # a crash halfway through an append
+    writes = []
+    journal.flush(writes.append)
+    assert [entry["trigger"] for entry in writes[0]] == [":a"]
+
+
+def test_a_dead_writers_entries_come_first(tmp_path):
+    journal = RuneJournal(tmp_path, debounce=0.05, root=tmp_path / ".rune")
+    journal.root.mkdir()
+    # Left behind by a writer that died mid-flush
+    journal.flushing.write_text(json.dumps({"trigger": ":old", "replace": "x", "overwrite": False}) + "\n", encoding="utf-8")
+    journal.append([(":new", "y")])
+    writes = []
+    journal.flush(writes.append)
+    assert [entry["trigger"] for entry in writes[0]] == [":old", ":new"]
+    assert not journal.flushing.exists()
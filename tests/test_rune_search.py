@@ -0,0 +1,50 @@
+import pytest
+
+import Rune
+from RuneSearch import TrigramIndex, open_search
+from Voice import Voice, strip_markup
+
+
+@pytest.fixture
+def match_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("APPDATA", str(tmp_path))
+    folder = tmp_path / "espanso" / "match"
+    folder.mkdir(parents=True)
+    entries = [(":t1", "val 1"), (":t14", "val 14"), (":t140", "val 140"), (":t2", "val 2"), (":sig", "Kind regards, [name]")]
+    (folder / "base.yml").write_text("matches:\n" + "".join(f'  - trigger: "{t}"\n    replace: "{r}"\n' for t, r in entries),
+                                     encoding="utf-8")
+    return folder
+
+
+def ranked(match_dir, query):
+    return [hit[3][0] for hit in open_search(match_dir).search(query)]
+
+
+def test_exact_trigger_wins(match_dir):
+    assert ranked(match_dir, "t14")[0] == ":t14"
+    assert ranked(match_dir, "val 14")[0] == ":t14"
+
+
+def test_ties_go_to_the_closer_fit(match_dir):
+    assert ranked(match_dir, "14") == [":t14", ":t140"]
+    # Every "val n" holds the query whole; the shorter ones fit it better
+    assert ranked(match_dir, "val")[:4] == [":t1", ":t2", ":t14", ":t140"]
+
+
+def test_only_changed_files_are_rebuilt(match_dir):
+    open_search(match_dir)
+    assert TrigramIndex(match_dir).load().refresh().rebuilt == 0
+
+
+@pytest.mark.parametrize("plain", [True, False])
+def test_queries_with_brackets_print_as_typed(match_dir, monkeypatch, capsys, plain):
+    monkeypatch.setattr(Rune, "voice", Voice(plain=plain))
+    assert Rune.find_runes("[name]") == 0
+    assert "[name]" in capsys.readouterr().out
+    assert Rune.find_runes("[bold unclosed") == 1
+    assert "[bold unclosed" in capsys.readouterr().out
+
+
+def test_escape_round_trips_through_plain_output():
+    voice = Voice(plain=True)
+    assert strip_markup(f"[warning]{voice.escape('[info] and [1/3]')}[/warning]") == "[info] and [1/3]"
@@ -0,0 +1,133 @@
+import io
+import os
+import signal
+import threading
+import time
+
+import pytest
+from rich.console import Console
+
+from Output import StepConsole
+from Scheduler import StepScheduler, StepSpec
+
+
+class Recorder:
+    """Steps that take a while and note who ran beside whom."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = {}
+        self.peaks = {}
+        self.starts = {}
+        self.ends = {}
+
+    def step(self, name, needs=(), lanes=(), seconds=0.05, error=None):
+        def run():
+            with self.lock:
+                self.starts[name] = time.perf_counter()
+                for lane in lanes:
+                    self.active[lane] = self.active.get(lane, 0) + 1
+                    self.peaks[lane] = max(self.peaks.get(lane, 0), self.active[lane])
+            time.sleep(seconds)
+            with self.lock:
+                for lane in lanes:
+                    self.active[lane] -= 1
+                self.ends[name] = time.perf_counter()
+            if error:
+                raise RuntimeError(error)
+        return StepSpec(name, run, tuple(needs), tuple(lanes))
+
+
+def test_steps_wait_for_what_they_need():
+    rec = Recorder()
+    steps = [rec.step("finalize", needs=("gemini", "path")), rec.step("gemini", needs=("software",)),
+             rec.step("path", needs=("software",)), rec.step("software"), rec.step("fonts")]
+    results = StepScheduler(steps).run()
+    assert [result.name for result in results] == ["finalize", "gemini", "path", "software", "fonts"]
+    assert all(result.status == "done" for result in results)
+    assert rec.starts["gemini"] >= rec.ends["software"] and rec.starts["path"] >= rec.ends["software"]
+    assert rec.starts["finalize"] >= max(rec.ends["gemini"], rec.ends["path"])
+    assert rec.starts["fonts"] < rec.ends["software"]  # needing nothing, it ran alongside
+
+
+def test_lanes_limit_what_runs_together():
+    rec = Recorder()
+    steps = ([rec.step(f"net-{n}", lanes=("network",)) for n in range(6)]
+             + [rec.step(f"reg-{n}", lanes=("registry",)) for n in range(3)]
+             + [rec.step(f"exp-{n}", lanes=("registry", "explorer")) for n in range(2)]
+             + [rec.step(f"odd-{n}", lanes=("unlisted",)) for n in range(2)])
+    StepScheduler(steps, max_workers=8).run()
+    assert rec.peaks == {"network": 4, "registry": 1, "explorer": 1, "unlisted": 1}
+
+
+def test_max_workers_caps_everything():
+    rec = Recorder()
+    StepScheduler([rec.step(f"net-{n}", lanes=("network",)) for n in range(6)], max_workers=2).run()
+    assert rec.peaks["network"] == 2
+
+
+def test_a_failed_step_blocks_its_dependents():
+    rec = Recorder()
+    events = []
+    steps = [rec.step("software", error="winget exploded"), rec.step("gemini", needs=("software",)),
+             rec.step("finalize", needs=("gemini",)), rec.step("settings")]
+    software, gemini, finalize, settings = StepScheduler(
+        steps, on_event=lambda name, state: events.append((name, state))).run()
+    assert (software.status, software.error) == ("failed", "winget exploded")
+    assert (gemini.status, finalize.status) == ("blocked", "blocked")
+    assert gemini.error == "a step it needs did not finish"
+    assert settings.status == "done"
+    assert "gemini" not in rec.starts and "finalize" not in rec.starts
+    assert [state for name, state in events if name == "gemini"] == ["waiting", "blocked"]
+
+
+@pytest.mark.parametrize("steps, message", [
+    ([StepSpec("a", None, ("b",)), StepSpec("b", None, ("c",)), StepSpec("c", None, ("a",)), StepSpec("d", None)], "cycle: a, b, c"),
+    ([StepSpec("a", None, ("a",))], "cycle: a"),
+    ([StepSpec("a", None, ("ghost",))], "unknown steps: ghost"),
+    ([StepSpec("a", None), StepSpec("a", None)], "unique"),
+])
+def test_bad_graphs_are_rejected(steps, message):
+    with pytest.raises(ValueError, match=message):
+        StepScheduler(steps)
+
+
+@pytest.mark.skipif(os.name == "nt", reason="needs a real SIGINT delivered to this process")
+def test_an_interrupt_calls_on_abort_before_waiting_on_running_steps():
+    released = threading.Event()
+
+    def stuck():
+        os.kill(os.getpid(), signal.SIGINT)
+        # Only on_abort lets it go; without it the scheduler would wait here forever
+        if not released.wait(5):
+            raise RuntimeError("never told to stop")
+
+    with pytest.raises(KeyboardInterrupt):
+        StepScheduler([StepSpec("software", stuck)], on_abort=released.set).run()
+    assert released.is_set()
+
+
+def test_step_console_holds_each_steps_output_together():
+    real = Console(file=io.StringIO(), width=80)
+    console = StepConsole(real)
+    start = threading.Barrier(2)
+
+    def step(name):
+        with console.held():
+            start.wait()
+            for n in range(5):
+                console.print(f"{name} line {n}")
+                time.sleep(0.01)
+
+    threads = [threading.Thread(target=step, args=(name,)) for name in ("fonts", "software")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    console.print("after")
+    lines = real.file.getvalue().splitlines()
+    assert lines[-1] == "after"
+    blocks = [line.split()[0] for line in lines[:-1]]
+    # Each step's lines come out as one uninterrupted block
+    assert blocks in (["fonts"] * 5 + ["software"] * 5, ["software"] * 5 + ["fonts"] * 5)
+    assert console.width == 80  # anything else goes straight to the real console
@@ -0,0 +1,87 @@
+import os
+import subprocess
+
+import pytest
+
+from conftest import FIXTURES
+from Inventory import WingetInventory
+from Streaming import ProcessCancelled, StreamingRunner, run_lines
+from Tracing import Tracer, TracedRunner
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="the stand-in winget is started through its #! line")
+
+WINGET = FIXTURES / "streaming" / "winget"
+
+
+def real_bytes(*args):
+    done = subprocess.run([str(WINGET), *args], capture_output=True)
+    return len(done.stdout) + len(done.stderr)
+
+
+def test_the_tail_is_short_but_every_byte_is_counted():
+    lines = []
+    result = StreamingRunner(tail_lines=5).run([WINGET, "list", "2000"], on_line=lines.append)
+    assert result.returncode == 0
+    assert len(result.stdout.splitlines()) == 5
+    assert result.stdout.splitlines()[-1] == "2 upgrades available."
+    assert lines[0] == "Name      Id                    Version  Source"  # the spinner's redraws are gone
+    assert sum(line.startswith("Pkg") for line in lines) == 2000
+    assert result.output_bytes == real_bytes("list", "2000")
+    assert result.output_bytes > len(result.stdout) * 100
+
+
+def test_stderr_is_counted_and_tailed_too():
+    result = StreamingRunner(tail_lines=3).run([WINGET, "install", "--id", "Vendor.Fail"])
+    assert result.returncode != 0  # 1603, as far as a POSIX exit status can say it
+    assert result.stderr.splitlines()[-1] == "Installer failed with exit code: 1603"
+    assert len(result.stderr.splitlines()) == 3
+    assert result.output_bytes == real_bytes("install", "--id", "Vendor.Fail")
+
+
+def test_progress_follows_the_redrawn_bars():
+    updates = []
+    result = run_lines(StreamingRunner(), [WINGET, "install", "--id", "Vendor.Thing"], on_progress=updates.append)
+    assert result.returncode == 0
+    stages = [update.stage for update in updates]
+    assert stages.index("downloading") < stages.index("verified") < stages.index("installing") < stages.index("installed")
+    downloaded = [update.fraction for update in updates if update.stage == "downloading" and update.fraction is not None]
+    assert downloaded == sorted(downloaded) and downloaded[-1] == 1.0
+
+
+def test_a_timeout_kills_the_process():
+    with pytest.raises(subprocess.TimeoutExpired) as raised:
+        StreamingRunner().run([WINGET, "install", "--id", "Vendor.Hang"], timeout=1)
+    assert "Successfully installed" not in raised.value.output
+
+
+def test_nothing_starts_once_cancelled():
+    runner = StreamingRunner()
+    runner.cancel()
+    with pytest.raises(ProcessCancelled):
+        runner.run([WINGET, "list", "1"])
+
+
+def test_traced_spans_report_the_full_output():
+    tracer = Tracer(enabled=True)
+    TracedRunner(StreamingRunner(tail_lines=5), tracer).run([WINGET, "list", "2000"])
+    span, = tracer.spans
+    assert span.attrs == {"exit_code": 0, "output_bytes": real_bytes("list", "2000")}
+
+
+def test_traced_spans_count_bytes_of_plain_results():
+    class Plain:
+        def run(self, argv, timeout=None):
+            return subprocess.CompletedProcess(argv, 0, "ünïcode\n", "")
+
+    tracer = Tracer(enabled=True)
+    TracedRunner(Plain(), tracer).run(["tool"])
+    assert tracer.spans[0].attrs["output_bytes"] == len("ünïcode\n".encode("utf-8"))
+
+
+def test_crlf_split_across_reads_is_one_line():
+    lines = []
+    result = StreamingRunner().run([WINGET, "list", "--split-crlf"], on_line=lines.append)
+    assert lines == ["Name    Id                Version", "-" * 34, "Node.js OpenJS.NodeJS      20.12.2",
+                     "Python  Python.Python.3.12 3.12.3"]
+    inventory = WingetInventory.parse(result.stdout)
+    assert inventory.is_installed("OpenJS.NodeJS") and inventory.is_installed("Python.Python.3.12")
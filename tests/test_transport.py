@@ -0,0 +1,105 @@
+import json
+import subprocess
+
+import pytest
+
+from Registry import MISSING, REG_DWORD, REG_EXPAND_SZ
+from Transport import (EXIT_MARKER, PowerShellRegistry, RemotePowerShell, RemoteRunner, RemoteTransport,
+                       StandInTransport, ps_quote)
+
+
+class RecordingPowerShell:
+    """Remembers every script; answers from a list, in order."""
+
+    def __init__(self, *answers):
+        self.scripts = []
+        self.answers = list(answers)
+
+    def run(self, script, timeout=None):
+        self.scripts.append(script)
+        answer = self.answers.pop(0) if self.answers else ("", 0, "")
+        stdout, code, stderr = answer
+        return subprocess.CompletedProcess(script, code, stdout, stderr)
+
+    def close(self):
+        pass
+
+
+def test_ps_quote_doubles_single_quotes():
+    assert ps_quote("O'Brien's") == "'O''Brien''s'"
+    assert ps_quote(3) == "'3'"
+
+
+def test_remote_powershell_wraps_in_invoke_command():
+    pool = RecordingPowerShell()
+    RemotePowerShell("lab-01", pool).run("Get-Date", timeout=5)
+    assert pool.scripts == ["Invoke-Command -ComputerName 'lab-01' -ErrorAction Stop -ScriptBlock {\nGet-Date\n}"]
+
+
+def test_remote_runner_quotes_arguments_and_reads_the_exit_marker():
+    powershell = RecordingPowerShell(("Found it\nInstalling\n" + f"{EXIT_MARKER} 1603\n", 0, ""))
+    result = RemoteRunner(powershell).run(["winget", "install", "--id", "Vendor.O'Brien"])
+    script, = powershell.scripts
+    assert "& 'winget' @('install', '--id', 'Vendor.O''Brien')" in script
+    assert (result.returncode, result.stdout) == (1603, "Found it\nInstalling")
+
+
+def test_remote_runner_without_a_marker_reports_the_session_failure():
+    powershell = RecordingPowerShell(("", 1, "WinRM cannot complete the operation"))
+    result = RemoteRunner(powershell).run(["npm", "list", "-g"])
+    assert (result.returncode, result.stderr) == (1, "WinRM cannot complete the operation")
+    assert RemoteRunner(RecordingPowerShell(("half an answer", 0, ""))).run(["npm"]).returncode == -1
+
+
+def test_powershell_registry_reads_values_as_json():
+    values = {"Path": ["%USERPROFILE%\\bin", REG_EXPAND_SZ], "Hidden": [1, REG_DWORD]}
+    powershell = RecordingPowerShell((json.dumps(values), 0, ""), ("", 0, ""))
+    registry = PowerShellRegistry(powershell)
+    assert registry.values("HKCU", "Environment") == {"Path": ("%USERPROFILE%\\bin", REG_EXPAND_SZ), "Hidden": (1, REG_DWORD)}
+    assert "Get-Item -LiteralPath 'HKCU:\\Environment'" in powershell.scripts[0]
+    assert "DoNotExpandEnvironmentNames" in powershell.scripts[0]
+    assert registry.query("HKCU", "Nowhere", "Path") is MISSING
+
+
+def test_powershell_registry_writes_with_the_right_kind():
+    powershell = RecordingPowerShell()
+    with PowerShellRegistry(powershell).open("HKCU", r"Software\Resonance") as key:
+        key.set("Motto", "it's fine", 1)
+        key.set("Hidden", 1, REG_DWORD)
+    first, second = powershell.scripts
+    assert "-Name 'Motto' -Value 'it''s fine' -PropertyType String" in first
+    assert "-PropertyType DWord" in second
+
+
+def test_powershell_registry_denied_writes_raise_permission_error():
+    registry = PowerShellRegistry(RecordingPowerShell(("", 1, "Requested registry access is not allowed: Access is denied.")))
+    with pytest.raises(PermissionError):
+        registry.open("HKLM", "SOFTWARE\\Policies").set("X", 1, REG_DWORD)
+    registry = PowerShellRegistry(RecordingPowerShell(("", 1, "The network path was not found.")))
+    with pytest.raises(OSError, match="network path"):
+        registry.values("HKCU", "Environment")
+
+
+def test_remote_which_is_cached_until_the_path_is_refreshed(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path))
+    pool = RecordingPowerShell(("", 0, ""), ("C:\\Program Files\\nodejs\\npm.cmd\n", 0, ""))
+    transport = RemoteTransport("lab-01", "apprentice", pool=pool)
+    assert transport.which("npm") is None
+    assert transport.which("npm") is None
+    assert len(pool.scripts) == 1
+    transport.refresh_path()
+    assert transport.which("npm") == "C:\\Program Files\\nodejs\\npm.cmd"
+    assert "Get-Command 'npm'" in pool.scripts[1]
+    assert transport.cache == tmp_path / "Resonance" / "hosts" / "lab-01"
+
+
+def test_stand_in_transport_is_a_sandbox():
+    transport = StandInTransport("standin-01")
+    try:
+        assert transport.which("winget") and transport.which("npm") is None
+        assert transport.cache.is_dir() and transport.machine.root in transport.cache.parents
+        assert transport.runner.run(["winget", "install", "--id", "OpenJS.NodeJS"]).returncode == 0
+        assert transport.which("npm")
+    finally:
+        transport.close()
+    assert not transport.machine.root.exists()